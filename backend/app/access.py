@@ -0,0 +1,81 @@
+# backend/app/access.py
+
+import os
+from dataclasses import dataclass
+from typing import FrozenSet, Optional
+
+from sqlalchemy import literal
+from sqlmodel import Session, select
+
+from app import models, cache, database
+
+ACCESS_CACHE_TTL_SECONDS = float(os.getenv("ACCESS_CACHE_TTL_SECONDS", "300"))
+
+
+@dataclass(frozen=True)
+class PropertyAccess:
+    """Ids of the properties a user owns and of those they are assigned to as a tenant."""
+    owned: FrozenSet[int]
+    assigned: FrozenSet[int]
+
+    @property
+    def all(self) -> FrozenSet[int]:
+        return self.owned | self.assigned
+
+
+# user_id -> PropertyAccess; unieważniane przez endpointy przypisań i własności
+access_index = cache.TTLCache(ttl_seconds=ACCESS_CACHE_TTL_SECONDS, maxsize=50_000)
+
+
+def property_access_statement(user_id: int):
+    """(property_id, is_owned) rows of the properties a user owns or is assigned to."""
+    owned_stmt = select(models.Property.id, literal(True).label("is_owned")).where(models.Property.owner_id == user_id)
+    assigned_stmt = (
+        select(models.TenantAssignment.property_id, literal(False).label("is_owned"))
+        .where(models.TenantAssignment.tenant_id == user_id)
+    )
+    return owned_stmt.union_all(assigned_stmt)
+
+
+def get_property_access(db: Session, user_id: int) -> PropertyAccess:
+    """
+    Returns the properties reachable by a user, loaded with a single indexed query and cached.
+    The query always runs on the primary database, also when db is a replica session.
+    """
+    cached = access_index.get(user_id)
+    if cached is not None:
+        return cached
+
+    generation = access_index.generation(user_id)
+    statement = property_access_statement(user_id)
+    if db.get_bind() is database.engine:
+        rows = db.exec(statement).all()
+    else:
+        # Wynik jest cache'owany, a invalidate_user działa tylko do następnego odczytu - nie może on
+        # pochodzić z repliki, która bywa opóźniona o SQLITE_REPLICA_REFRESH_SECONDS
+        with Session(database.engine) as primary:
+            rows = primary.exec(statement).all()
+    access = PropertyAccess(
+        owned=frozenset(property_id for property_id, is_owned in rows if is_owned),
+        assigned=frozenset(property_id for property_id, is_owned in rows if not is_owned and property_id is not None),
+    )
+    access_index.set(user_id, access, generation) # pominięte, jeśli invalidate_user zdążył w trakcie zapytania
+    return access
+
+
+def can_access_property(db: Session, user: models.User, property_id: Optional[int]) -> bool:
+    """The admin, owner or assigned tenant check shared by property and invoice endpoints."""
+    if user.role == models.Roles.ADMIN:
+        return True
+    return property_id is not None and property_id in get_property_access(db, user.id).all
+
+
+def invalidate_user(*user_ids: Optional[int]) -> None:
+    """Forgets the cached access of the given users after their ownership or assignments change."""
+    for user_id in user_ids:
+        if user_id is not None:
+            access_index.invalidate(user_id)
+
+
+def invalidate_all() -> None:
+    access_index.clear()
@@ -0,0 +1,199 @@
+# backend/app/admission.py
+"""
+Admission control for the expensive endpoints.
+
+Every route listed in ROUTE_LIMITS gets:
+- a concurrency cap: at most max_concurrent requests of the route run at once (per process),
+- a bounded wait queue: up to max_queue requests wait for a slot, at most queue_timeout_seconds;
+  the overflow and the requests that waited too long get 503 with Retry-After,
+- an optional token bucket per user (per client IP for anonymous requests): rate_per_minute
+  requests with bursts of up to burst; requests over the rate get 429 with Retry-After.
+
+Rejections happen before the request reaches the application, so login floods or upload
+bursts cannot take the workers away from cheap reads. Routes not listed pass through untouched.
+"""
+
+import asyncio
+import math
+import os
+import re
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Pattern, Tuple
+
+from jose import JWTError, jwt
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app import auth, cache
+
+ADMISSION_CONTROL = os.getenv("ADMISSION_CONTROL", "1") == "1"
+# Liczba zapamiętanych kubełków (użytkownik/IP) na trasę; najdawniej używane są usuwane
+ADMISSION_MAX_BUCKETS = int(os.getenv("ADMISSION_MAX_BUCKETS", "100000"))
+
+
+@dataclass(frozen=True)
+class RouteLimit:
+    max_concurrent: int
+    max_queue: int = 0
+    queue_timeout_seconds: float = 5.0
+    rate_per_minute: Optional[float] = None # None: bez limitu na użytkownika
+    burst: int = 1
+    retry_after_seconds: int = 1 # Retry-After przy przepełnionej kolejce
+
+
+# --- Limity tras: jedyne miejsce konfiguracji (ścieżki jak w routerach, metoda + szablon) ---
+ROUTE_LIMITS: Dict[Tuple[str, str], RouteLimit] = {
+    # bcrypt; hashowanie ma własną pulę (passwords.py), tu ograniczamy zgadywanie haseł
+    ("POST", "/auth/login"): RouteLimit(max_concurrent=16, max_queue=64, queue_timeout_seconds=10, rate_per_minute=10, burst=5),
+    ("POST", "/auth/register"): RouteLimit(max_concurrent=4, max_queue=16, queue_timeout_seconds=10, rate_per_minute=5, burst=3),
+    # Zapis plików na dysk
+    ("POST", "/invoices/upload"): RouteLimit(max_concurrent=8, max_queue=32, queue_timeout_seconds=30, rate_per_minute=60, burst=20),
+    ("POST", "/invoices/import"): RouteLimit(max_concurrent=1, max_queue=2, queue_timeout_seconds=10, rate_per_minute=6, burst=2, retry_after_seconds=30),
+    # Strumieniowanie dużych plików
+    ("GET", "/invoices/view/{invoice_id}"): RouteLimit(max_concurrent=32, max_queue=128, queue_timeout_seconds=10, rate_per_minute=300, burst=60),
+    ("GET", "/invoices/export"): RouteLimit(max_concurrent=4, max_queue=8, queue_timeout_seconds=10, rate_per_minute=12, burst=4, retry_after_seconds=5),
+    ("GET", "/invoices/archive"): RouteLimit(max_concurrent=2, max_queue=4, queue_timeout_seconds=10, rate_per_minute=6, burst=2, retry_after_seconds=10),
+}
+
+
+def compile_path(template: str) -> Pattern:
+    """"/invoices/view/{invoice_id}" -> regex matching one path segment per parameter."""
+    parts = re.split(r"\{[^/{}]+\}", template)
+    return re.compile("^" + "[^/]+".join(re.escape(part) for part in parts) + "/?$")
+
+
+class TokenBucket:
+    """Refills rate_per_minute tokens a minute up to burst; every admitted request takes one."""
+
+    def __init__(self, rate_per_minute: float, burst: int):
+        self.rate = rate_per_minute / 60
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated_at = time.monotonic()
+
+    def take(self) -> float:
+        """Takes a token; returns 0 on success, otherwise the seconds until one is available."""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class _RouteGate:
+    def __init__(self, name: str, limit: RouteLimit):
+        self.name = name
+        self.limit = limit
+        self.slots = asyncio.Semaphore(limit.max_concurrent)
+        self.waiting = 0
+        self.metrics = {"in_flight": 0, "queued": 0, "completed": 0, "rejected_busy": 0, "rejected_rate": 0}
+        self.buckets = None
+        if limit.rate_per_minute:
+            # Po czasie pełnego napełnienia kubełek i tak byłby pełny - wpis można zapomnieć
+            refill_seconds = limit.burst / (limit.rate_per_minute / 60)
+            self.buckets = cache.TTLCache(ttl_seconds=refill_seconds, maxsize=ADMISSION_MAX_BUCKETS)
+
+    def take_token(self, client_key: str) -> float:
+        if self.buckets is None:
+            return 0.0
+        bucket = self.buckets.get(client_key)
+        if bucket is None:
+            bucket = TokenBucket(self.limit.rate_per_minute, self.limit.burst)
+        wait = bucket.take()
+        self.buckets.set(client_key, bucket) # Odświeża TTL
+        return wait
+
+    async def acquire(self) -> bool:
+        """Waits for a slot within the queue bounds; False when the request has to be shed."""
+        if self.slots.locked() and self.waiting >= self.limit.max_queue:
+            return False
+        self.waiting += 1
+        self.metrics["queued"] = self.waiting
+        try:
+            await asyncio.wait_for(self.slots.acquire(), timeout=self.limit.queue_timeout_seconds)
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            self.waiting -= 1
+            self.metrics["queued"] = self.waiting
+        self.metrics["in_flight"] += 1
+        return True
+
+    def release(self) -> None:
+        self.metrics["in_flight"] -= 1
+        self.metrics["completed"] += 1
+        self.slots.release()
+
+
+_gates: List[Tuple[str, Pattern, _RouteGate]] = []
+
+
+def _get_gates() -> List[Tuple[str, Pattern, _RouteGate]]:
+    # Tworzone przy pierwszym żądaniu, w pętli zdarzeń serwera
+    if not _gates:
+        for (method, template), limit in ROUTE_LIMITS.items():
+            _gates.append((method, compile_path(template), _RouteGate(f"{method} {template}", limit)))
+    return _gates
+
+
+def _match(method: str, path: str) -> Optional[_RouteGate]:
+    for gate_method, pattern, gate in _get_gates():
+        if gate_method == method and pattern.match(path):
+            return gate
+    return None
+
+
+def client_key(scope: Scope) -> str:
+    """The user name of a valid bearer token, otherwise the client IP address."""
+    authorization = Headers(scope=scope).get("authorization", "")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() == "bearer" and token:
+        try:
+            username = jwt.decode(token, auth.SECRET_KEY, algorithms=[auth.ALGORITHM]).get("sub")
+        except JWTError:
+            username = None
+        if username:
+            return f"user:{username}"
+    client = scope.get("client")
+    return f"ip:{client[0] if client else 'unknown'}"
+
+
+def stats() -> Dict[str, Dict[str, int]]:
+    return {gate.name: dict(gate.metrics) for _, _, gate in _get_gates()}
+
+
+def _reject(status_code: int, detail: str, retry_after: float) -> JSONResponse:
+    return JSONResponse(
+        {"detail": detail}, status_code=status_code, headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+    )
+
+
+class AdmissionControlMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        gate = _match(scope["method"], scope["path"]) if ADMISSION_CONTROL and scope["type"] == "http" else None
+        if gate is None:
+            await self.app(scope, receive, send)
+            return
+
+        wait = gate.take_token(client_key(scope))
+        if wait > 0:
+            gate.metrics["rejected_rate"] += 1
+            await _reject(429, "Too many requests, try again later", wait)(scope, receive, send)
+            return
+
+        if not await gate.acquire():
+            gate.metrics["rejected_busy"] += 1
+            await _reject(503, "Server is busy, try again shortly", gate.limit.retry_after_seconds)(scope, receive, send)
+            return
+        try:
+            # Slot zwalniamy dopiero po wysłaniu całej odpowiedzi (także strumieniowanej)
+            await self.app(scope, receive, send)
+        finally:
+            gate.release()
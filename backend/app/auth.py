@@ -1,9 +1,14 @@
-from passlib.context import CryptContext
+import os
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 from jose import JWTError, jwt
 from fastapi import Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import update
+from sqlalchemy.orm import make_transient_to_detached
+from sqlalchemy.orm.util import identity_key
 from sqlmodel import Session, select
-from app import models, database
+from app import models, database, cache, passwords
 from fastapi.security import OAuth2PasswordBearer
 
 # ... (stałe bez zmian) ...
@@ -11,7 +16,14 @@ SECRET_KEY = "supersecretkey"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+PRINCIPAL_CACHE_TTL_SECONDS = float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "60"))
+PRINCIPAL_CACHE_MAXSIZE = int(os.getenv("PRINCIPAL_CACHE_MAXSIZE", "10000"))
+# Jak długo proces ufa znanej wersji użytkownika; zmiana roli w innym procesie działa najpóźniej po tym czasie
+TOKEN_VERSION_CACHE_TTL_SECONDS = float(os.getenv("TOKEN_VERSION_CACHE_TTL_SECONDS", "5"))
+# Gdy włączone, id/rola/email trafiają do tokenu i większość żądań w ogóle nie pyta bazy
+AUTH_TOKEN_CLAIMS = os.getenv("AUTH_TOKEN_CLAIMS", "0") == "1"
+
+pwd_context = passwords.pwd_context
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
 def get_password_hash(password: str) -> str:
@@ -28,23 +40,128 @@ def get_user_by_email(db: Session, email: str) -> models.User | None:
     statement = select(models.User).where(models.User.email == email)
     return db.exec(statement).first()
 
-def authenticate_user(db: Session, username_or_email: str, password: str) -> models.User | None:
+def _save_user(db: Session, user: models.User) -> models.User:
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    return user
+
+async def authenticate_user(db: Session, username_or_email: str, password: str) -> models.User | None:
+    """
+    Checks the credentials with bcrypt running on the hashing pool.
+    A hash made with an outdated cost is transparently replaced after a successful login.
+    """
     # ZMIANA: Sprawdzamy, czy podano email, czy nazwę użytkownika
-    if "@" in username_or_email:
-        user = get_user_by_email(db, username_or_email)
-    else:
-        user = get_user_by_username(db, username_or_email)
-    
-    if user and verify_password(password, user.hashed_password):
-        return user
-    return None
+    lookup = get_user_by_email if "@" in username_or_email else get_user_by_username
+    user = await run_in_threadpool(lookup, db, username_or_email)
+    if user is None:
+        return None
+
+    valid, new_hash = await passwords.verify_and_update(password, user.hashed_password)
+    if not valid:
+        return None
+    if new_hash:
+        user.hashed_password = new_hash
+        user = await run_in_threadpool(_save_user, db, user)
+    return user
+
+async def create_user(db: Session, user_create: models.UserCreate) -> models.User:
+    """Hashes the password on the hashing pool and stores the new user."""
+    hashed_password = await passwords.hash_password(user_create.password)
+    user_data = user_create.model_dump(exclude={"password"})
+    new_user = models.User(**user_data, hashed_password=hashed_password)
+    return await run_in_threadpool(_save_user, db, new_user)
 
 def create_access_token(data: dict) -> str:
     to_encode = data.copy()
-    expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
+    now = datetime.utcnow()
+    expire = now + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    to_encode.update({"exp": expire, "iat": now})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
+# === Authenticated principal cache ===
+@dataclass(frozen=True)
+class Principal:
+    """The few user columns needed to authorize a request."""
+    id: int
+    username: str
+    email: str
+    role: str
+    token_version: int
+
+    @classmethod
+    def from_user(cls, user: models.User) -> "Principal":
+        return cls(id=user.id, username=user.username, email=user.email, role=user.role, token_version=user.token_version)
+
+# Token subject (username) -> Principal
+principal_cache = cache.TTLCache(ttl_seconds=PRINCIPAL_CACHE_TTL_SECONDS, maxsize=PRINCIPAL_CACHE_MAXSIZE)
+
+# Username -> users.token_version; lets claims be checked with one small query per TTL instead of per request
+token_version_cache = cache.TTLCache(ttl_seconds=TOKEN_VERSION_CACHE_TTL_SECONDS, maxsize=PRINCIPAL_CACHE_MAXSIZE)
+
+def token_data_for_user(user: models.User) -> dict:
+    """Builds the JWT payload for a user, including principal claims when AUTH_TOKEN_CLAIMS is on."""
+    data = {"sub": user.username}
+    if AUTH_TOKEN_CLAIMS:
+        data.update({"uid": user.id, "role": user.role, "email": user.email, "ver": user.token_version})
+    return data
+
+def invalidate_principal(username: str) -> None:
+    """
+    Forgets the cached principal of a user. Must be called when the user is updated or deleted.
+    Other processes notice the change through users.token_version (see bump_token_version) or the
+    missing row: a cached principal is used only while it matches the version, which each process
+    re-reads at most every TOKEN_VERSION_CACHE_TTL_SECONDS.
+    """
+    principal_cache.invalidate(username)
+    token_version_cache.invalidate(username)
+
+def bump_token_version(db: Session, user_id: int) -> None:
+    """
+    Revokes the user's existing claim tokens; call before committing a change of username, email or role.
+    The increment runs in SQL: the User of the request may be a stub built from a cached principal.
+    """
+    db.exec(
+        update(models.User)
+        .where(models.User.id == user_id)
+        .values(token_version=models.User.token_version + 1)
+        .execution_options(synchronize_session=False)
+    )
+
+def _current_token_version(db: Session, username: str) -> int | None:
+    version = token_version_cache.get(username)
+    if version is None:
+        version = db.exec(select(models.User.token_version).where(models.User.username == username)).first()
+        if version is None:
+            return None # Użytkownik usunięty
+        token_version_cache.set(username, version)
+    return version
+
+def _principal_from_claims(db: Session, payload: dict) -> Principal | None:
+    username, user_id, role, email = payload.get("sub"), payload.get("uid"), payload.get("role"), payload.get("email")
+    if user_id is None or role is None or email is None or payload.get("ver") is None:
+        return None
+    # Wersja z bazy, nie z pamięci procesu: działa między procesami i po restarcie
+    if _current_token_version(db, username) != payload["ver"]:
+        return None
+    return Principal(id=user_id, username=username, email=email, role=role, token_version=payload["ver"])
+
+def _attach_principal(db: Session, principal: Principal) -> models.User:
+    """
+    Returns a User bound to the request session without querying the database.
+    Unset columns (e.g. hashed_password) are expired and lazily loaded only if accessed,
+    relationships such as owned_properties keep working as usual.
+    """
+    existing = db.identity_map.get(identity_key(models.User, principal.id))
+    if existing is not None:
+        return existing
+    user = models.User(id=principal.id, username=principal.username, email=principal.email, role=principal.role)
+    make_transient_to_detached(user)
+    db.add(user)
+    # token_version ma wartość domyślną 0 z konstruktora - nie może udawać wartości z bazy
+    db.expire(user, ["token_version"])
+    return user
+
 def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(database.get_db)) -> models.User:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -58,8 +175,27 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
             raise credentials_exception
     except JWTError:
         raise credentials_exception
-    
-    user = get_user_by_username(db, username)
-    if user is None:
-        raise credentials_exception
+
+    principal = None
+    if AUTH_TOKEN_CLAIMS and "ver" in payload:
+        principal = _principal_from_claims(db, payload)
+        if principal is None:
+            # Token wystawiony przed zmianą użytkownika (albo dla usuniętego) - odwołany
+            raise credentials_exception
+    if principal is None:
+        principal = principal_cache.get(username)
+        if principal is not None and _current_token_version(db, username) != principal.token_version:
+            # Użytkownik zmieniony lub usunięty w innym procesie
+            principal_cache.invalidate(username)
+            principal = None
+    if principal is not None:
+        user = _attach_principal(db, principal)
+    else:
+        user = get_user_by_username(db, username)
+        if user is None:
+            raise credentials_exception
+        principal_cache.set(username, Principal.from_user(user))
+        token_version_cache.set(username, user.token_version)
+    # Zapisy tej sesji kierują kolejne odczyty użytkownika do bazy głównej (database.get_read_db)
+    database.set_session_user(db, user.id)
     return user
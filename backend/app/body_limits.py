@@ -0,0 +1,78 @@
+# backend/app/body_limits.py
+"""
+Request body size limits of the upload routes, enforced before the body is read.
+
+FastAPI parses a multipart form (Starlette spools the files to disk) before the endpoint
+runs, so a limit checked in the endpoint only triggers once the whole body has arrived.
+This middleware answers 413 right away when Content-Length is over the route's limit and
+stops a body sent without Content-Length (chunked) as soon as it goes over the limit.
+"""
+
+import os
+from typing import Dict, List, Optional, Pattern, Tuple
+
+from fastapi import HTTPException, status
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app import invoice_import, storage
+from app.admission import compile_path
+
+# Pola formularza i granice multipart poza samym plikiem
+UPLOAD_FORM_OVERHEAD_BYTES = int(os.getenv("UPLOAD_FORM_OVERHEAD_BYTES", str(1024 * 1024)))
+MAX_IMPORT_MANIFEST_BYTES = int(os.getenv("INVOICE_MAX_IMPORT_MANIFEST_BYTES", str(64 * 1024 * 1024)))
+
+BODY_LIMITS: Dict[Tuple[str, str], int] = {
+    ("POST", "/invoices/upload"): storage.MAX_UPLOAD_BYTES + UPLOAD_FORM_OVERHEAD_BYTES,
+    ("POST", "/invoices/import"): invoice_import.MAX_IMPORT_ARCHIVE_BYTES + MAX_IMPORT_MANIFEST_BYTES + UPLOAD_FORM_OVERHEAD_BYTES,
+}
+
+_limits: List[Tuple[str, Pattern, int]] = [
+    (method, compile_path(template), limit) for (method, template), limit in BODY_LIMITS.items()
+]
+
+
+def _limit_for(method: str, path: str) -> Optional[int]:
+    for limit_method, pattern, limit in _limits:
+        if limit_method == method and pattern.match(path):
+            return limit
+    return None
+
+
+def _too_large(limit: int) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"Request body exceeds the maximum size of {limit} bytes",
+    )
+
+
+class BodySizeLimitMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        limit = _limit_for(scope["method"], scope["path"]) if scope["type"] == "http" else None
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        content_length = Headers(scope=scope).get("content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > limit:
+            error = _too_large(limit)
+            await JSONResponse({"detail": error.detail}, status_code=error.status_code)(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    # FastAPI przepuszcza HTTPException z parsowania ciała - klient dostaje 413, nie 400
+                    raise _too_large(limit)
+            return message
+
+        await self.app(scope, limited_receive, send)
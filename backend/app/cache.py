@@ -0,0 +1,98 @@
+# backend/app/cache.py
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+class TTLCache:
+    """
+    Small thread-safe in-process cache with a TTL and LRU eviction.
+    Sync endpoints run in the threadpool, so every operation takes a lock.
+
+    A value computed from the database should be stored with the generation read before the query:
+    set() drops it when the key was invalidated in the meantime, so a slow reader cannot put back
+    data that a concurrent write has already invalidated.
+    """
+
+    def __init__(self, ttl_seconds: float, maxsize: int = 1024):
+        self.ttl_seconds = ttl_seconds
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Liczniki unieważnień: per klucz oraz dla clear()/invalidate_where()
+        self._generations: Dict[Hashable, int] = {}
+        self._epoch = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Returns the cached value, or None when it is missing or expired."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def generation(self, key: Hashable) -> Tuple[int, int]:
+        """The invalidation generation of a key; pass it to set() to skip storing a value that is already stale."""
+        with self._lock:
+            return self._epoch, self._generations.get(key, 0)
+
+    def set(self, key: Hashable, value: Any, generation: Optional[Tuple[int, int]] = None) -> None:
+        with self._lock:
+            if generation is not None and generation != (self._epoch, self._generations.get(key, 0)):
+                return
+            self._data[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def get_or_set(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        """Returns the cached value or computes, stores and returns a new one."""
+        value = self.get(key)
+        if value is None:
+            generation = self.generation(key)
+            value = factory()
+            self.set(key, value, generation)
+        return value
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+            self._generations[key] = self._generations.get(key, 0) + 1
+
+    def invalidate_where(self, predicate: Callable[[Hashable], bool]) -> None:
+        """Drops every entry whose key matches the predicate."""
+        with self._lock:
+            for key in [key for key in self._data if predicate(key)]:
+                del self._data[key]
+            self._epoch += 1 # Klucze liczone właśnie teraz nie są jeszcze w _data
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._generations.clear()
+            self._epoch += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._data)}
+
+
+DASHBOARD_CACHE_TTL_SECONDS = float(os.getenv("DASHBOARD_CACHE_TTL_SECONDS", "30"))
+
+# Dashboard summaries keyed by (user_id, role); cleared on every write made through the routers
+dashboard_summaries = TTLCache(ttl_seconds=DASHBOARD_CACHE_TTL_SECONDS, maxsize=10_000)
+
+
+def invalidate_dashboard_cache() -> None:
+    """Drops all cached dashboard summaries after invoices, properties, assignments or users change."""
+    dashboard_summaries.clear()
@@ -0,0 +1,133 @@
+# backend/app/compression.py
+"""
+Negotiated response compression (brotli or gzip) for responses above a size threshold.
+
+The encoding is picked from Accept-Encoding with its q-values; brotli wins ties when the
+optional Brotli package is installed. Bodies that are already compressed (PDFs, ZIPs,
+images), partial content (206) and responses that set their own Content-Encoding pass
+through untouched. Streaming responses are compressed chunk by chunk and flushed after
+every chunk, so exports still arrive progressively.
+"""
+
+import os
+from typing import Dict, Optional
+
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import GZipResponder, IdentityResponder
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError: # Brotli jest opcjonalny - bez niego serwujemy tylko gzip
+    brotli = None
+
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "4")) # 4-5: dobry stosunek do czasu dla odpowiedzi dynamicznych
+
+# Typy, których kompresja nic nie daje
+INCOMPRESSIBLE_CONTENT_TYPES = (
+    "application/pdf", "application/zip", "application/gzip", "image/", "video/", "audio/", "text/event-stream",
+)
+
+
+def parse_accept_encoding(header: str) -> Dict[str, float]:
+    """Parses an Accept-Encoding header into {coding: q}."""
+    codings = {}
+    for item in header.split(","):
+        coding, _, params = item.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        codings[coding] = q
+    return codings
+
+
+def choose_encoding(header: str) -> Optional[str]:
+    """Returns "br", "gzip" or None (identity) for an Accept-Encoding header."""
+    codings = parse_accept_encoding(header)
+    available = ("br", "gzip") if brotli is not None else ("gzip",)
+    wildcard = codings.get("*", 0.0)
+    best, best_q = None, 0.0
+    for coding in available:
+        q = codings.get(coding, wildcard)
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+class _SelectiveResponder(IdentityResponder):
+    """Skips incompressible content types and partial responses in addition to Starlette's rules."""
+
+    async def send_with_compression(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            await super().send_with_compression(message)
+            headers = Headers(raw=message["headers"])
+            if (
+                message["status"] == 206
+                or "content-range" in headers
+                or headers.get("content-type", "").startswith(INCOMPRESSIBLE_CONTENT_TYPES)
+            ):
+                self.content_type_is_excluded = True
+            return
+        await super().send_with_compression(message)
+
+
+class _GZipResponder(_SelectiveResponder, GZipResponder):
+    def apply_compression(self, body: bytes, *, more_body: bool) -> bytes:
+        if more_body:
+            self.gzip_file.write(body)
+            self.gzip_file.flush() # wysyłamy od razu to, co już skompresowane
+            body = self.gzip_buffer.getvalue()
+            self.gzip_buffer.seek(0)
+            self.gzip_buffer.truncate()
+            return body
+        return super().apply_compression(body, more_body=False)
+
+
+class _BrotliResponder(_SelectiveResponder):
+    content_encoding = "br"
+
+    def __init__(self, app: ASGIApp, minimum_size: int, quality: int) -> None:
+        super().__init__(app, minimum_size)
+        self.compressor = brotli.Compressor(quality=quality)
+
+    def apply_compression(self, body: bytes, *, more_body: bool) -> bytes:
+        compressed = self.compressor.process(body)
+        return compressed + (self.compressor.flush() if more_body else self.compressor.finish())
+
+
+class CompressionMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = COMPRESSION_MIN_BYTES,
+        gzip_level: int = GZIP_LEVEL,
+        brotli_quality: int = BROTLI_QUALITY,
+    ) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding == "br":
+            responder = _BrotliResponder(self.app, self.minimum_size, self.brotli_quality)
+        elif encoding == "gzip":
+            responder = _GZipResponder(self.app, self.minimum_size, compresslevel=self.gzip_level)
+        else:
+            responder = _SelectiveResponder(self.app, self.minimum_size)
+        await responder(scope, receive, send)
@@ -1,12 +1,232 @@
 # app/database.py
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+from fastapi import Depends
+from sqlalchemy import event
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
 from sqlmodel import create_engine, Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./rental.db")
+# Replika tylko do odczytu (dashboard, listy). Bez ustawienia odczyty idą do bazy głównej.
+# Lokalnie może to być drugi plik SQLite, np. sqlite:///./rental_replica.db, odświeżany kopią bazy głównej.
+SQLALCHEMY_READ_DATABASE_URL = os.getenv("DATABASE_READ_URL") or SQLALCHEMY_DATABASE_URL
+
+# --- Profil SQLite ---
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_CACHE_SIZE_KIB = int(os.getenv("SQLITE_CACHE_SIZE_KIB", "65536"))
+SQLITE_REPLICA_REFRESH_SECONDS = float(os.getenv("SQLITE_REPLICA_REFRESH_SECONDS", "5"))
+# Wierszy na indeks czytanych przez ANALYZE przy starcie (0 = cała tabela)
+SQLITE_ANALYSIS_LIMIT = int(os.getenv("SQLITE_ANALYSIS_LIMIT", "1000"))
+
+# --- Profil serwerowej bazy danych (PostgreSQL itp.) ---
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT_SECONDS = float(os.getenv("DB_POOL_TIMEOUT_SECONDS", "30"))
+DB_POOL_RECYCLE_SECONDS = int(os.getenv("DB_POOL_RECYCLE_SECONDS", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "1") == "1"
+
+def _to_async_url(url: str) -> str:
+    """Maps a sync database URL to the async driver of the same database (aiosqlite / asyncpg)."""
+    scheme, rest = url.split("://", 1)
+    backend = scheme.split("+", 1)[0]
+    if backend == "sqlite":
+        return f"sqlite+aiosqlite://{rest}"
+    if backend in ("postgresql", "postgres"):
+        return f"postgresql+asyncpg://{rest}"
+    return url
+
+# Async engine for endpoints using AsyncSession; override to point it at a different driver
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or _to_async_url(SQLALCHEMY_DATABASE_URL)
+ASYNC_READ_DATABASE_URL = os.getenv("ASYNC_DATABASE_READ_URL") or _to_async_url(SQLALCHEMY_READ_DATABASE_URL)
+
+def _is_sqlite(url: str) -> bool:
+    return url.startswith("sqlite")
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    """Tunes every new SQLite connection: WAL lets readers run alongside the writer, busy_timeout waits instead of failing with "database is locked"."""
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA journal_mode={SQLITE_JOURNAL_MODE}")
+    cursor.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+    cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KIB}")
+    cursor.close()
+
+def analyze_sqlite(target: Engine) -> None:
+    """
+    Refreshes the sqlite_stat1 statistics of the planner. Without them SQLite guesses ~10 rows
+    per indexed equality, e.g. it walks every invoice of a property for a rare tag filter instead of
+    reading the tag's invoice_tag_link rows; analysis_limit keeps it fast on a large database.
+    """
+    with target.begin() as connection:
+        connection.exec_driver_sql(f"PRAGMA analysis_limit={SQLITE_ANALYSIS_LIMIT}")
+        connection.exec_driver_sql("ANALYZE")
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///./rental.db"
+def _engine_options(url: str) -> dict:
+    """Engine keyword arguments of the profile matching the database URL."""
+    if _is_sqlite(url):
+        return {"connect_args": {"check_same_thread": False, "timeout": SQLITE_BUSY_TIMEOUT_MS / 1000}}
+    return {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT_SECONDS,
+        "pool_recycle": DB_POOL_RECYCLE_SECONDS,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-)
+def _build_engine(url: str) -> Engine:
+    new_engine = create_engine(url, **_engine_options(url))
+    if _is_sqlite(url):
+        event.listen(new_engine, "connect", _apply_sqlite_pragmas)
+    return new_engine
+
+def _build_async_engine(url: str) -> AsyncEngine:
+    options = _engine_options(url)
+    if _is_sqlite(url):
+        options["connect_args"] = {"timeout": SQLITE_BUSY_TIMEOUT_MS / 1000}
+    new_engine = create_async_engine(url, **options)
+    if _is_sqlite(url):
+        event.listen(new_engine.sync_engine, "connect", _apply_sqlite_pragmas)
+    return new_engine
+
+engine = _build_engine(SQLALCHEMY_DATABASE_URL)
+read_engine = engine if SQLALCHEMY_READ_DATABASE_URL == SQLALCHEMY_DATABASE_URL else _build_engine(SQLALCHEMY_READ_DATABASE_URL)
+
+_async_engines: dict[str, AsyncEngine] = {}
+
+def get_async_engine(url: str = ASYNC_DATABASE_URL) -> AsyncEngine:
+    """Creates an async engine on first use, so the async driver is only needed when it is used."""
+    if url not in _async_engines:
+        _async_engines[url] = _build_async_engine(url)
+    return _async_engines[url]
+
+async def dispose_async_engine() -> None:
+    for async_engine in _async_engines.values():
+        await async_engine.dispose()
+    _async_engines.clear()
 
 def get_db():
     with Session(engine) as session:
-        yield session
\ No newline at end of file
+        yield session
+
+def get_read_db(primary: Session = Depends(get_db)):
+    """
+    Session for read-only endpoints; served by the replica when DATABASE_READ_URL is set,
+    except for a user who wrote within the last SQLITE_REPLICA_REFRESH_SECONDS (see ReadSession).
+    """
+    with ReadSession(primary) as session:
+        yield session
+
+# --- Odczyt własnych zapisów przy replice ---
+# user_id -> time.monotonic() ostatniego zatwierdzonego zapisu; w pamięci procesu, tak jak
+# lokalna replika SQLite odświeżana przez ten sam proces (run_sqlite_replica_refresher)
+_last_write: Dict[int, float] = {}
+_last_write_lock = threading.Lock()
+
+def set_session_user(session: Session, user_id: Optional[int]) -> None:
+    """Marks the request's primary session as acting for a user (called by auth.get_current_user)."""
+    session.info["user_id"] = user_id
+
+def wrote_recently(user_id: Optional[int]) -> bool:
+    """True while the replica may not yet contain the user's last committed write."""
+    written_at = _last_write.get(user_id) if user_id is not None else None
+    return written_at is not None and time.monotonic() - written_at < SQLITE_REPLICA_REFRESH_SECONDS
+
+def _flag_write(orm_execute_state) -> None:
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info["wrote"] = True
+
+def _flag_flush(session, flush_context) -> None:
+    session.info["wrote"] = True
+
+def _record_write(session) -> None:
+    if session.info.pop("wrote", False) and session.info.get("user_id") is not None:
+        now = time.monotonic()
+        with _last_write_lock:
+            _last_write[session.info["user_id"]] = now
+            if len(_last_write) > 10_000:
+                for user_id in [u for u, t in _last_write.items() if now - t >= SQLITE_REPLICA_REFRESH_SECONDS]:
+                    del _last_write[user_id]
+
+def _forget_write(session) -> None:
+    session.info.pop("wrote", None)
+
+class ReadSession(Session):
+    """
+    Replica session of a request. The bind is chosen at the first query, after auth.get_current_user
+    has named the user: their reads go to the primary while the replica may lag behind their writes,
+    so e.g. a property created a moment ago is not a 404. Other users' writes can still be up to
+    SQLITE_REPLICA_REFRESH_SECONDS away on the replica, and the write times are kept per process.
+    """
+
+    def __init__(self, primary: Session):
+        super().__init__(read_engine)
+        self._primary_info = primary.info
+
+    def get_bind(self, *args, **kwargs):
+        if wrote_recently(self._primary_info.get("user_id")):
+            return engine
+        return super().get_bind(*args, **kwargs)
+
+event.listen(Session, "do_orm_execute", _flag_write)
+event.listen(Session, "after_flush", _flag_flush)
+event.listen(Session, "after_commit", _record_write)
+event.listen(Session, "after_rollback", _forget_write)
+
+async def get_async_db():
+    """Async counterpart of get_db for `async def` endpoints; queries do not block the event loop."""
+    async with AsyncSession(get_async_engine(), expire_on_commit=False) as session:
+        yield session
+
+async def get_async_read_db():
+    """Async counterpart of get_read_db."""
+    async with AsyncSession(get_async_engine(ASYNC_READ_DATABASE_URL), expire_on_commit=False) as session:
+        yield session
+
+
+# --- Lokalna replika SQLite ---
+def uses_sqlite_replica() -> bool:
+    """True when reads go to a second SQLite file that has to be refreshed from the primary."""
+    return (
+        SQLALCHEMY_READ_DATABASE_URL != SQLALCHEMY_DATABASE_URL
+        and _is_sqlite(SQLALCHEMY_DATABASE_URL)
+        and _is_sqlite(SQLALCHEMY_READ_DATABASE_URL)
+    )
+
+def refresh_sqlite_replica() -> None:
+    """Copies the primary SQLite database into the replica file with the online backup API."""
+    source = sqlite3.connect(make_url(SQLALCHEMY_DATABASE_URL).database, timeout=SQLITE_BUSY_TIMEOUT_MS / 1000)
+    target = sqlite3.connect(make_url(SQLALCHEMY_READ_DATABASE_URL).database, timeout=SQLITE_BUSY_TIMEOUT_MS / 1000)
+    try:
+        source.backup(target)
+    finally:
+        target.close()
+        source.close()
+
+async def run_sqlite_replica_refresher() -> None:
+    """Keeps the local replica at most SQLITE_REPLICA_REFRESH_SECONDS behind the primary."""
+    while True:
+        await asyncio.sleep(SQLITE_REPLICA_REFRESH_SECONDS)
+        await asyncio.to_thread(refresh_sqlite_replica)
+
+
+def dialect_insert(db: Session):
+    """
+    Returns the dialect-specific insert() of the session's database,
+    which supports ON CONFLICT clauses (on_conflict_do_nothing / on_conflict_do_update).
+    """
+    dialect_name = db.get_bind().dialect.name
+    if dialect_name == "postgresql":
+        return postgresql.insert
+    if dialect_name == "sqlite":
+        return sqlite.insert
+    raise NotImplementedError(f"Upserts are not supported for the {dialect_name} dialect")
@@ -1,22 +1,205 @@
+# backend/app/i18n.py
+"""
+Message catalogs of the API, one JSON file per language in app/locales.
+
+Each locale is compiled once, on first use: nested keys are flattened to dotted keys,
+missing keys fall back to the default language, and every message is pre-parsed into its
+literal and placeholder parts (see Template). A lookup is a single dict access. Accept-Language headers are negotiated with their q-values and the result
+is memoized per header value.
+
+With I18N_HOT_RELOAD=1 (development) the locale files are checked for changes at most
+every I18N_RELOAD_INTERVAL_SECONDS and recompiled when they change.
+"""
+
 import json
+import os
+import threading
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from string import Formatter
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
 from fastapi import Request
 
-# Ładujemy tłumaczenia
-translations = {
-    "pl": json.load(open("app/locales/pl.json", encoding="utf-8")),
-    "en": json.load(open("app/locales/en.json", encoding="utf-8")),
-}
+LOCALES_DIR = os.getenv("LOCALES_DIR") or os.path.join(os.path.dirname(os.path.abspath(__file__)), "locales")
+DEFAULT_LANG = os.getenv("DEFAULT_LANG", "en")
+I18N_HOT_RELOAD = os.getenv("I18N_HOT_RELOAD", "0") == "1"
+I18N_RELOAD_INTERVAL_SECONDS = float(os.getenv("I18N_RELOAD_INTERVAL_SECONDS", "1"))
+
+
+@dataclass(frozen=True)
+class Template:
+    """
+    A message split once into (literal, field) parts, so rendering is a join of the literals
+    and the str() of the arguments. Only messages whose fields use a format spec, a conversion
+    or attribute/index access (e.g. "{amount:.2f}") keep going through str.format.
+    """
+    text: str
+    parts: Tuple[Tuple[str, Optional[str]], ...] = ()
+    needs_format: bool = False
+
+    def render(self, kwargs: Dict[str, object]) -> str:
+        if not self.parts:
+            return self.text
+        try:
+            if self.needs_format:
+                return self.text.format_map(kwargs)
+            return "".join(literal if field is None else literal + str(kwargs[field]) for literal, field in self.parts)
+        except (KeyError, IndexError, ValueError, AttributeError):
+            return self.text # Brakujący parametr - lepiej pokazać szablon niż zwrócić 500
+
+
+def _compile_template(text: str) -> Template:
+    try:
+        parsed = list(Formatter().parse(text))
+    except ValueError: # Niezbalansowane nawiasy - traktujemy jako zwykły tekst
+        return Template(text)
+    if all(field is None for _, field, _, _ in parsed):
+        return Template("".join(literal for literal, _, _, _ in parsed)) # "{{" -> "{"
+    needs_format = any(
+        field is not None and (spec or conversion or not field.isidentifier())
+        for _, field, spec, conversion in parsed
+    )
+    return Template(text, tuple((literal, field) for literal, field, _, _ in parsed), needs_format)
+
+
+def _flatten(messages: dict, prefix: str = "") -> Dict[str, str]:
+    flat = {}
+    for key, value in messages.items():
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f"{prefix}{key}."))
+        elif isinstance(value, str):
+            flat[f"{prefix}{key}"] = value
+    return flat
+
+
+def _locale_path(lang: str) -> str:
+    return os.path.join(LOCALES_DIR, f"{lang}.json")
+
+
+def _mtime(lang: str) -> float:
+    try:
+        return os.stat(_locale_path(lang)).st_mtime
+    except OSError:
+        return 0.0
+
+
+# --- Skompilowane katalogi (ładowane leniwie) ---
+_catalogs: Dict[str, Dict[str, Template]] = {}
+_mtimes: Dict[str, float] = {}
+_languages: Optional[FrozenSet[str]] = None
+_lock = threading.RLock() # RLock: kompilacja języka wywołuje kompilację języka domyślnego
+_next_reload_check = 0.0
+
+
+def _scan_languages() -> FrozenSet[str]:
+    return frozenset(name[:-len(".json")].lower() for name in os.listdir(LOCALES_DIR) if name.endswith(".json"))
+
+
+def available_languages() -> FrozenSet[str]:
+    """Languages with a locale file, e.g. {"en", "pl"}."""
+    global _languages
+    if _languages is None:
+        with _lock:
+            if _languages is None:
+                _languages = _scan_languages()
+    return _languages
+
+
+def _load(lang: str) -> Dict[str, Template]:
+    with open(_locale_path(lang), encoding="utf-8") as source:
+        return {key: _compile_template(text) for key, text in _flatten(json.load(source)).items()}
+
+
+def _catalog(lang: str) -> Dict[str, Template]:
+    catalog = _catalogs.get(lang)
+    if catalog is None:
+        with _lock:
+            catalog = _catalogs.get(lang)
+            if catalog is None:
+                _mtimes[lang] = _mtime(lang)
+                catalog = _load(lang)
+                if lang != DEFAULT_LANG:
+                    # Braki w tłumaczeniu uzupełniamy językiem domyślnym już przy kompilacji
+                    catalog = {**_catalog(DEFAULT_LANG), **catalog}
+                _catalogs[lang] = catalog
+    return catalog
+
+
+def _reload_if_changed() -> None:
+    global _next_reload_check
+    now = time.monotonic()
+    if now < _next_reload_check:
+        return
+    _next_reload_check = now + I18N_RELOAD_INTERVAL_SECONDS
+    with _lock:
+        changed = any(_mtime(lang) != mtime for lang, mtime in _mtimes.items())
+        if changed or (_languages is not None and _scan_languages() != _languages):
+            reload()
+
+
+def reload() -> None:
+    """Drops the compiled catalogs and the negotiation cache; they are rebuilt on next use."""
+    global _languages
+    _catalogs.clear()
+    _mtimes.clear()
+    _languages = None
+    negotiate_language.cache_clear()
+
+
+# --- Negocjacja języka ---
+def parse_accept_language(header: str) -> List[Tuple[str, float]]:
+    """Parses an Accept-Language header into (language tag, q) pairs, best first; q=0 entries are dropped."""
+    ranges = []
+    for position, item in enumerate(header.split(",")):
+        tag, _, params = item.strip().partition(";")
+        tag = tag.strip().lower()
+        if not tag:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if q > 0:
+            ranges.append((position, tag, q))
+    ranges.sort(key=lambda entry: (-entry[2], entry[0])) # Przy równym q decyduje kolejność w nagłówku
+    return [(tag, q) for _, tag, q in ranges]
+
+
+@lru_cache(maxsize=1024)
+def negotiate_language(header: str) -> str:
+    """The best available language for an Accept-Language header value, DEFAULT_LANG if none matches."""
+    languages = available_languages()
+    for tag, _ in parse_accept_language(header):
+        if tag == "*":
+            return DEFAULT_LANG
+        if tag in languages:
+            return tag
+        primary = tag.split("-", 1)[0] # "pl-PL" -> "pl"
+        if primary in languages:
+            return primary
+    return DEFAULT_LANG
+
 
 def get_lang(request: Request) -> str:
-    lang = request.headers.get("Accept-Language", "en")[:2]
-    return lang if lang in translations else "en"
+    if I18N_HOT_RELOAD:
+        _reload_if_changed()
+    return negotiate_language(request.headers.get("Accept-Language", ""))
+
 
-def t(key: str, lang: str = "en", **kwargs) -> str:
+def t(key: str, lang: str = DEFAULT_LANG, **kwargs) -> str:
     """ Pobiera tłumaczenie po kluczu z opcją podstawienia zmiennych """
-    parts = key.split(".")
-    ref = translations.get(lang, translations["en"])
-    for p in parts:
-        ref = ref.get(p, {})
-    if isinstance(ref, str):
-        return ref.format(**kwargs)
-    return key
+    if I18N_HOT_RELOAD:
+        _reload_if_changed()
+    catalog = _catalogs.get(lang)
+    if catalog is None:
+        catalog = _catalog(lang if lang in available_languages() else DEFAULT_LANG)
+    template = catalog.get(key)
+    if template is None:
+        return key
+    return template.render(kwargs)
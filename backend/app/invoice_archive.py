@@ -0,0 +1,98 @@
+# backend/app/invoice_archive.py
+"""
+ZIP archive of invoice files, built while it is being sent.
+
+Entries are STORED (PDFs barely compress) and written with data descriptors, so
+zipfile never has to seek back; every chunk zipfile produces is yielded to the
+response right away. Only one file chunk and the central directory entries are
+held in memory, nothing is written to disk.
+"""
+
+import os
+import re
+import zipfile
+from datetime import date
+from typing import Iterator, List
+
+from sqlmodel import Session, select
+
+from app import models, database, storage
+
+ARCHIVE_BATCH_SIZE = int(os.getenv("INVOICE_ARCHIVE_BATCH_SIZE", "500"))
+
+MISSING_FILES_ENTRY = "MISSING_FILES.txt"
+
+_UNSAFE_NAME_CHARACTERS = re.compile(r"[^\w.\- ]+")
+
+
+class _ChunkSink:
+    """Write-only, unseekable file object collecting what zipfile writes until it is drained."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def archive_statement():
+    """The select of the archived invoices; add the WHERE clauses of the caller's filters to it."""
+    return (
+        select(
+            models.Invoice.id, models.Invoice.property_id, models.Property.name, models.Invoice.issue_date,
+            models.Invoice.file_name, models.Invoice.file_path,
+        )
+        .join(models.Property, models.Property.id == models.Invoice.property_id)
+        .where(models.Invoice.file_path.is_not(None))
+        .order_by(models.Invoice.property_id, models.Invoice.issue_date, models.Invoice.id)
+    )
+
+
+def _safe_name(name: str) -> str:
+    return _UNSAFE_NAME_CHARACTERS.sub("_", name).strip(" .") or "file"
+
+
+def _entry_name(invoice_id: int, property_id: int, property_name: str, issue_date: date, file_name: str, file_path: str) -> str:
+    """property folder / date-id-original name, unique per invoice."""
+    folder = f"{property_id}-{_safe_name(property_name)}"
+    original = _safe_name(file_name or os.path.basename(file_path))
+    return f"{folder}/{issue_date.isoformat()}-{invoice_id}-{original}"
+
+
+def iter_archive(statement) -> Iterator[bytes]:
+    """Yields the ZIP archive of the invoice files selected by statement, chunk by chunk."""
+    sink = _ChunkSink()
+    missing = []
+    with Session(database.read_engine) as db, zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_STORED) as archive:
+        result = db.exec(statement.execution_options(yield_per=ARCHIVE_BATCH_SIZE))
+        for invoice_id, property_id, property_name, issue_date, file_name, file_path in result:
+            entry_name = _entry_name(invoice_id, property_id, property_name, issue_date, file_name, file_path)
+            try:
+                source = open(file_path, "rb")
+            except OSError:
+                missing.append(entry_name)
+                continue
+            with source:
+                entry = zipfile.ZipInfo(entry_name, date_time=(max(issue_date.year, 1980), issue_date.month, issue_date.day, 0, 0, 0))
+                entry.compress_type = zipfile.ZIP_STORED
+                entry.external_attr = 0o644 << 16
+                entry.file_size = os.fstat(source.fileno()).st_size # pozwala zipfile wybrać ZIP64 z góry
+                with archive.open(entry, mode="w") as target:
+                    while chunk := source.read(storage.UPLOAD_CHUNK_SIZE):
+                        target.write(chunk)
+                        yield sink.drain()
+            if data := sink.drain(): # data descriptor wpisu
+                yield data
+
+        if missing:
+            archive.writestr(MISSING_FILES_ENTRY, "\n".join(missing) + "\n")
+    yield sink.drain()
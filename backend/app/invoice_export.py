@@ -0,0 +1,104 @@
+# backend/app/invoice_export.py
+"""
+Streaming invoice export as CSV or JSON lines.
+
+Rows are read in EXPORT_BATCH_SIZE partitions from a streaming cursor (yield_per:
+a server-side cursor on PostgreSQL, a stepped cursor on SQLite), the tags of each
+partition are loaded with one query, and every partition is encoded and handed to
+the response before the next one is fetched. Memory use depends on the batch size,
+not on the number of exported rows.
+"""
+
+import csv
+import io
+import json
+import os
+from collections import defaultdict
+from typing import Dict, Iterator, List, Literal
+
+from sqlmodel import Session, select
+
+from app import models, database
+
+EXPORT_BATCH_SIZE = int(os.getenv("INVOICE_EXPORT_BATCH_SIZE", "2000"))
+
+ExportFormat = Literal["csv", "jsonl"]
+
+MEDIA_TYPES = {"csv": "text/csv; charset=utf-8", "jsonl": "application/x-ndjson"}
+
+EXPORT_COLUMNS = (
+    "id", "property_id", "property_name", "issue_date", "amount",
+    "description", "tags", "file_name", "checksum",
+)
+
+
+def export_statement():
+    """
+    The export select, oldest invoice first; add the WHERE clauses of the caller's filters to it.
+    Only plain columns are selected, so no ORM objects are kept in the session.
+    """
+    return (
+        select(
+            models.Invoice.id, models.Invoice.property_id, models.Property.name, models.Invoice.issue_date,
+            models.Invoice.amount, models.Invoice.description, models.Invoice.file_name, models.Invoice.checksum,
+        )
+        .join(models.Property, models.Property.id == models.Invoice.property_id)
+        .order_by(models.Invoice.issue_date, models.Invoice.id)
+    )
+
+
+def _tags_by_invoice(db: Session, invoice_ids: List[int]) -> Dict[int, List[str]]:
+    rows = db.exec(
+        select(models.InvoiceTagLink.invoice_id, models.Tag.name)
+        .join(models.Tag, models.Tag.id == models.InvoiceTagLink.tag_id)
+        .where(models.InvoiceTagLink.invoice_id.in_(invoice_ids))
+        .order_by(models.Tag.name)
+    ).all()
+    tags = defaultdict(list)
+    for invoice_id, name in rows:
+        tags[invoice_id].append(name)
+    return tags
+
+
+def _iter_records(statement) -> Iterator[List[Dict]]:
+    """Yields the export records in batches; uses its own session because it outlives the request's one."""
+    with Session(database.read_engine) as db:
+        result = db.exec(statement.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        for partition in result.partitions():
+            tags = _tags_by_invoice(db, [row[0] for row in partition])
+            yield [
+                {
+                    "id": invoice_id,
+                    "property_id": property_id,
+                    "property_name": property_name,
+                    "issue_date": issue_date.isoformat(),
+                    "amount": amount,
+                    "description": description,
+                    "tags": tags.get(invoice_id, []),
+                    "file_name": file_name,
+                    "checksum": checksum,
+                }
+                for invoice_id, property_id, property_name, issue_date, amount, description, file_name, checksum in partition
+            ]
+
+
+def iter_csv(statement) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS)
+    writer.writeheader()
+    for records in _iter_records(statement):
+        for record in records:
+            writer.writerow({**record, "tags": ",".join(record["tags"])})
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+def iter_jsonl(statement) -> Iterator[str]:
+    for records in _iter_records(statement):
+        yield "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records)
+
+
+def iter_export(statement, export_format: ExportFormat) -> Iterator[str]:
+    return iter_csv(statement) if export_format == "csv" else iter_jsonl(statement)
@@ -0,0 +1,215 @@
+# backend/app/invoice_import.py
+"""
+Bulk invoice import: a CSV or JSON manifest plus a ZIP archive with the invoice files.
+
+Permissions are checked once per property and tags are resolved in a single pass.
+Invoices, tag links and file references are then written in batched transactions,
+and every manifest row gets its own entry in the returned report.
+"""
+
+import csv
+import io
+import json
+import os
+import zipfile
+from collections import Counter
+from datetime import date
+from typing import Any, Dict, List, Literal, Optional, Tuple
+
+from fastapi import HTTPException, status
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import insert
+from sqlmodel import Session, select
+
+from app import models, storage, tag_service, invoice_jobs
+
+IMPORT_BATCH_SIZE = int(os.getenv("INVOICE_IMPORT_BATCH_SIZE", "1000"))
+MAX_IMPORT_ARCHIVE_BYTES = int(os.getenv("INVOICE_MAX_IMPORT_BYTES", str(2 * 1024 * 1024 * 1024)))
+
+
+class ImportRow(BaseModel):
+    property_id: int
+    issue_date: date
+    description: str
+    amount: float
+    tags: str = "" # Tags as a comma-separated string
+    file: str # Path of the file inside the archive
+
+
+class ImportRowResult(BaseModel):
+    row: int # 1-based position in the manifest
+    status: Literal["created", "error"]
+    invoice_id: Optional[int] = None
+    error: Optional[str] = None
+
+
+class ImportReport(BaseModel):
+    created: int
+    failed: int
+    rows: List[ImportRowResult]
+
+
+def parse_manifest(content: bytes, filename: str) -> List[Dict[str, Any]]:
+    """Parses a JSON array or a CSV file with a header row into a list of raw rows."""
+    try:
+        text = content.decode("utf-8-sig")
+        if filename.lower().endswith(".json") or text.lstrip().startswith("["):
+            rows = json.loads(text)
+            if not isinstance(rows, list):
+                raise ValueError("JSON manifest must be an array of objects")
+            return rows
+        return list(csv.DictReader(io.StringIO(text)))
+    except (UnicodeDecodeError, ValueError, csv.Error) as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid manifest: {exc}")
+
+
+def _error(row: int, message: str) -> ImportRowResult:
+    return ImportRowResult(row=row, status="error", error=message)
+
+
+def _validate_rows(raw_rows: List[Dict[str, Any]], results: Dict[int, ImportRowResult]) -> List[Tuple[int, ImportRow]]:
+    valid = []
+    for index, raw in enumerate(raw_rows, start=1):
+        try:
+            valid.append((index, ImportRow.model_validate(raw)))
+        except ValidationError as exc:
+            first = exc.errors()[0]
+            results[index] = _error(index, f"{'.'.join(map(str, first['loc']))}: {first['msg']}")
+    return valid
+
+
+def _check_permissions(
+    db: Session, rows: List[Tuple[int, ImportRow]], current_user: models.User, results: Dict[int, ImportRowResult]
+) -> List[Tuple[int, ImportRow]]:
+    """Checks access once per distinct property with a single query."""
+    property_ids = {row.property_id for _, row in rows}
+    owners = dict(db.exec(
+        select(models.Property.id, models.Property.owner_id).where(models.Property.id.in_(property_ids))
+    ).all())
+
+    allowed = []
+    for index, row in rows:
+        if row.property_id not in owners:
+            results[index] = _error(index, "Property not found")
+        elif current_user.role != models.Roles.ADMIN and owners[row.property_id] != current_user.id:
+            results[index] = _error(index, "Not enough permissions")
+        else:
+            allowed.append((index, row))
+    return allowed
+
+
+def _import_batch(
+    db: Session,
+    batch: List[Tuple[int, ImportRow]],
+    archive: zipfile.ZipFile,
+    members: set,
+    tag_ids: Dict[str, int],
+    current_user: models.User,
+    upload_directory: str,
+    results: Dict[int, ImportRowResult],
+) -> None:
+    staged_blobs: Dict[str, storage.StagedUpload] = {}
+    pending = []
+    for index, row in batch:
+        if row.file not in members:
+            results[index] = _error(index, f"File {row.file} not found in archive")
+            continue
+        try:
+            with archive.open(row.file) as fileobj:
+                staged = storage.stage_fileobj(fileobj, upload_directory)
+        except HTTPException as exc:
+            results[index] = _error(index, exc.detail)
+            continue
+        except (zipfile.BadZipFile, RuntimeError, OSError) as exc:
+            results[index] = _error(index, f"Could not read {row.file}: {exc}")
+            continue
+
+        # Ten sam plik w jednej paczce zapisujemy tylko raz
+        if staged.sha256 in staged_blobs:
+            storage.remove_files([staged.temp_path])
+            staged = staged_blobs[staged.sha256]
+        else:
+            staged_blobs[staged.sha256] = staged
+        pending.append((index, row, staged))
+
+    if not pending:
+        return
+
+    invoice_values = [
+        {
+            "amount": row.amount,
+            "issue_date": row.issue_date,
+            "description": row.description,
+            "file_path": storage.blob_path(upload_directory, staged.sha256),
+            "property_id": row.property_id,
+            "uploader_id": current_user.id,
+            "checksum": staged.sha256,
+            "file_size": staged.size,
+            "file_name": os.path.basename(row.file),
+        }
+        for _, row, staged in pending
+    ]
+    try:
+        invoice_ids = db.exec(
+            insert(models.Invoice).returning(models.Invoice.id, sort_by_parameter_order=True),
+            params=invoice_values,
+        ).scalars().all()
+
+        link_values = [
+            {"invoice_id": invoice_id, "tag_id": tag_ids[name]}
+            for invoice_id, (_, row, _) in zip(invoice_ids, pending)
+            for name in tag_service.parse_tag_names(row.tags)
+        ]
+        if link_values:
+            db.exec(insert(models.InvoiceTagLink), params=link_values)
+        invoice_jobs.enqueue_for_invoices(db, invoice_ids)
+
+        for checksum, count in Counter(staged.sha256 for _, _, staged in pending).items():
+            staged = staged_blobs[checksum]
+            storage.acquire_blob(db, checksum, staged.size, storage.blob_path(upload_directory, checksum), count=count)
+        db.commit()
+    except Exception as exc:
+        db.rollback()
+        storage.remove_files(staged.temp_path for staged in staged_blobs.values())
+        for index, _, _ in pending:
+            results[index] = _error(index, f"Batch failed: {exc.__class__.__name__}")
+        return
+
+    for checksum, staged in staged_blobs.items():
+        storage.publish_blob(staged.temp_path, storage.blob_path(upload_directory, checksum))
+    for invoice_id, (index, _, _) in zip(invoice_ids, pending):
+        results[index] = ImportRowResult(row=index, status="created", invoice_id=invoice_id)
+
+
+def run_import(
+    db: Session,
+    raw_rows: List[Dict[str, Any]],
+    archive_path: str,
+    current_user: models.User,
+    upload_directory: str,
+) -> ImportReport:
+    """Imports the manifest rows, reading their files from the ZIP archive at archive_path."""
+    results: Dict[int, ImportRowResult] = {}
+    rows = _validate_rows(raw_rows, results)
+    rows = _check_permissions(db, rows, current_user, results)
+
+    all_tag_names = set()
+    for _, row in rows:
+        all_tag_names |= tag_service.parse_tag_names(row.tags)
+    tag_ids = tag_service.resolve_tag_ids(db, all_tag_names)
+    db.commit()
+
+    try:
+        archive = zipfile.ZipFile(archive_path)
+    except zipfile.BadZipFile:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Archive is not a valid ZIP file")
+
+    with archive:
+        members = set(archive.namelist())
+        for start in range(0, len(rows), IMPORT_BATCH_SIZE):
+            batch = rows[start:start + IMPORT_BATCH_SIZE]
+            _import_batch(db, batch, archive, members, tag_ids, current_user, upload_directory, results)
+
+    report_rows = [results[index] for index in sorted(results)]
+    created = sum(1 for result in report_rows if result.status == "created")
+    return ImportReport(created=created, failed=len(report_rows) - created, rows=report_rows)
@@ -0,0 +1,138 @@
+# backend/app/invoice_jobs.py
+"""
+Follow-up work on uploaded invoice files, run by the background job dispatcher.
+
+- invoice.verify_checksum re-reads the stored file and compares it with the checksum
+  recorded at upload time (catches truncated or corrupted blobs).
+- invoice.inspect_pdf counts the pages of the PDF and stores them on the invoice
+  (NULL when the count cannot be read from the file).
+"""
+
+import hashlib
+import os
+import re
+import zlib
+from typing import Any, Dict, Iterable, Optional
+
+from sqlalchemy import update
+from sqlmodel import Session
+
+from app import models, database, jobs, storage
+
+VERIFY_CHECKSUM = "invoice.verify_checksum"
+INSPECT_PDF = "invoice.inspect_pdf"
+
+UPLOAD_JOB_KINDS = (VERIFY_CHECKSUM, INSPECT_PDF)
+
+# Obiekty stron w PDF: "/Type /Page", ale nie "/Type /Pages" (węzły drzewa stron)
+_PDF_PAGE = re.compile(rb"/Type\s*/Page(?![a-zA-Z])")
+_PDF_OBJECT = re.compile(rb"(\d+)\s+\d+\s+obj\b(.*?)endobj", re.S)
+_PDF_STREAM = re.compile(rb">>\s*stream\r?\n(.*)endstream", re.S)
+_PDF_OBJECT_STREAM = re.compile(rb"/Type\s*/ObjStm\b")
+_PDF_ROOT = re.compile(rb"/Root\s+(\d+)\s+\d+\s+R")
+_PDF_PAGES = re.compile(rb"/Pages\s+(\d+)\s+\d+\s+R")
+_PDF_COUNT = re.compile(rb"/Count\s+(\d+)")
+_PDF_INT = re.compile(rb"/(N|First)\s+(\d+)")
+
+
+def _object_stream_objects(body: bytes) -> Dict[int, bytes]:
+    """The objects packed in a Flate-compressed object stream (PDF 1.5+), by object number."""
+    stream = _PDF_STREAM.search(body)
+    numbers = dict(_PDF_INT.findall(body[:stream.start()])) if stream else {}
+    if not stream or b"/FlateDecode" not in body[:stream.start()] or b"N" not in numbers or b"First" not in numbers:
+        return {}
+    try:
+        content = zlib.decompressobj().decompress(stream.group(1))
+    except zlib.error:
+        return {}
+
+    first = int(numbers[b"First"])
+    header = content[:first].split()[:2 * int(numbers[b"N"])] # pary: numer obiektu, przesunięcie
+    try:
+        entries = [(int(header[i]), first + int(header[i + 1])) for i in range(0, len(header) - 1, 2)]
+    except ValueError:
+        return {}
+    ends = [offset for _, offset in entries[1:]] + [len(content)]
+    return {number: content[offset:end] for (number, offset), end in zip(entries, ends)}
+
+
+def _pdf_objects(data: bytes) -> Dict[int, bytes]:
+    """Object number -> object body, including objects stored in object streams; later revisions win."""
+    objects = {}
+    for match in _PDF_OBJECT.finditer(data):
+        body = match.group(2)
+        objects[int(match.group(1))] = body
+        if _PDF_OBJECT_STREAM.search(body):
+            objects.update(_object_stream_objects(body))
+    return objects
+
+
+def count_pdf_pages(data: bytes) -> Optional[int]:
+    """
+    The page count of a PDF: /Count of the root /Pages node of the document catalog.
+    Falls back to counting page objects; None when neither gives a result.
+    """
+    objects = _pdf_objects(data)
+    roots = _PDF_ROOT.findall(data) # trailer albo słownik strumienia xref - oba są nieskompresowane
+    if roots:
+        pages = _PDF_PAGES.search(objects.get(int(roots[-1]), b""))
+        count = _PDF_COUNT.search(objects.get(int(pages.group(1)), b"")) if pages else None
+        if count:
+            return int(count.group(1))
+
+    page_count = sum(len(_PDF_PAGE.findall(body)) for body in objects.values()) if objects else len(_PDF_PAGE.findall(data))
+    return page_count or None
+
+
+def enqueue_for_invoices(db: Session, invoice_ids: Iterable[int]) -> None:
+    """Queues the post-upload jobs of the given invoices. Does not commit."""
+    jobs.enqueue_many(db, (
+        {"kind": kind, "payload": {"invoice_id": invoice_id}, "invoice_id": invoice_id}
+        for invoice_id in invoice_ids
+        for kind in UPLOAD_JOB_KINDS
+    ))
+
+
+def _load_invoice(db: Session, payload: Dict[str, Any]):
+    invoice = db.get(models.Invoice, payload["invoice_id"])
+    if invoice is not None and invoice.file_path and not os.path.exists(invoice.file_path):
+        # Plik jest przenoszony do magazynu dopiero po zatwierdzeniu transakcji - ponowimy próbę
+        raise FileNotFoundError(f"File of invoice {invoice.id} is not stored yet")
+    return invoice
+
+
+@jobs.handler(VERIFY_CHECKSUM)
+def verify_checksum(payload: Dict[str, Any]) -> Dict[str, Any]:
+    with Session(database.engine) as db:
+        invoice = _load_invoice(db, payload)
+        if invoice is None or not invoice.file_path:
+            return {"skipped": "invoice or file no longer exists"}
+        file_path, expected = invoice.file_path, invoice.checksum
+
+    digest = hashlib.sha256()
+    size = 0
+    with open(file_path, "rb") as source:
+        while chunk := source.read(storage.UPLOAD_CHUNK_SIZE):
+            digest.update(chunk)
+            size += len(chunk)
+    if expected and digest.hexdigest() != expected:
+        raise ValueError(f"Checksum mismatch: stored {expected}, file has {digest.hexdigest()}")
+    return {"sha256": digest.hexdigest(), "size": size}
+
+
+@jobs.handler(INSPECT_PDF)
+def inspect_pdf(payload: Dict[str, Any]) -> Dict[str, Any]:
+    with Session(database.engine) as db:
+        invoice = _load_invoice(db, payload)
+        if invoice is None or not invoice.file_path:
+            return {"skipped": "invoice or file no longer exists"}
+        file_path = invoice.file_path
+
+    # Pliki faktur mają najwyżej MAX_UPLOAD_BYTES, więc czytamy je w całości
+    with open(file_path, "rb") as source:
+        page_count = count_pdf_pages(source.read())
+
+    with Session(database.engine) as db:
+        db.exec(update(models.Invoice).where(models.Invoice.id == payload["invoice_id"]).values(page_count=page_count))
+        db.commit()
+    return {"page_count": page_count}
@@ -0,0 +1,337 @@
+# backend/app/jobs.py
+"""
+Persistent background jobs, run locally without an external broker.
+
+Jobs are rows in the jobs table. enqueue() adds them inside the caller's transaction,
+so a job exists exactly when the change it follows up on was committed. The dispatcher
+(run_dispatcher, started by the application lifespan or by `python -m app.jobs`) claims
+due jobs with an atomic UPDATE ... RETURNING and runs them on a process pool, so several
+dispatchers can share one database. Failed jobs are retried with exponential backoff
+until max_attempts. A dispatcher renews the lease of the jobs it is running; jobs left
+running by a crashed dispatcher are requeued once their lease expires, so handlers must
+be idempotent.
+
+Handlers are plain functions registered with @handler("kind"). They run in worker
+processes, receive the job payload and return a JSON-serializable result.
+"""
+
+import argparse
+import asyncio
+import importlib
+import logging
+import multiprocessing
+import os
+import random
+import socket
+import threading
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from sqlalchemy import func, insert, update
+from sqlmodel import Session, select
+
+from app import models, database
+
+logger = logging.getLogger(__name__)
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", str(os.cpu_count() or 2)))
+# Dyspozytor w procesie aplikacji; ustaw 0, gdy zadania obsługuje osobny `python -m app.jobs`
+JOBS_RUN_IN_APP = os.getenv("JOBS_RUN_IN_APP", "1") == "1"
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "2"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "5"))
+JOB_RETRY_BASE_SECONDS = float(os.getenv("JOB_RETRY_BASE_SECONDS", "2"))
+JOB_RETRY_MAX_SECONDS = float(os.getenv("JOB_RETRY_MAX_SECONDS", "600"))
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "600"))
+
+# Moduły rejestrujące handlery; importowane w procesach roboczych przed wykonaniem zadania
+JOB_HANDLER_MODULES = ("app.invoice_jobs",)
+
+_handlers: Dict[str, Callable[[Dict[str, Any]], Any]] = {}
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_lock = threading.Lock()
+_wakeup: Optional[asyncio.Event] = None
+_wakeup_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def handler(kind: str):
+    """Registers the decorated function as the handler of a job kind."""
+    def register(fn):
+        _handlers[kind] = fn
+        return fn
+    return register
+
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _job_values(kind: str, payload: Dict[str, Any], invoice_id: Optional[int], delay_seconds: float, max_attempts: Optional[int]) -> Dict[str, Any]:
+    now = utcnow()
+    return {
+        "kind": kind,
+        "payload": payload,
+        "status": models.JobStatus.QUEUED,
+        "attempts": 0,
+        "max_attempts": max_attempts or JOB_MAX_ATTEMPTS,
+        "run_after": now + timedelta(seconds=delay_seconds),
+        "invoice_id": invoice_id,
+        "created_at": now,
+        "updated_at": now,
+    }
+
+
+def enqueue(
+    db: Session,
+    kind: str,
+    payload: Dict[str, Any],
+    invoice_id: Optional[int] = None,
+    delay_seconds: float = 0,
+    max_attempts: Optional[int] = None,
+) -> None:
+    """Adds a job to the queue. Does not commit: the job becomes visible with the caller's transaction."""
+    db.exec(insert(models.Job).values(**_job_values(kind, payload, invoice_id, delay_seconds, max_attempts)))
+
+
+def enqueue_many(db: Session, jobs: Iterable[Dict[str, Any]]) -> None:
+    """Bulk variant of enqueue; each item holds the keyword arguments of enqueue (without db). Does not commit."""
+    values = [
+        _job_values(job["kind"], job["payload"], job.get("invoice_id"), job.get("delay_seconds", 0), job.get("max_attempts"))
+        for job in jobs
+    ]
+    if values:
+        db.exec(insert(models.Job), params=values)
+
+
+def notify() -> None:
+    """
+    Wakes the dispatcher of this process so jobs committed just now do not wait for the next poll.
+    Safe to call from any thread.
+    """
+    wakeup, loop = _wakeup, _wakeup_loop
+    if wakeup is not None and loop is not None:
+        loop.call_soon_threadsafe(wakeup.set)
+
+
+# --- Przejmowanie i kończenie zadań (wołane z wątku dyspozytora) ---
+@dataclass(frozen=True)
+class ClaimedJob:
+    id: int
+    kind: str
+    payload: Dict[str, Any]
+    attempts: int
+    max_attempts: int
+    lock_token: str # locked_by tego przejęcia; ponowne przejęcie tego samego zadania dostaje nowy
+
+
+def due_jobs_statement(now: datetime, limit: int):
+    """Ids of the oldest queued jobs due at now."""
+    return (
+        select(models.Job.id)
+        .where(models.Job.status == models.JobStatus.QUEUED, models.Job.run_after <= now)
+        .order_by(models.Job.run_after, models.Job.id)
+        .limit(limit)
+    )
+
+
+def claim(worker_id: str, limit: int) -> List[ClaimedJob]:
+    """
+    Atomically marks up to limit due jobs as running for this worker and returns them.
+    The status guard in the UPDATE makes concurrent dispatchers skip rows another one already took.
+    The jobs are locked with a token unique to this claim, so a job requeued after its lease
+    expired and claimed again, even by the same process, cannot be finished by the earlier run.
+    """
+    now = utcnow()
+    lock_token = f"{worker_id}:{uuid.uuid4().hex}"
+    statement = (
+        update(models.Job)
+        .where(models.Job.id.in_(due_jobs_statement(now, limit)), models.Job.status == models.JobStatus.QUEUED)
+        .values(
+            status=models.JobStatus.RUNNING,
+            attempts=models.Job.attempts + 1,
+            locked_by=lock_token,
+            locked_at=now,
+            updated_at=now,
+        )
+        .returning(models.Job.id, models.Job.kind, models.Job.payload, models.Job.attempts, models.Job.max_attempts)
+        .execution_options(synchronize_session=False)
+    )
+    with Session(database.engine) as db:
+        rows = db.exec(statement).all()
+        db.commit()
+    return [ClaimedJob(*row, lock_token=lock_token) for row in rows]
+
+
+def renew_leases(claimed: Iterable[ClaimedJob]) -> None:
+    """Moves locked_at of jobs still being run forward, so requeue_expired leaves them alone."""
+    claimed = list(claimed)
+    if not claimed:
+        return
+    with Session(database.engine) as db:
+        db.exec(
+            update(models.Job)
+            .where(
+                models.Job.id.in_([job.id for job in claimed]),
+                models.Job.status == models.JobStatus.RUNNING,
+                models.Job.locked_by.in_({job.lock_token for job in claimed}),
+            )
+            .values(locked_at=utcnow())
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+
+
+def _finish(job: ClaimedJob, **values) -> None:
+    with Session(database.engine) as db:
+        # Warunek locked_by: zadanie przejęte ponownie po wygaśnięciu dzierżawy należy już do kogoś innego
+        db.exec(
+            update(models.Job)
+            .where(models.Job.id == job.id, models.Job.locked_by == job.lock_token)
+            .values(locked_by=None, locked_at=None, updated_at=utcnow(), **values)
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+
+
+def retry_delay(attempts: int) -> float:
+    """Exponential backoff with jitter: base * 2^(attempts - 1), capped at JOB_RETRY_MAX_SECONDS."""
+    delay = min(JOB_RETRY_BASE_SECONDS * 2 ** (attempts - 1), JOB_RETRY_MAX_SECONDS)
+    return delay * random.uniform(0.8, 1.2)
+
+
+def mark_succeeded(job: ClaimedJob, result: Any) -> None:
+    _finish(job, status=models.JobStatus.SUCCEEDED, result=result, last_error=None)
+
+
+def mark_failed(job: ClaimedJob, error: str) -> None:
+    """Schedules a retry, or fails the job for good once it has used max_attempts."""
+    if job.attempts >= job.max_attempts:
+        _finish(job, status=models.JobStatus.FAILED, last_error=error)
+    else:
+        run_after = utcnow() + timedelta(seconds=retry_delay(job.attempts))
+        _finish(job, status=models.JobStatus.QUEUED, run_after=run_after, last_error=error)
+
+
+def requeue_expired(lease_seconds: float = JOB_LEASE_SECONDS) -> int:
+    """Puts jobs whose dispatcher stopped reporting back into the queue; returns their number."""
+    cutoff = utcnow() - timedelta(seconds=lease_seconds)
+    with Session(database.engine) as db:
+        result = db.exec(
+            update(models.Job)
+            .where(models.Job.status == models.JobStatus.RUNNING, models.Job.locked_at < cutoff)
+            .values(status=models.JobStatus.QUEUED, locked_by=None, locked_at=None, updated_at=utcnow())
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        return result.rowcount
+
+
+def invoice_jobs_statement(invoice_id: int):
+    """The jobs of an invoice in the order they were queued."""
+    return select(models.Job).where(models.Job.invoice_id == invoice_id).order_by(models.Job.id)
+
+
+def stats(db: Session) -> Dict[str, int]:
+    counts = dict(db.exec(select(models.Job.status, func.count(models.Job.id)).group_by(models.Job.status)).all())
+    return {job_status: counts.get(job_status, 0) for job_status in (
+        models.JobStatus.QUEUED, models.JobStatus.RUNNING, models.JobStatus.SUCCEEDED, models.JobStatus.FAILED
+    )}
+
+
+# --- Procesy robocze ---
+def _run_handler(kind: str, payload: Dict[str, Any]) -> Any:
+    """Runs in a worker process."""
+    for module in JOB_HANDLER_MODULES:
+        importlib.import_module(module)
+    if kind not in _handlers:
+        raise LookupError(f"No handler registered for job kind {kind!r}")
+    return _handlers[kind](payload)
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=JOB_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _executor
+
+
+def shutdown() -> None:
+    """Stops the worker processes; called on application shutdown."""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(cancel_futures=True)
+            _executor = None
+
+
+async def _execute(job: ClaimedJob) -> None:
+    global _executor
+    try:
+        result = await asyncio.wrap_future(_get_executor().submit(_run_handler, job.kind, job.payload))
+    except BrokenProcessPool as exc:
+        with _executor_lock:
+            _executor = None # Proces roboczy zginął (np. OOM) - następne zadanie uruchomi nową pulę
+        await asyncio.to_thread(mark_failed, job, f"Worker process died: {exc}")
+    except Exception as exc:
+        logger.warning("Job %s (%s) attempt %s failed: %r", job.id, job.kind, job.attempts, exc)
+        await asyncio.to_thread(mark_failed, job, f"{exc.__class__.__name__}: {exc}")
+    else:
+        await asyncio.to_thread(mark_succeeded, job, result)
+
+
+async def run_dispatcher() -> None:
+    """Claims due jobs and runs up to JOB_WORKERS of them at once; runs until cancelled."""
+    global _wakeup, _wakeup_loop
+    loop = asyncio.get_running_loop()
+    _wakeup, _wakeup_loop = asyncio.Event(), loop
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    running: Dict[asyncio.Task, ClaimedJob] = {}
+    next_lease_check = 0.0
+    try:
+        while True:
+            if loop.time() >= next_lease_check:
+                # Najpierw odnawiamy własne dzierżawy - długie zadania nie mogą wygasnąć w trakcie wykonywania
+                await asyncio.to_thread(renew_leases, list(running.values()))
+                await asyncio.to_thread(requeue_expired)
+                next_lease_check = loop.time() + JOB_LEASE_SECONDS / 3
+
+            free = JOB_WORKERS - len(running)
+            claimed = await asyncio.to_thread(claim, worker_id, free) if free > 0 else []
+            for job in claimed:
+                task = asyncio.create_task(_execute(job))
+                running[task] = job
+                task.add_done_callback(lambda done: running.pop(done, None))
+            if claimed and len(running) < JOB_WORKERS:
+                continue # Może czekać więcej zadań
+
+            _wakeup.clear()
+            waiters = [asyncio.ensure_future(_wakeup.wait()), *running]
+            await asyncio.wait(waiters, timeout=JOB_POLL_SECONDS, return_when=asyncio.FIRST_COMPLETED)
+            waiters[0].cancel()
+    finally:
+        for task in running:
+            task.cancel()
+        _wakeup = _wakeup_loop = None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.jobs", description="Runs the background job dispatcher.")
+    parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    try:
+        asyncio.run(run_dispatcher())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        shutdown()
+
+
+if __name__ == "__main__":
+    # Przez import pakietu, aby handlery rejestrowały się w tym samym module, z którego korzystają procesy robocze
+    from app import jobs
+    jobs.main()
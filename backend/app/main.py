@@ -1,11 +1,12 @@
 # app/main.py
 
+import asyncio
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
-from sqlmodel import SQLModel
-from app import database
+from app import admission, body_limits, compression, database, jobs, migrations, pagination, passwords
 from app.routers import (
     properties as properties_router, 
     auth as auth_router, 
@@ -13,20 +14,42 @@ from app.routers import (
     assignments as assignments_router,
     invoices as invoices_router,
     tags as tags_router,
-    dashboard as dashboard_router
+    dashboard as dashboard_router,
+    reports as reports_router,
+    jobs as jobs_router
 )
 
 def create_db_and_tables():
-    SQLModel.metadata.create_all(database.engine)
+    # Schemat jest wersjonowany - create_all nie zmienia istniejących tabel ani nie dodaje indeksów
+    applied = migrations.upgrade(database.engine)
+    if applied:
+        print(f"Applied migrations: {applied}")
+    if database.engine.dialect.name == "sqlite":
+        database.analyze_sqlite(database.engine)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    print("Creating database and tables...")
+    print("Upgrading database schema...")
     create_db_and_tables()
+    replica_refresher = None
+    if database.uses_sqlite_replica():
+        database.refresh_sqlite_replica()
+        replica_refresher = asyncio.create_task(database.run_sqlite_replica_refresher())
+    job_dispatcher = None
+    if jobs.JOBS_RUN_IN_APP and jobs.JOB_WORKERS > 0:
+        job_dispatcher = asyncio.create_task(jobs.run_dispatcher())
     yield
+    if replica_refresher is not None:
+        replica_refresher.cancel()
+    if job_dispatcher is not None:
+        job_dispatcher.cancel()
+    jobs.shutdown()
+    passwords.shutdown()
+    await database.dispose_async_engine()
     print("Application shutdown.")
 
-app = FastAPI(lifespan=lifespan)
+# orjson zamiast standardowego json.dumps dla wszystkich odpowiedzi JSON
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
 
 # <-- 2. MONOWANIE KATALOGU STATYCZNEGO
 # Wszystkie pliki z folderu "uploads" będą dostępne pod adresem URL "/uploads"
@@ -41,6 +64,17 @@ app.include_router(assignments_router.router)
 app.include_router(invoices_router.router)
 app.include_router(tags_router.router)
 app.include_router(dashboard_router.router)
+app.include_router(reports_router.router)
+app.include_router(jobs_router.router)
+
+# Limity współbieżności i tempa dla kosztownych tras (admission.ROUTE_LIMITS); nadmiar dostaje 503/429
+app.add_middleware(admission.AdmissionControlMiddleware)
+
+# Limity rozmiaru ciała tras wysyłania plików - 413 zanim formularz zostanie wczytany (body_limits.BODY_LIMITS)
+app.add_middleware(body_limits.BodySizeLimitMiddleware)
+
+# Kompresja br/gzip odpowiedzi powyżej COMPRESSION_MIN_BYTES (negocjowana przez Accept-Encoding)
+app.add_middleware(compression.CompressionMiddleware)
 
 app.add_middleware(
     CORSMiddleware,
@@ -48,4 +82,5 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[pagination.NEXT_CURSOR_HEADER],
 )
\ No newline at end of file
@@ -0,0 +1,100 @@
+# backend/app/migrations/__init__.py
+"""
+Versioned schema migrations.
+
+Every module named mNNNN_<description>.py in this package is one migration with
+a VERSION number, a DESCRIPTION and an upgrade(connection) function. Applied
+versions are recorded in the schema_version table; upgrade() runs the pending
+ones in order, each in its own transaction, so a failed migration leaves the
+database at the previous version.
+
+Migrations must be idempotent: databases created by the old create_all
+bootstrap already contain part of the schema when they are first upgraded.
+
+    python -m app.migrations upgrade       # apply pending migrations
+    python -m app.migrations status        # show applied and pending versions
+    python -m app.migrations check-plans   # EXPLAIN the hot queries (SQLite)
+"""
+
+import importlib
+import pkgutil
+import re
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from types import ModuleType
+from typing import List, Set
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, insert, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+
+_MIGRATION_MODULE = re.compile(r"^m\d{4}_\w+$")
+
+metadata = MetaData()
+
+schema_version = Table(
+    "schema_version", metadata,
+    Column("version", Integer, primary_key=True, autoincrement=False),
+    Column("description", String, nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    description: str
+    module: ModuleType
+
+
+def discover() -> List[Migration]:
+    """Returns the migrations of this package sorted by version."""
+    migrations = []
+    for module_info in pkgutil.iter_modules(__path__):
+        if not _MIGRATION_MODULE.match(module_info.name):
+            continue
+        module = importlib.import_module(f"{__name__}.{module_info.name}")
+        migrations.append(Migration(module.VERSION, module.DESCRIPTION, module))
+    migrations.sort(key=lambda migration: migration.version)
+
+    versions = [migration.version for migration in migrations]
+    if len(set(versions)) != len(versions):
+        raise RuntimeError(f"Duplicate migration versions: {versions}")
+    return migrations
+
+
+def applied_versions(engine: Engine) -> Set[int]:
+    with engine.begin() as connection:
+        metadata.create_all(connection, checkfirst=True)
+        return set(connection.execute(select(schema_version.c.version)).scalars())
+
+
+def current_version(engine: Engine) -> int:
+    return max(applied_versions(engine), default=0)
+
+
+def pending(engine: Engine) -> List[Migration]:
+    applied = applied_versions(engine)
+    return [migration for migration in discover() if migration.version not in applied]
+
+
+def upgrade(engine: Engine) -> List[int]:
+    """Applies the pending migrations in version order and returns the versions applied."""
+    applied = []
+    for migration in pending(engine):
+        try:
+            with engine.begin() as connection:
+                migration.module.upgrade(connection)
+                connection.execute(insert(schema_version).values(
+                    version=migration.version,
+                    description=migration.description,
+                    applied_at=datetime.now(timezone.utc),
+                ))
+        except IntegrityError:
+            # Inny proces (np. drugi worker) mógł zastosować tę migrację w tym samym czasie; każdy inny
+            # błąd integralności (np. migracja danych łamiąca ograniczenie) musi przerwać aktualizację
+            if migration.version in applied_versions(engine):
+                continue
+            raise
+        applied.append(migration.version)
+    return applied
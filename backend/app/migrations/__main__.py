@@ -0,0 +1,40 @@
+# backend/app/migrations/__main__.py
+"""python -m app.migrations {upgrade,status,check-plans}"""
+
+import argparse
+import sys
+
+from app import database, migrations
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.migrations", description="Database schema migrations.")
+    parser.add_argument("command", choices=["upgrade", "status", "check-plans"])
+    args = parser.parse_args()
+
+    if args.command == "upgrade":
+        applied = migrations.upgrade(database.engine)
+        print(f"Applied: {applied}" if applied else "Database is up to date.")
+        print(f"Schema version: {migrations.current_version(database.engine)}")
+        return 0
+
+    if args.command == "status":
+        applied = migrations.applied_versions(database.engine)
+        for migration in migrations.discover():
+            state = "applied" if migration.version in applied else "pending"
+            print(f"{migration.version:04d}  {state:8}  {migration.description}")
+        return 0
+
+    from app.migrations import query_plans
+
+    failed = False
+    for result in query_plans.check_plans():
+        print(f"{'ok  ' if result.ok else 'SCAN'}  {result.name}")
+        for line in result.plan:
+            print(f"        {line}")
+        failed = failed or not result.ok
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
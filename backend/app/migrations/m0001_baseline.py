@@ -0,0 +1,72 @@
+# backend/app/migrations/m0001_baseline.py
+"""Baseline schema, as created by SQLModel.metadata.create_all before migrations existed."""
+
+from sqlalchemy import (
+    CheckConstraint, Column, Date, Float, ForeignKey, Index, Integer, MetaData, String, Table
+)
+from sqlalchemy.engine import Connection
+
+VERSION = 1
+DESCRIPTION = "Baseline schema"
+
+# Zamrożona kopia schematu - nie importujemy app.models, bo modele będą się dalej zmieniać
+metadata = MetaData()
+
+Table(
+    "tags", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+    Index("ix_tags_name", "name", unique=True),
+)
+
+Table(
+    "users", metadata,
+    Column("username", String, nullable=False),
+    Column("email", String, nullable=False),
+    Column("role", String, nullable=False),
+    Column("id", Integer, primary_key=True),
+    Column("hashed_password", String, nullable=False),
+    CheckConstraint("role IN ('admin', 'owner', 'tenant')", name="role_check"),
+    Index("ix_users_email", "email", unique=True),
+    Index("ix_users_username", "username", unique=True),
+)
+
+Table(
+    "properties", metadata,
+    Column("name", String, nullable=False),
+    Column("address", String, nullable=False),
+    Column("owner_id", Integer, ForeignKey("users.id")),
+    Column("id", Integer, primary_key=True),
+    Index("ix_properties_name", "name"),
+)
+
+Table(
+    "invoices", metadata,
+    Column("amount", Float, nullable=False),
+    Column("issue_date", Date, nullable=False),
+    Column("description", String, nullable=False),
+    Column("file_path", String),
+    Column("property_id", Integer, ForeignKey("properties.id")),
+    Column("uploader_id", Integer, ForeignKey("users.id"), nullable=False),
+    Column("id", Integer, primary_key=True),
+)
+
+Table(
+    "tenant_assignments", metadata,
+    Column("start_date", Date, nullable=False),
+    Column("end_date", Date),
+    Column("tenant_id", Integer, ForeignKey("users.id")),
+    Column("property_id", Integer, ForeignKey("properties.id")),
+    Column("id", Integer, primary_key=True),
+)
+
+Table(
+    "invoice_tag_link", metadata,
+    Column("invoice_id", Integer, ForeignKey("invoices.id"), primary_key=True),
+    Column("tag_id", Integer, ForeignKey("tags.id"), primary_key=True),
+)
+
+
+def upgrade(connection: Connection) -> None:
+    # checkfirst: bazy utworzone wcześniej przez create_all już mają te tabele
+    metadata.create_all(connection, checkfirst=True)
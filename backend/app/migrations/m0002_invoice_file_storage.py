@@ -0,0 +1,39 @@
+# backend/app/migrations/m0002_invoice_file_storage.py
+"""
+File metadata on invoices and the content-addressed stored_files table.
+
+The schema change of the streamed uploads (user-006) and of the content-addressed storage
+(user-007); those changes shipped before the migrations existed, so a database created by
+create_all on any of the versions in between may already have part of it. The upgrade only
+adds what is missing, which also brings such a database up to date without a rebuild.
+"""
+
+from sqlalchemy import Column, Integer, MetaData, String, Table, inspect
+from sqlalchemy.engine import Connection
+
+VERSION = 2
+DESCRIPTION = "Invoice checksum, size and file name; stored_files"
+
+metadata = MetaData()
+
+Table(
+    "stored_files", metadata,
+    Column("checksum", String(64), primary_key=True),
+    Column("path", String, nullable=False),
+    Column("size", Integer, nullable=False),
+    Column("ref_count", Integer, nullable=False),
+)
+
+INVOICE_COLUMNS = {
+    "checksum": "VARCHAR(64)",
+    "file_size": "INTEGER",
+    "file_name": "VARCHAR",
+}
+
+
+def upgrade(connection: Connection) -> None:
+    existing = {column["name"] for column in inspect(connection).get_columns("invoices")}
+    for name, ddl_type in INVOICE_COLUMNS.items():
+        if name not in existing:
+            connection.exec_driver_sql(f"ALTER TABLE invoices ADD COLUMN {name} {ddl_type}")
+    metadata.create_all(connection, checkfirst=True)
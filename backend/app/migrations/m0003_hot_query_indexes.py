@@ -0,0 +1,31 @@
+# backend/app/migrations/m0003_hot_query_indexes.py
+"""
+Indexes for the filters used on every request:
+- invoice listings, summaries and exports: invoices WHERE property_id = ? ORDER BY issue_date
+  (the composite index also serves plain property_id lookups)
+- access index and tenant dashboards: tenant_assignments WHERE tenant_id = ?
+- tenant assignment duplicate check: tenant_assignments WHERE property_id = ? AND tenant_id = ?
+- access index and owner dashboards: properties WHERE owner_id = ?
+- tag filters: invoice_tag_link WHERE tag_id = ? (its primary key starts with invoice_id)
+"""
+
+from sqlalchemy import inspect
+from sqlalchemy.engine import Connection
+
+VERSION = 3
+DESCRIPTION = "Composite indexes for hot queries"
+
+INDEXES = {
+    "ix_invoices_property_id_issue_date": ("invoices", ("property_id", "issue_date")),
+    "ix_tenant_assignments_tenant_id": ("tenant_assignments", ("tenant_id",)),
+    "ix_tenant_assignments_property_id_tenant_id": ("tenant_assignments", ("property_id", "tenant_id")),
+    "ix_properties_owner_id": ("properties", ("owner_id",)),
+    "ix_invoice_tag_link_tag_id": ("invoice_tag_link", ("tag_id",)),
+}
+
+
+def upgrade(connection: Connection) -> None:
+    inspector = inspect(connection)
+    for index_name, (table, columns) in INDEXES.items():
+        if index_name not in {index["name"] for index in inspector.get_indexes(table)}:
+            connection.exec_driver_sql(f"CREATE INDEX {index_name} ON {table} ({', '.join(columns)})")
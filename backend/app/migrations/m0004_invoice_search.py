@@ -0,0 +1,89 @@
+# backend/app/migrations/m0004_invoice_search.py
+"""
+Full-text index over invoice descriptions, tag names and property names (SQLite FTS5).
+
+invoice_search has one row per invoice (rowid = invoices.id). Triggers on invoices,
+invoice_tag_link, tags and properties keep it in sync with every write path,
+including bulk imports and property deletion. property_ref holds a "p<property_id>"
+token, so permission filtering is part of the MATCH expression.
+"""
+
+from sqlalchemy.engine import Connection
+
+VERSION = 4
+DESCRIPTION = "Full-text invoice search"
+
+# Kolumny: opis, nazwy tagów, nazwa nieruchomości, token uprawnień (waga 0 w rankingu)
+CREATE_TABLE = """
+CREATE VIRTUAL TABLE IF NOT EXISTS invoice_search USING fts5(
+    description, tags, property, property_ref,
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix = '2 3'
+)
+"""
+
+RANK = "INSERT INTO invoice_search(invoice_search, rank) VALUES ('rank', 'bm25(1.0, 2.0, 0.5, 0.0)')"
+
+TAG_NAMES = """(
+    SELECT group_concat(tags.name, ' ') FROM invoice_tag_link
+    JOIN tags ON tags.id = invoice_tag_link.tag_id
+    WHERE invoice_tag_link.invoice_id = {invoice_id}
+)"""
+
+PROPERTY_NAME = "(SELECT name FROM properties WHERE properties.id = {property_id})"
+
+INDEX_ROW = f"""
+INSERT INTO invoice_search(rowid, description, tags, property, property_ref)
+VALUES (NEW.id, NEW.description, {TAG_NAMES.format(invoice_id="NEW.id")},
+        {PROPERTY_NAME.format(property_id="NEW.property_id")}, 'p' || NEW.property_id);
+"""
+
+REFRESH_TAGS = """
+UPDATE invoice_search SET tags = {tag_names} WHERE rowid = {invoice_id};
+"""
+
+TRIGGERS = {
+    "invoice_search_ai": f"AFTER INSERT ON invoices BEGIN {INDEX_ROW} END",
+    "invoice_search_au": f"""AFTER UPDATE OF description, property_id ON invoices BEGIN
+        DELETE FROM invoice_search WHERE rowid = OLD.id;
+        {INDEX_ROW}
+    END""",
+    "invoice_search_ad": "AFTER DELETE ON invoices BEGIN DELETE FROM invoice_search WHERE rowid = OLD.id; END",
+    "invoice_search_link_ai": f"""AFTER INSERT ON invoice_tag_link BEGIN
+        {REFRESH_TAGS.format(tag_names=TAG_NAMES.format(invoice_id="NEW.invoice_id"), invoice_id="NEW.invoice_id")}
+    END""",
+    "invoice_search_link_ad": f"""AFTER DELETE ON invoice_tag_link BEGIN
+        {REFRESH_TAGS.format(tag_names=TAG_NAMES.format(invoice_id="OLD.invoice_id"), invoice_id="OLD.invoice_id")}
+    END""",
+    "invoice_search_tag_au": """AFTER UPDATE OF name ON tags BEGIN
+        UPDATE invoice_search SET tags = (
+            SELECT group_concat(tags.name, ' ') FROM invoice_tag_link
+            JOIN tags ON tags.id = invoice_tag_link.tag_id
+            WHERE invoice_tag_link.invoice_id = invoice_search.rowid
+        )
+        WHERE rowid IN (SELECT invoice_id FROM invoice_tag_link WHERE tag_id = NEW.id);
+    END""",
+    "invoice_search_property_au": """AFTER UPDATE OF name ON properties BEGIN
+        UPDATE invoice_search SET property = NEW.name
+        WHERE rowid IN (SELECT id FROM invoices WHERE property_id = NEW.id);
+    END""",
+}
+
+BACKFILL = f"""
+INSERT INTO invoice_search(rowid, description, tags, property, property_ref)
+SELECT invoices.id, invoices.description, {TAG_NAMES.format(invoice_id="invoices.id")},
+       {PROPERTY_NAME.format(property_id="invoices.property_id")}, 'p' || invoices.property_id
+FROM invoices
+WHERE invoices.id NOT IN (SELECT rowid FROM invoice_search)
+"""
+
+
+def upgrade(connection: Connection) -> None:
+    if connection.dialect.name != "sqlite":
+        # Wyszukiwanie pełnotekstowe jest zaimplementowane tylko dla SQLite (app/search.py)
+        return
+    connection.exec_driver_sql(CREATE_TABLE)
+    connection.exec_driver_sql(RANK)
+    for name, body in TRIGGERS.items():
+        connection.exec_driver_sql(f"CREATE TRIGGER IF NOT EXISTS {name} {body}")
+    connection.exec_driver_sql(BACKFILL)
@@ -0,0 +1,37 @@
+# backend/app/migrations/m0005_jobs.py
+"""Persistent background job queue and the page count filled in by invoice jobs."""
+
+from sqlalchemy import JSON, Column, DateTime, Index, Integer, MetaData, String, Table, inspect
+from sqlalchemy.engine import Connection
+
+VERSION = 5
+DESCRIPTION = "Background jobs; invoice page count"
+
+metadata = MetaData()
+
+Table(
+    "jobs", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("kind", String, nullable=False),
+    Column("payload", JSON),
+    Column("status", String, nullable=False),
+    Column("attempts", Integer, nullable=False),
+    Column("max_attempts", Integer, nullable=False),
+    Column("run_after", DateTime(timezone=True), nullable=False),
+    Column("invoice_id", Integer),
+    Column("locked_by", String),
+    Column("locked_at", DateTime(timezone=True)),
+    Column("last_error", String),
+    Column("result", JSON),
+    Column("created_at", DateTime(timezone=True), nullable=False),
+    Column("updated_at", DateTime(timezone=True), nullable=False),
+    # Pobieranie kolejnych zadań: status = 'queued' AND run_after <= now ORDER BY run_after
+    Index("ix_jobs_status_run_after", "status", "run_after"),
+    Index("ix_jobs_invoice_id", "invoice_id"),
+)
+
+
+def upgrade(connection: Connection) -> None:
+    if "page_count" not in {column["name"] for column in inspect(connection).get_columns("invoices")}:
+        connection.exec_driver_sql("ALTER TABLE invoices ADD COLUMN page_count INTEGER")
+    metadata.create_all(connection, checkfirst=True)
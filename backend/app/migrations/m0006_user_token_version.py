@@ -0,0 +1,16 @@
+# backend/app/migrations/m0006_user_token_version.py
+"""
+Principal version of users. It is bumped whenever the username, email or role changes, and tokens
+carrying principal claims (AUTH_TOKEN_CLAIMS=1) are trusted only while their version matches.
+"""
+
+from sqlalchemy import inspect
+from sqlalchemy.engine import Connection
+
+VERSION = 6
+DESCRIPTION = "User token version"
+
+
+def upgrade(connection: Connection) -> None:
+    if "token_version" not in {column["name"] for column in inspect(connection).get_columns("users")}:
+        connection.exec_driver_sql("ALTER TABLE users ADD COLUMN token_version INTEGER NOT NULL DEFAULT 0")
@@ -0,0 +1,170 @@
+# backend/app/migrations/query_plans.py
+"""
+EXPLAIN QUERY PLAN check for the hot queries of the invoice, search, report, dashboard, assignment and job endpoints.
+
+The statements are built with the same helpers the endpoints use (routers/invoices.py, routers/reports.py,
+routers/dashboard.py, routers/assignments.py, access.py, projections.py, search.py and jobs.py), with sample parameters.
+The check runs them against a fresh SQLite database built by the migrations and fails when any of them
+scans a whole table instead of searching an index, i.e. when a migration is missing the index a query relies on.
+"""
+
+import re
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy.engine import Connection, Engine
+from sqlmodel import create_engine, select
+
+from app import access, jobs, models, projections, search
+from app import migrations
+from app.routers import assignments, dashboard, invoices, reports
+
+# Tabele, które rosną z danymi - pełny skan którejkolwiek z nich w gorącym zapytaniu to błąd
+HOT_TABLES = {"invoices", "tenant_assignments", "invoice_tag_link", "properties", "jobs", "invoice_search"}
+
+_SCAN = re.compile(r"^SCAN (?:TABLE )?(\w+)")
+# Tabela FTS5 zawsze jest "SCAN ... VIRTUAL TABLE"; "M" w numerze indeksu oznacza, że użyto MATCH
+_VIRTUAL_INDEX = re.compile(r"VIRTUAL TABLE INDEX \d+:(\S*)")
+
+_PAGE = (date(2024, 6, 1), 500)
+_PAGE_SIZE = 100
+
+
+def _invoice_page():
+    """GET /invoices/property/{id}: keyset page ordered by issue_date, id."""
+    statement = projections.invoice_select().where(models.Invoice.property_id == 1)
+    return invoices.invoice_page_statement(statement, _PAGE, _PAGE_SIZE)
+
+
+def _my_invoices():
+    """GET /invoices/my: invoices of the properties a tenant is assigned to."""
+    return invoices.invoice_page_statement(invoices.my_invoices_statement(1), None, _PAGE_SIZE)
+
+
+def _invoice_page_tags():
+    """projections.attach_invoice_relations: tags of the invoices on a page."""
+    return projections.invoice_tags_statement([1, 2, 3])
+
+
+def _tagged_invoices(tag_match: invoices.TagMatch):
+    statement = projections.invoice_select().where(models.Invoice.property_id == 1)
+    statement = invoices.apply_invoice_filters(
+        statement, invoices.InvoiceFilters(tags={"water", "power"}, tag_match=tag_match)
+    )
+    return invoices.invoice_page_statement(statement, None, _PAGE_SIZE)
+
+
+def _invoice_search():
+    """GET /invoices/search: second page of the ranked matches of a block, limited to the user's properties."""
+    expression = search.build_match_expression("water bill", [1, 2, 3])
+    return search.search_page_statement(expression, 20_000, (-1.5, 500, 20_000), _PAGE_SIZE)
+
+
+def _property_tags():
+    """GET /invoices/tags/property/{id}: distinct tag names of a property's invoices."""
+    return invoices.property_tags_statement(1)
+
+
+def _monthly_summary():
+    """GET /invoices/summary/monthly/{id}: totals grouped by year and month."""
+    return invoices.monthly_summary_statement(1, "month", False, invoices.InvoiceFilters(date_from=date(2024, 1, 1)))
+
+
+def _portfolio_report():
+    """GET /reports/costs for an owner: totals per property and month over the accessible properties."""
+    statement = reports.cost_report_statement(["property", "month"]).where(models.Invoice.property_id.in_([1, 2, 3]))
+    return invoices.apply_invoice_filters(statement, invoices.InvoiceFilters(date_from=date(2024, 1, 1)))
+
+
+def _property_access():
+    """access.get_property_access: owned and assigned properties of a user."""
+    return access.property_access_statement(1)
+
+
+def _assignment_exists():
+    """POST /assignments/properties/{id}/tenants: duplicate assignment check."""
+    return assignments.assignment_statement(1, 2)
+
+
+def _dashboard(statements: Dict[str, object]):
+    # Zapytania panelu wykonywane są osobno; do EXPLAIN łączymy je w jeden select podzapytań
+    return select(*(statement.scalar_subquery() for statement in statements.values()))
+
+
+def _due_jobs():
+    """jobs.claim: the oldest due jobs of the queue."""
+    return jobs.due_jobs_statement(datetime(2024, 1, 1, tzinfo=timezone.utc), 8)
+
+
+def _invoice_jobs():
+    """GET /jobs/invoice/{id}."""
+    return jobs.invoice_jobs_statement(1)
+
+
+HOT_QUERIES: Dict[str, Callable] = {
+    "invoice_page": _invoice_page,
+    "my_invoices": _my_invoices,
+    "invoice_page_tags": _invoice_page_tags,
+    # GET /invoices/tagged: invoices having any / every one of the tags
+    "tagged_invoices": lambda: _tagged_invoices("any"),
+    "invoices_with_all_tags": lambda: _tagged_invoices("all"),
+    "invoice_search": _invoice_search,
+    "property_tags": _property_tags,
+    "monthly_summary": _monthly_summary,
+    "portfolio_report": _portfolio_report,
+    "property_access": _property_access,
+    "assignment_exists": _assignment_exists,
+    # GET /dashboard/summary for owners and tenants
+    "owner_dashboard": lambda: _dashboard(dashboard.owner_summary_statements(1)),
+    "tenant_dashboard": lambda: _dashboard(dashboard.tenant_summary_statements(1)),
+    "due_jobs": _due_jobs,
+    "invoice_jobs": _invoice_jobs,
+}
+
+
+@dataclass
+class PlanResult:
+    name: str
+    plan: List[str]
+    full_scans: List[str]
+
+    @property
+    def ok(self) -> bool:
+        return not self.full_scans
+
+
+def explain(connection: Connection, statement) -> List[str]:
+    """Returns the detail lines of SQLite's EXPLAIN QUERY PLAN for a statement."""
+    compiled = statement.compile(dialect=connection.dialect, compile_kwargs={"render_postcompile": True})
+    params = tuple(compiled.params[name] for name in compiled.positiontup)
+    rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", params).all()
+    return [row[-1] for row in rows]
+
+
+def _is_full_scan(line: str) -> bool:
+    match = _SCAN.match(line)
+    if not match or match.group(1) not in HOT_TABLES:
+        return False
+    virtual = _VIRTUAL_INDEX.search(line)
+    return virtual is None or "M" not in virtual.group(1)
+
+
+def check_plans(engine: Optional[Engine] = None) -> List[PlanResult]:
+    """
+    EXPLAINs every hot query. Without an engine, an in-memory SQLite database
+    is built from the migrations, so the result reflects what they ship.
+    """
+    if engine is None:
+        engine = create_engine("sqlite://")
+        migrations.upgrade(engine)
+    if engine.dialect.name != "sqlite":
+        raise NotImplementedError("The query plan check uses SQLite's EXPLAIN QUERY PLAN")
+
+    results = []
+    with engine.connect() as connection:
+        for name, build in HOT_QUERIES.items():
+            plan = explain(connection, build())
+            full_scans = [line for line in plan if _is_full_scan(line)]
+            results.append(PlanResult(name, plan, full_scans))
+    return results
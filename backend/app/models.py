@@ -1,8 +1,8 @@
 # backend/app/models.py
 
-from typing import List, Optional
-from datetime import date
-from sqlmodel import Field, Relationship, SQLModel, CheckConstraint
+from typing import Any, Dict, List, Optional
+from datetime import date, datetime
+from sqlmodel import Field, Relationship, SQLModel, CheckConstraint, Index, Column, JSON
 
 # Comments are in English for consistency
 class Roles:
@@ -14,6 +14,9 @@ class Roles:
 # Forward declaration of the link model class
 class InvoiceTagLink(SQLModel, table=True):
     __tablename__ = "invoice_tag_link"
+    __table_args__ = (
+        Index("ix_invoice_tag_link_tag_id", "tag_id"), # The primary key only covers lookups by invoice_id
+    )
     invoice_id: Optional[int] = Field(default=None, foreign_key="invoices.id", primary_key=True)
     tag_id: Optional[int] = Field(default=None, foreign_key="tags.id", primary_key=True)
 
@@ -24,6 +27,10 @@ class Tag(SQLModel, table=True):
     name: str = Field(unique=True, index=True)
     invoices: List["Invoice"] = Relationship(back_populates="tags", link_model=InvoiceTagLink)
 
+class TagRead(SQLModel):
+    id: int
+    name: str
+
 # === User Models ===
 class UserBase(SQLModel):
     username: str = Field(index=True, unique=True)
@@ -38,6 +45,8 @@ class User(UserBase, table=True):
 
     id: Optional[int] = Field(default=None, primary_key=True)
     hashed_password: str
+    # Bumped when username, email or role change; tokens with older claims stop being trusted
+    token_version: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
 
     owned_properties: List["Property"] = Relationship(back_populates="owner")
     tenant_assignments: List["TenantAssignment"] = Relationship(back_populates="tenant")
@@ -72,14 +81,74 @@ class InvoiceBase(SQLModel):
 
 class Invoice(InvoiceBase, table=True):
     __tablename__ = "invoices"
+    __table_args__ = (
+        # Listings, summaries and dashboards filter by property and order or group by date
+        Index("ix_invoices_property_id_issue_date", "property_id", "issue_date"),
+    )
     id: Optional[int] = Field(default=None, primary_key=True)
+    checksum: Optional[str] = Field(default=None, max_length=64) # SHA-256 of the file, hex
+    file_size: Optional[int] = None
+    file_name: Optional[str] = None # Original name of the uploaded file
+    page_count: Optional[int] = None # Filled in by the invoice.inspect_pdf background job
     property: Optional["Property"] = Relationship(back_populates="invoices")
     uploader: User = Relationship(back_populates="invoices")
     tags: List[Tag] = Relationship(back_populates="invoices", link_model=InvoiceTagLink)
 
+# === Stored File Models ===
+class StoredFile(SQLModel, table=True):
+    """A content-addressed invoice file, shared by every invoice with the same checksum."""
+    __tablename__ = "stored_files"
+    checksum: str = Field(primary_key=True, max_length=64)
+    path: str
+    size: int
+    ref_count: int = Field(default=0)
+
+# === Background Job Models ===
+class JobStatus:
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+class Job(SQLModel, table=True):
+    """A unit of background work, claimed and run by the job dispatcher (app/jobs.py)."""
+    __tablename__ = "jobs"
+    __table_args__ = (
+        Index("ix_jobs_status_run_after", "status", "run_after"),
+        Index("ix_jobs_invoice_id", "invoice_id"),
+    )
+    id: Optional[int] = Field(default=None, primary_key=True)
+    kind: str
+    payload: Dict[str, Any] = Field(default_factory=dict, sa_column=Column(JSON))
+    status: str = Field(default=JobStatus.QUEUED)
+    attempts: int = Field(default=0)
+    max_attempts: int
+    run_after: datetime
+    invoice_id: Optional[int] = None # The invoice the job works on, if any (not a foreign key: jobs outlive deleted invoices)
+    locked_by: Optional[str] = None
+    locked_at: Optional[datetime] = None
+    last_error: Optional[str] = None
+    result: Optional[Dict[str, Any]] = Field(default=None, sa_column=Column(JSON))
+    created_at: datetime
+    updated_at: datetime
+
+class JobRead(SQLModel):
+    id: int
+    kind: str
+    status: str
+    attempts: int
+    max_attempts: int
+    invoice_id: Optional[int] = None
+    run_after: datetime
+    last_error: Optional[str] = None
+    result: Optional[Dict[str, Any]] = None
+    created_at: datetime
+    updated_at: datetime
+
 class InvoiceRead(InvoiceBase):
     id: int
-    tags: List[Tag] = []
+    page_count: Optional[int] = None
+    tags: List[TagRead] = []
     property: Optional[PropertyRead] = None
 
 class InvoiceReadWithDetails(InvoiceRead):
@@ -96,6 +165,9 @@ class PropertyBase(SQLModel):
 
 class Property(PropertyBase, table=True):
     __tablename__ = "properties"
+    __table_args__ = (
+        Index("ix_properties_owner_id", "owner_id"),
+    )
     id: Optional[int] = Field(default=None, primary_key=True)
 
     owner: Optional[User] = Relationship(back_populates="owned_properties")
@@ -126,6 +198,10 @@ class TenantAssignmentBase(SQLModel):
 
 class TenantAssignment(TenantAssignmentBase, table=True):
     __tablename__ = "tenant_assignments"
+    __table_args__ = (
+        Index("ix_tenant_assignments_tenant_id", "tenant_id"),
+        Index("ix_tenant_assignments_property_id_tenant_id", "property_id", "tenant_id"),
+    )
     id: Optional[int] = Field(default=None, primary_key=True)
 
     tenant: Optional[User] = Relationship(back_populates="tenant_assignments")
@@ -0,0 +1,54 @@
+# backend/app/pagination.py
+
+import base64
+from datetime import date
+from typing import Optional, Tuple
+
+from fastapi import HTTPException, status
+
+# Header carrying the cursor of the next page (absent on the last page)
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+def encode_cursor(issue_date: date, invoice_id: int) -> str:
+    """Encodes the (issue_date, id) keyset position as an opaque cursor."""
+    raw = f"{issue_date.isoformat()}|{invoice_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Tuple[date, int]]:
+    """Decodes a cursor produced by encode_cursor; raises 400 if it is malformed."""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw_date, raw_id = base64.urlsafe_b64decode(padded).decode().split("|")
+        return date.fromisoformat(raw_date), int(raw_id)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+def encode_rank_cursor(rank: float, item_id: int, block: Optional[int] = None) -> str:
+    """
+    Encodes a (rank, id) position of a ranked result list; the rank is stored exactly as a hex float.
+    block identifies the ranked block of the position when results are ranked in blocks (see search.py).
+    """
+    raw = f"{rank.hex()}|{item_id}" + (f"|{block}" if block is not None else "")
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_rank_cursor(cursor: Optional[str]) -> Optional[Tuple[float, int, Optional[int]]]:
+    """Decodes a cursor produced by encode_rank_cursor into (rank, id, block); raises 400 if it is malformed."""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw_rank, raw_id, *raw_block = base64.urlsafe_b64decode(padded).decode().split("|")
+        if len(raw_block) > 1:
+            raise ValueError(cursor)
+        return float.fromhex(raw_rank), int(raw_id), (int(raw_block[0]) if raw_block else None)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
@@ -0,0 +1,145 @@
+# backend/app/passwords.py
+"""
+Password hashing on a dedicated process pool.
+
+bcrypt is deliberately slow, so hashing and verification run in their own pool of
+worker processes instead of the shared request threadpool. A semaphore caps the number
+of jobs in flight and a bounded wait queue rejects the overflow with 503.
+
+Calibrate the cost for a target latency with:
+    python -m app.passwords --target-ms 250
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional, Tuple
+
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+PASSWORD_HASH_MAX_CONCURRENCY = int(os.getenv("PASSWORD_HASH_MAX_CONCURRENCY", str(PASSWORD_HASH_WORKERS)))
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "100"))
+
+# Hashes with a different cost than BCRYPT_ROUNDS are reported by verify_and_update as needing a rehash
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_lock = threading.Lock()
+_slots: Optional[asyncio.Semaphore] = None
+
+_metrics = {"in_flight": 0, "queued": 0, "completed": 0, "rejected": 0}
+
+
+# --- Funkcje wykonywane w procesach roboczych ---
+def _hash_in_worker(password: str) -> str:
+    return pwd_context.hash(password)
+
+def _verify_in_worker(password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+    return pwd_context.verify_and_update(password, hashed)
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # "spawn" keeps the workers free of the parent's threads, sockets and DB connections
+            _executor = ProcessPoolExecutor(
+                max_workers=PASSWORD_HASH_WORKERS, mp_context=multiprocessing.get_context("spawn")
+            )
+        return _executor
+
+def shutdown() -> None:
+    """Stops the worker processes; called on application shutdown."""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(cancel_futures=True)
+            _executor = None
+
+async def _run(fn, *args):
+    global _slots
+    if _slots is None:
+        _slots = asyncio.Semaphore(PASSWORD_HASH_MAX_CONCURRENCY)
+
+    if _slots.locked() and _metrics["queued"] >= PASSWORD_HASH_MAX_QUEUE:
+        _metrics["rejected"] += 1
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many concurrent password operations, try again shortly",
+            headers={"Retry-After": "1"},
+        )
+
+    _metrics["queued"] += 1
+    try:
+        await _slots.acquire()
+    finally:
+        _metrics["queued"] -= 1
+    _metrics["in_flight"] += 1
+    try:
+        return await asyncio.wrap_future(_get_executor().submit(fn, *args))
+    finally:
+        _metrics["in_flight"] -= 1
+        _metrics["completed"] += 1
+        _slots.release()
+
+async def hash_password(password: str) -> str:
+    """Hashes a password on the hashing pool."""
+    return await _run(_hash_in_worker, password)
+
+async def verify_and_update(password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verifies a password on the hashing pool.
+    Returns (valid, new_hash); new_hash is set when the stored hash uses an outdated cost.
+    """
+    return await _run(_verify_in_worker, password, hashed)
+
+def stats() -> Dict[str, int]:
+    return {
+        **_metrics,
+        "workers": PASSWORD_HASH_WORKERS,
+        "max_concurrency": PASSWORD_HASH_MAX_CONCURRENCY,
+        "max_queue": PASSWORD_HASH_MAX_QUEUE,
+        "rounds": BCRYPT_ROUNDS,
+    }
+
+
+# --- Kalibracja kosztu ---
+def measure_rounds(rounds: int, samples: int = 3) -> float:
+    """Returns the median time in milliseconds of hashing one password with the given cost."""
+    context = CryptContext(schemes=["bcrypt"], bcrypt__rounds=rounds)
+    timings = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        context.hash("calibration-password")
+        timings.append((time.perf_counter() - start) * 1000)
+    return sorted(timings)[len(timings) // 2]
+
+def calibrate_rounds(target_ms: float, min_rounds: int = 10, max_rounds: int = 16) -> int:
+    """Picks the highest bcrypt cost whose hashing time on this machine stays within target_ms."""
+    best = min_rounds
+    for rounds in range(min_rounds, max_rounds + 1):
+        if measure_rounds(rounds) > target_ms:
+            break
+        best = rounds
+    return best
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Pick the bcrypt cost for a target hashing latency.")
+    parser.add_argument("--target-ms", type=float, default=250.0)
+    parser.add_argument("--min-rounds", type=int, default=10)
+    parser.add_argument("--max-rounds", type=int, default=16)
+    args = parser.parse_args()
+
+    rounds = calibrate_rounds(args.target_ms, args.min_rounds, args.max_rounds)
+    print(f"Recommended cost: BCRYPT_ROUNDS={rounds} (~{measure_rounds(rounds):.0f} ms per hash, current {BCRYPT_ROUNDS})")
+    print("Existing hashes are upgraded on the next successful login after the cost changes.")
+
+if __name__ == "__main__":
+    main()
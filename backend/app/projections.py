@@ -0,0 +1,88 @@
+# backend/app/projections.py
+"""
+Read path that selects only the columns of a response schema and builds the response
+objects straight from the result tuples.
+
+List endpoints otherwise load full table objects (identity map, attribute instrumentation,
+relationship loaders) only to copy them into the response_model again. Here the rows are
+turned into schema instances with model_construct, which skips validation: the values come
+from typed columns. FastAPI still runs serialize_response on them, but pydantic accepts
+instances of the response_model without validating them again (revalidate_instances="never"),
+so only the final dump to JSON-ready data remains, instead of reading every ORM attribute.
+Tags and properties of invoices are fetched with one query each per page.
+"""
+
+from collections import defaultdict
+from typing import Dict, List, Sequence, Type, TypeVar
+
+from sqlmodel import Session, SQLModel, select
+
+from app import models
+
+SchemaT = TypeVar("SchemaT", bound=SQLModel)
+
+
+def columns_for(schema: Type[SQLModel], table: Type[SQLModel]) -> list:
+    """The columns of table that are fields of schema, in the schema's field order."""
+    table_columns = table.__table__.columns
+    return [table_columns[name] for name in schema.model_fields if name in table_columns]
+
+
+def select_for(schema: Type[SQLModel], table: Type[SQLModel]):
+    """A select of the columns schema needs from table; add WHERE/ORDER BY clauses as usual."""
+    return select(*columns_for(schema, table))
+
+
+def build(schema: Type[SchemaT], rows: Sequence) -> List[SchemaT]:
+    """Builds schema instances from the rows of a select_for(schema, ...) statement."""
+    if not rows:
+        return []
+    keys = rows[0]._fields # Row._asdict() wylicza klucze dla każdego wiersza osobno
+    return [schema.model_construct(**dict(zip(keys, row))) for row in rows]
+
+
+def invoice_tags_statement(invoice_ids: Sequence[int]):
+    """(invoice_id, tag id, tag name) rows of the given invoices."""
+    return (
+        select(models.InvoiceTagLink.invoice_id, models.Tag.id, models.Tag.name)
+        .join(models.Tag, models.Tag.id == models.InvoiceTagLink.tag_id)
+        .where(models.InvoiceTagLink.invoice_id.in_(invoice_ids))
+        .order_by(models.InvoiceTagLink.invoice_id, models.InvoiceTagLink.tag_id) # Kolejność klucza głównego, jak przy selectinload
+    )
+
+
+def attach_invoice_relations(db: Session, invoices: List[models.InvoiceRead]) -> List[models.InvoiceRead]:
+    """Fills tags and property of InvoiceRead objects built by build(), with one query for each."""
+    if not invoices:
+        return invoices
+
+    tags: Dict[int, List[models.TagRead]] = defaultdict(list)
+    tag_rows = db.exec(invoice_tags_statement([invoice.id for invoice in invoices])).all()
+    tag_objects: Dict[int, models.TagRead] = {} # Jeden obiekt na tag, współdzielony przez faktury ze strony
+    for invoice_id, tag_id, name in tag_rows:
+        if tag_id not in tag_objects:
+            tag_objects[tag_id] = models.TagRead.model_construct(id=tag_id, name=name)
+        tags[invoice_id].append(tag_objects[tag_id])
+
+    property_ids = {invoice.property_id for invoice in invoices if invoice.property_id is not None}
+    properties = {
+        prop.id: prop for prop in build(
+            models.PropertyRead,
+            db.exec(select_for(models.PropertyRead, models.Property).where(models.Property.id.in_(property_ids))).all(),
+        )
+    } if property_ids else {}
+
+    for invoice in invoices:
+        invoice.tags = tags.get(invoice.id, [])
+        invoice.property = properties.get(invoice.property_id)
+    return invoices
+
+
+def invoice_select():
+    """A select of the InvoiceRead columns of invoices; run it with read_invoices."""
+    return select_for(models.InvoiceRead, models.Invoice)
+
+
+def read_invoices(db: Session, statement) -> List[models.InvoiceRead]:
+    """Runs an invoice_select() statement and returns complete InvoiceRead objects."""
+    return attach_invoice_relations(db, build(models.InvoiceRead, db.exec(statement).all()))
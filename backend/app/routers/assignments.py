@@ -2,10 +2,11 @@
 
 from fastapi import APIRouter, Depends, HTTPException, status, Response
 from sqlmodel import Session, select
-from app import models, database, auth
+from app import models, database, auth, cache, access
 
 # Używamy tej samej zależności, co w routerze użytkowników
 from .users import get_admin_user
+from .properties import PROPERTY_DETAILS_OPTIONS
 
 router = APIRouter(prefix="/assignments", tags=["Assignments"])
 
@@ -28,12 +29,20 @@ def assign_owner_to_property(
     if user_to_assign.role != models.Roles.OWNER:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="User must have the 'owner' role to be assigned")
 
+    previous_owner_id = db_property.owner_id
     db_property.owner_id = user_to_assign.id
     db.add(db_property)
     db.commit()
-    db.refresh(db_property)
-    return db_property
+    access.invalidate_user(previous_owner_id, user_to_assign.id)
+    cache.invalidate_dashboard_cache()
+    return db.get(models.Property, property_id, options=PROPERTY_DETAILS_OPTIONS, populate_existing=True)
 
+def assignment_statement(property_id: int, tenant_id: int):
+    """The assignment of a tenant to a property, if there is one."""
+    return select(models.TenantAssignment).where(
+        models.TenantAssignment.property_id == property_id,
+        models.TenantAssignment.tenant_id == tenant_id
+    )
 
 @router.post("/properties/{property_id}/tenants", response_model=models.TenantAssignmentRead, status_code=status.HTTP_201_CREATED)
 def assign_tenant_to_property(
@@ -54,18 +63,15 @@ def assign_tenant_to_property(
     if not user_to_assign or user_to_assign.role != models.Roles.TENANT:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Tenant to assign not found or user is not a tenant")
 
-    existing_assignment = db.exec(
-        select(models.TenantAssignment).where(
-            models.TenantAssignment.property_id == property_id,
-            models.TenantAssignment.tenant_id == user_to_assign.id
-        )
-    ).first()
+    existing_assignment = db.exec(assignment_statement(property_id, user_to_assign.id)).first()
     if existing_assignment:
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="This tenant is already assigned to this property")
 
     new_assignment = models.TenantAssignment.model_validate(assignment_request, update={"property_id": property_id})
     db.add(new_assignment)
     db.commit()
+    access.invalidate_user(new_assignment.tenant_id)
+    cache.invalidate_dashboard_cache()
     db.refresh(new_assignment)
     return new_assignment
 
@@ -83,6 +89,9 @@ def unassign_tenant_from_property(
     if current_user.role != models.Roles.ADMIN and assignment_to_delete.property.owner_id != current_user.id:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not enough permissions")
 
+    tenant_id = assignment_to_delete.tenant_id
     db.delete(assignment_to_delete)
     db.commit()
+    access.invalidate_user(tenant_id)
+    cache.invalidate_dashboard_cache()
     return Response(status_code=status.HTTP_204_NO_CONTENT)
\ No newline at end of file
@@ -1,55 +1,67 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlmodel import Session
-from app import models, auth, database
+from typing import Dict
+from app import models, auth, database, cache, passwords, admission, i18n
+
+from .users import get_admin_user
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
 @router.post("/login")
-def login_for_access_token(
+async def login_for_access_token(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(database.get_db)
+    db: Session = Depends(database.get_db),
+    lang: str = Depends(i18n.get_lang)
 ):
     """Logs in a user and returns an access token."""
-    user = auth.authenticate_user(db, form_data.username, form_data.password)
+    user = await auth.authenticate_user(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Incorrect username or password",
+            detail=i18n.t("errors.invalid_credentials", lang),
             headers={"WWW-Authenticate": "Bearer"},
         )
-    access_token = auth.create_access_token(data={"sub": user.username})
+    access_token = auth.create_access_token(data=auth.token_data_for_user(user))
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.post("/register", response_model=models.UserRead, status_code=status.HTTP_201_CREATED)
-def register_user(
+async def register_user(
     user_create: models.UserCreate, # ZMIANA: Przyjmujemy model Pydantic z ciała żądania
-    db: Session = Depends(database.get_db)
+    db: Session = Depends(database.get_db),
+    lang: str = Depends(i18n.get_lang)
 ):
     """Registers a new user."""
-    if auth.get_user_by_username(db, user_create.username):
+    if await run_in_threadpool(auth.get_user_by_username, db, user_create.username):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Username already registered"
+            detail=i18n.t("errors.username_registered", lang)
         )
-    if auth.get_user_by_email(db, user_create.email):
+    if await run_in_threadpool(auth.get_user_by_email, db, user_create.email):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Email already registered"
+            detail=i18n.t("errors.email_registered", lang)
         )
-    
-    hashed_password = auth.get_password_hash(user_create.password)
-    user_data = user_create.model_dump(exclude={"password"})
-    
-    new_user = models.User(**user_data, hashed_password=hashed_password)
-    
-    db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
-    
+
+    new_user = await auth.create_user(db, user_create)
+    cache.invalidate_dashboard_cache()
+
     return new_user
 
 @router.get("/me", response_model=models.UserRead)
 def read_users_me(current_user: models.User = Depends(auth.get_current_user)):
     """Returns the data of the currently logged-in user."""
     return current_user
+
+
+@router.get("/hashing/stats", response_model=Dict[str, int])
+def get_hashing_stats(admin: models.User = Depends(get_admin_user)):
+    """Returns queue depth and throughput counters of the password hashing pool (admin only)."""
+    return passwords.stats()
+
+
+@router.get("/admission/stats", response_model=Dict[str, Dict[str, int]])
+def get_admission_stats(admin: models.User = Depends(get_admin_user)):
+    """Returns the admission control counters of every limited route (admin only)."""
+    return admission.stats()
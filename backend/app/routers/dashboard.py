@@ -1,25 +1,53 @@
 # backend/app/routers/dashboard.py
 
 from fastapi import APIRouter, Depends
-from sqlmodel import Session, select, func
-from app import models, auth, database
+from sqlmodel import select, func
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app import models, auth, database, cache
 from typing import Dict, Any
 
+from .users import get_admin_user
+
 router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
 
-@router.get("/summary", response_model=Dict[str, Any])
-def get_dashboard_summary(
-    db: Session = Depends(database.get_db),
-    current_user: models.User = Depends(auth.get_current_user)
-):
-    """
-    Dostarcza podsumowanie danych do panelu głównego w zależności od roli użytkownika.
-    """
+def owner_summary_statements(owner_id: int) -> Dict[str, Any]:
+    """The aggregate queries of an owner's dashboard, by summary key."""
+    owned_properties_ids = select(models.Property.id).where(models.Property.owner_id == owner_id)
+    return {
+        "total_properties": select(func.count(models.Property.id)).where(models.Property.owner_id == owner_id),
+        "total_tenants": (
+            select(func.count(models.TenantAssignment.id))
+            .where(models.TenantAssignment.property_id.in_(owned_properties_ids))
+        ),
+        "total_costs": (
+            select(func.sum(models.Invoice.amount))
+            .where(models.Invoice.property_id.in_(owned_properties_ids))
+        ),
+    }
+
+def tenant_summary_statements(tenant_id: int) -> Dict[str, Any]:
+    """The aggregate queries of a tenant's dashboard, by summary key."""
+    assigned_property_ids = (
+        select(models.TenantAssignment.property_id)
+        .where(models.TenantAssignment.tenant_id == tenant_id)
+    )
+    return {
+        "active_tenancies": (
+            select(func.count(models.TenantAssignment.id))
+            .where(models.TenantAssignment.tenant_id == tenant_id)
+        ),
+        "total_paid": (
+            select(func.sum(models.Invoice.amount))
+            .where(models.Invoice.property_id.in_(assigned_property_ids))
+        ),
+    }
+
+async def _compute_dashboard_summary(db: AsyncSession, current_user: models.User) -> Dict[str, Any]:
     if current_user.role == models.Roles.ADMIN:
-        total_users_result = db.exec(select(func.count(models.User.id))).one_or_none()
-        total_properties_result = db.exec(select(func.count(models.Property.id))).one_or_none()
-        total_invoices_result = db.exec(select(func.count(models.Invoice.id))).one_or_none()
-        
+        total_users_result = (await db.exec(select(func.count(models.User.id)))).one_or_none()
+        total_properties_result = (await db.exec(select(func.count(models.Property.id)))).one_or_none()
+        total_invoices_result = (await db.exec(select(func.count(models.Invoice.id)))).one_or_none()
+
         return {
             "total_users": total_users_result or 0,
             "total_properties": total_properties_result or 0,
@@ -27,49 +55,43 @@ def get_dashboard_summary(
         }
 
     if current_user.role == models.Roles.OWNER:
-        owned_properties_ids = [prop.id for prop in current_user.owned_properties if prop.id is not None]
-        
-        total_tenants = 0
-        if owned_properties_ids:
-            total_tenants_result = db.exec(
-                select(func.count(models.TenantAssignment.id))
-                .where(models.TenantAssignment.property_id.in_(owned_properties_ids))
-            ).one_or_none()
-            total_tenants = total_tenants_result or 0
-
-        total_costs = 0.0
-        if owned_properties_ids:
-            total_costs_result = db.exec(
-                select(func.sum(models.Invoice.amount))
-                .where(models.Invoice.property_id.in_(owned_properties_ids))
-            ).one_or_none()
-            total_costs = total_costs_result or 0.0
-
+        statements = owner_summary_statements(current_user.id)
         return {
-            "total_properties": len(owned_properties_ids),
-            "total_tenants": total_tenants,
-            "total_costs": total_costs,  # <-- ZMIANA Z total_income
+            "total_properties": (await db.exec(statements["total_properties"])).one_or_none() or 0,
+            "total_tenants": (await db.exec(statements["total_tenants"])).one_or_none() or 0,
+            "total_costs": (await db.exec(statements["total_costs"])).one_or_none() or 0.0,  # <-- ZMIANA Z total_income
         }
 
     if current_user.role == models.Roles.TENANT:
-        assignments = db.exec(
-            select(models.TenantAssignment)
-            .where(models.TenantAssignment.tenant_id == current_user.id)
-        ).all()
-
-        property_ids = [a.property_id for a in assignments if a.property_id is not None]
-        
-        total_paid = 0.0
-        if property_ids:
-            total_paid_result = db.exec(
-                select(func.sum(models.Invoice.amount))
-                .where(models.Invoice.property_id.in_(property_ids))
-            ).one_or_none()
-            total_paid = total_paid_result or 0.0
-
+        statements = tenant_summary_statements(current_user.id)
         return {
-            "active_tenancies": len(assignments),
-            "total_paid": total_paid,
+            "active_tenancies": (await db.exec(statements["active_tenancies"])).one_or_none() or 0,
+            "total_paid": (await db.exec(statements["total_paid"])).one_or_none() or 0.0,
         }
-    
-    return {}
\ No newline at end of file
+
+    return {}
+
+@router.get("/summary", response_model=Dict[str, Any])
+async def get_dashboard_summary(
+    # Baza główna, nie replika: podsumowanie trafia do cache, a cache jest czyszczony przy zapisie,
+    # więc odczyt z opóźnionej repliki utrwaliłby nieaktualne dane na DASHBOARD_CACHE_TTL_SECONDS
+    db: AsyncSession = Depends(database.get_async_db),
+    current_user: models.User = Depends(auth.get_current_user)
+):
+    """
+    Dostarcza podsumowanie danych do panelu głównego w zależności od roli użytkownika.
+    Wynik jest cache'owany per użytkownik i rola.
+    """
+    cache_key = (current_user.id, current_user.role)
+    summary = cache.dashboard_summaries.get(cache_key)
+    if summary is None:
+        generation = cache.dashboard_summaries.generation(cache_key)
+        summary = await _compute_dashboard_summary(db, current_user)
+        # Zapis w trakcie liczenia wyczyścił cache - wynik zwracamy, ale go nie zapamiętujemy
+        cache.dashboard_summaries.set(cache_key, summary, generation)
+    return summary
+
+@router.get("/cache/stats", response_model=Dict[str, int])
+def get_dashboard_cache_stats(admin: models.User = Depends(get_admin_user)):
+    """Returns hit/miss counters of the dashboard summary cache (admin only)."""
+    return cache.dashboard_summaries.stats()
@@ -1,44 +1,202 @@
 # backend/app/routers/invoices.py
 
 import os
-import shutil
 from datetime import date
-from typing import List, Dict, Set
+from email.utils import formatdate, parsedate_to_datetime
+from typing import List, Dict, Set, Optional, Literal, Tuple, Union
 from collections import defaultdict
 
 from fastapi import (
-    APIRouter, Depends, HTTPException, status, UploadFile, File, Form, Response
+    APIRouter, Depends, HTTPException, status, UploadFile, File, Form, Response, Query, Request
 )
-from fastapi.responses import FileResponse
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, StreamingResponse
 from pydantic import BaseModel
-from sqlmodel import Session, select
+from sqlmodel import Session, select, or_, and_, func, extract
 
-from app import models, auth, database
+from app import models, auth, database, pagination, cache, storage, invoice_import, invoice_export, invoice_archive, invoice_jobs, jobs, tag_service, access, search, projections
 
 router = APIRouter(prefix="/invoices", tags=["Invoices"])
 
-UPLOAD_DIRECTORY = "/home/admsuliga/Documents/Rental-Management-System/uploads/invoices"
+UPLOAD_DIRECTORY = os.getenv("UPLOAD_DIRECTORY", "/home/admsuliga/Documents/Rental-Management-System/uploads/invoices")
 os.makedirs(UPLOAD_DIRECTORY, exist_ok=True)
 
+# Pliki faktur nie zmieniają się, ale mogą zawierać dane osobowe - tylko cache przeglądarki
+INVOICE_FILE_CACHE_CONTROL = "private, max-age=3600"
+
 # --- FUNKCJA POMOCNICZA DO POBIERANIA FAKTUR Z UPRAWNIENIAMI ---
-def _get_invoices_for_property_with_permission_check(
+def _get_property_with_permission_check(
     property_id: int, db: Session, current_user: models.User
-) -> List[models.Invoice]:
+) -> models.Property:
     """
-    Helper function to get invoices for a specific property after checking permissions.
+    Helper function to get a property after checking that the user may read its invoices.
     """
     db_property = db.get(models.Property, property_id)
     if not db_property:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Property not found")
-    
-    is_admin = current_user.role == models.Roles.ADMIN
-    is_owner = current_user.id == db_property.owner_id
-    is_tenant = any(t.tenant_id == current_user.id for t in db_property.tenants)
 
-    if not (is_admin or is_owner or is_tenant):
+    if not access.can_access_property(db, current_user, property_id):
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not enough permissions")
-    
-    return db_property.invoices
+
+    return db_property
+
+# --- FILTROWANIE I PAGINACJA LISTY FAKTUR ---
+TagMatch = Literal["any", "all"]
+
+class InvoiceFilters(BaseModel):
+    date_from: Optional[date] = None
+    date_to: Optional[date] = None
+    min_amount: Optional[float] = None
+    max_amount: Optional[float] = None
+    tags: Set[str] = set()
+    tag_match: TagMatch = "any"
+
+def get_invoice_filters(
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    min_amount: Optional[float] = None,
+    max_amount: Optional[float] = None,
+    tags: str = Query("", description="Comma-separated tag names"),
+    tag_match: TagMatch = Query("any", description="any: invoices having at least one of the tags, all: having every tag"),
+) -> InvoiceFilters:
+    """Dependency collecting the invoice list filters from the query string."""
+    return InvoiceFilters(
+        date_from=date_from,
+        date_to=date_to,
+        min_amount=min_amount,
+        max_amount=max_amount,
+        tags=tag_service.parse_tag_names(tags),
+        tag_match=tag_match,
+    )
+
+def tagged_invoice_ids(names, match_all: bool):
+    """
+    Ids of the invoices linked to any (or, with match_all, every) tag with one of the names.
+    Driven by ix_invoice_tag_link_tag_id, so a rare tag reads only its own links.
+    """
+    statement = (
+        select(models.InvoiceTagLink.invoice_id)
+        .join(models.Tag, models.Tag.id == models.InvoiceTagLink.tag_id)
+        .where(models.Tag.name.in_(names))
+    )
+    if match_all:
+        statement = statement.group_by(models.InvoiceTagLink.invoice_id).having(
+            func.count(models.InvoiceTagLink.tag_id) == len(names)
+        )
+    return statement
+
+def apply_invoice_filters(statement, filters: InvoiceFilters):
+    """Adds the WHERE clauses for the given filters to an invoice select."""
+    if filters.date_from is not None:
+        statement = statement.where(models.Invoice.issue_date >= filters.date_from)
+    if filters.date_to is not None:
+        statement = statement.where(models.Invoice.issue_date <= filters.date_to)
+    if filters.min_amount is not None:
+        statement = statement.where(models.Invoice.amount >= filters.min_amount)
+    if filters.max_amount is not None:
+        statement = statement.where(models.Invoice.amount <= filters.max_amount)
+    if filters.tags:
+        # Podzapytanie IN liczone raz, od tabeli powiązań po tag_id - skorelowane EXISTS sprawdzało
+        # każdą fakturę nieruchomości, co przy rzadkim tagu oznaczało przejście po wszystkich
+        # (klucz (invoice_id, tag_id) jest unikalny, więc count w HAVING nie liczy tagu dwa razy)
+        statement = statement.where(models.Invoice.id.in_(
+            tagged_invoice_ids(sorted(filters.tags), filters.tag_match == "all")
+        ))
+    return statement
+
+SummaryGranularity = Literal["month", "quarter", "year"]
+
+def _summary_period_key(year: int, month: Optional[int], granularity: SummaryGranularity) -> str:
+    """Formats the summary key of a period: "2024-03", "2024-Q1" or "2024"."""
+    if granularity == "year":
+        return f"{year:04d}"
+    if granularity == "quarter":
+        return f"{year:04d}-Q{(month - 1) // 3 + 1}"
+    return f"{year:04d}-{month:02d}"
+
+def _limit_to_readable_properties(statement, property_id: Optional[int], db: Session, current_user: models.User):
+    """Limits an invoice select to one property (after a permission check) or to every property the user may read."""
+    if property_id is not None:
+        _get_property_with_permission_check(property_id, db, current_user)
+        return statement.where(models.Invoice.property_id == property_id)
+    if current_user.role == models.Roles.ADMIN:
+        return statement
+    return statement.where(models.Invoice.property_id.in_(access.get_property_access(db, current_user.id).all))
+
+def invoice_page_statement(statement, position: Optional[Tuple[date, int]], limit: Optional[int]):
+    """
+    Orders an invoice select by (issue_date, id) descending and keeps the rows after position.
+    One row more than limit is selected, so the caller knows whether another page follows.
+    """
+    if position is not None:
+        last_date, last_id = position
+        statement = statement.where(or_(
+            models.Invoice.issue_date < last_date,
+            and_(models.Invoice.issue_date == last_date, models.Invoice.id < last_id),
+        ))
+
+    statement = statement.order_by(models.Invoice.issue_date.desc(), models.Invoice.id.desc())
+    if limit is not None:
+        statement = statement.limit(limit + 1)
+    return statement
+
+def my_invoices_statement(tenant_id: int):
+    """An invoice_select() of the invoices of every property the tenant is assigned to."""
+    property_ids = (
+        select(models.TenantAssignment.property_id)
+        .where(models.TenantAssignment.tenant_id == tenant_id)
+    )
+    return projections.invoice_select().where(models.Invoice.property_id.in_(property_ids))
+
+def property_tags_statement(property_id: int):
+    """Distinct names of the tags used by the invoices of a property, alphabetically."""
+    return (
+        select(models.Tag.name)
+        .join(models.InvoiceTagLink, models.InvoiceTagLink.tag_id == models.Tag.id)
+        .join(models.Invoice, models.Invoice.id == models.InvoiceTagLink.invoice_id)
+        .where(models.Invoice.property_id == property_id)
+        .distinct()
+        .order_by(models.Tag.name)
+    )
+
+def monthly_summary_statement(
+    property_id: int, granularity: SummaryGranularity, by_tag: bool, filters: InvoiceFilters
+):
+    """
+    Invoice totals of a property grouped by year (and month unless granularity is year),
+    plus the tag name with by_tag; rows are (year, [month,] [tag,] total).
+    """
+    year_col = extract("year", models.Invoice.issue_date)
+    month_col = extract("month", models.Invoice.issue_date)
+    group_cols = [year_col] if granularity == "year" else [year_col, month_col]
+    if by_tag:
+        group_cols.append(models.Tag.name)
+
+    statement = select(*group_cols, func.sum(models.Invoice.amount)).where(models.Invoice.property_id == property_id)
+    if by_tag:
+        statement = (
+            statement
+            .join(models.InvoiceTagLink, models.InvoiceTagLink.invoice_id == models.Invoice.id)
+            .join(models.Tag, models.Tag.id == models.InvoiceTagLink.tag_id)
+        )
+    return apply_invoice_filters(statement, filters).group_by(*group_cols)
+
+def _paginate_invoices(
+    statement, db: Session, response: Response, cursor: Optional[str], limit: Optional[int]
+) -> List[models.InvoiceRead]:
+    """
+    Runs a projections.invoice_select() statement as a keyset page ordered by (issue_date, id) descending.
+    The cursor of the following page is returned in the X-Next-Cursor header.
+    Without a limit every remaining invoice is returned and no cursor is sent.
+    """
+    statement = invoice_page_statement(statement, pagination.decode_cursor(cursor), limit)
+    invoices = projections.build(models.InvoiceRead, db.exec(statement).all())
+
+    if limit is not None and len(invoices) > limit:
+        invoices = invoices[:limit]
+        last = invoices[-1]
+        response.headers[pagination.NEXT_CURSOR_HEADER] = pagination.encode_cursor(last.issue_date, last.id)
+    return projections.attach_invoice_relations(db, invoices)
 
 # --- ZAKTUALIZOWANE ENDPOINTY ---
 
@@ -53,17 +211,15 @@ async def upload_invoice(
     db: Session = Depends(database.get_db),
     current_user: models.User = Depends(auth.get_current_user)
 ):
-    """Sends new invoice, assigns it to a property, and links tags"""
-    db_property = db.get(models.Property, property_id)
-    if not db_property:
-        raise HTTPException(status_code=404, detail="Property not found")
-    
-    if not (current_user.role == models.Roles.ADMIN or current_user.id == db_property.owner_id):
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not enough permissions")
-    
-    file_path = os.path.join(UPLOAD_DIRECTORY, f"{property_id}_{file.filename}")
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+    """
+    Sends new invoice, assigns it to a property, and links tags.
+    The file is streamed to a temporary file and moved into UPLOAD_DIRECTORY only after the row commits.
+    Checksum verification and PDF inspection are queued as background jobs (see GET /jobs/invoice/{invoice_id}).
+    """
+    await run_in_threadpool(_check_upload_permission, property_id, db, current_user)
+
+    staged = await storage.stage_upload(file, UPLOAD_DIRECTORY)
+    file_path = storage.blob_path(UPLOAD_DIRECTORY, staged.sha256)
 
     new_invoice = models.Invoice(
         amount=amount,
@@ -71,29 +227,84 @@ async def upload_invoice(
         description=description,
         file_path=file_path,
         property_id=property_id,
-        uploader_id=current_user.id
+        uploader_id=current_user.id,
+        checksum=staged.sha256,
+        file_size=staged.size,
+        file_name=os.path.basename(file.filename or "invoice.pdf"),
     )
+    tag_names = tag_service.parse_tag_names(tags)
+
+    try:
+        new_invoice = await run_in_threadpool(_save_uploaded_invoice, db, new_invoice, tag_names)
+    except BaseException:
+        await staged.discard()
+        raise
+
+    try:
+        await staged.publish_blob(file_path)
+    except OSError:
+        await staged.discard()
+        await run_in_threadpool(_delete_invoice, db, new_invoice)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Could not store the invoice file")
+
+    cache.invalidate_dashboard_cache()
+    jobs.notify()
+    return new_invoice
+
+def _check_upload_permission(property_id: int, db: Session, current_user: models.User) -> None:
+    db_property = db.get(models.Property, property_id)
+    if not db_property:
+        raise HTTPException(status_code=404, detail="Property not found")
 
-    tag_names = {tag.strip().lower() for tag in tags.split(",") if tag.strip()}
-    if tag_names:
-        existing_tags_stmt = select(models.Tag).where(models.Tag.name.in_(tag_names))
-        existing_tags = db.exec(existing_tags_stmt).all()
-        existing_tags_map = {tag.name: tag for tag in existing_tags}
-        
-        new_invoice.tags.extend(existing_tags)
-        new_tag_names = tag_names - set(existing_tags_map.keys())
-        
-        for tag_name in new_tag_names:
-            new_tag = models.Tag(name=tag_name)
-            db.add(new_tag)
-            new_invoice.tags.append(new_tag)
+    if not (current_user.role == models.Roles.ADMIN or current_user.id == db_property.owner_id):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not enough permissions")
 
+def _save_uploaded_invoice(db: Session, new_invoice: models.Invoice, tag_names: Set[str]) -> models.Invoice:
+    storage.acquire_blob(db, new_invoice.checksum, new_invoice.file_size, new_invoice.file_path)
     db.add(new_invoice)
+    db.flush()
+    tag_service.set_invoice_tags(db, new_invoice.id, tag_names, replace=False)
+    invoice_jobs.enqueue_for_invoices(db, [new_invoice.id])
     db.commit()
     db.refresh(new_invoice)
-    
+    # Relacje serializowane w odpowiedzi ładujemy tutaj, a nie w pętli zdarzeń
+    db.refresh(new_invoice, ["tags", "property"])
     return new_invoice
 
+def _delete_invoice(db: Session, invoice: models.Invoice) -> None:
+    """Deletes an invoice; its file is removed only when no other invoice references it."""
+    paths_to_remove = storage.release_files(db, [(invoice.checksum, invoice.file_path)])
+    db.delete(invoice)
+    db.commit()
+    storage.remove_files(paths_to_remove)
+
+@router.post("/import", response_model=invoice_import.ImportReport)
+async def import_invoices(
+    manifest: UploadFile = File(..., description="CSV or JSON manifest: property_id, issue_date, description, amount, tags, file"),
+    archive: UploadFile = File(..., description="ZIP archive with the files named in the manifest"),
+    db: Session = Depends(database.get_db),
+    current_user: models.User = Depends(auth.get_current_user)
+):
+    """
+    Imports many invoices at once (admin or property owner).
+    Returns a per-row report; rows that fail do not stop the rest of the import.
+    """
+    if current_user.role not in (models.Roles.ADMIN, models.Roles.OWNER):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not enough permissions")
+
+    raw_rows = invoice_import.parse_manifest(await manifest.read(), manifest.filename or "")
+    staged_archive = await storage.stage_upload(archive, UPLOAD_DIRECTORY, max_bytes=invoice_import.MAX_IMPORT_ARCHIVE_BYTES)
+    try:
+        report = await run_in_threadpool(
+            invoice_import.run_import, db, raw_rows, staged_archive.temp_path, current_user, UPLOAD_DIRECTORY
+        )
+    finally:
+        await staged_archive.discard()
+
+    cache.invalidate_dashboard_cache()
+    jobs.notify()
+    return report
+
 # --- NOWY ENDPOINT I MODEL DO EDYCJI TAGÓW ---
 class TagsUpdateRequest(BaseModel):
     tags: str # Tagi jako string oddzielony przecinkami
@@ -117,38 +328,57 @@ def update_invoice_tags(
     if not (current_user.role == models.Roles.ADMIN or current_user.id == invoice.property.owner_id):
         raise HTTPException(status_code=403, detail="Not enough permissions")
 
-    # Wyczyść stare tagi
-    invoice.tags.clear()
-
-    # Logika dodawania nowych tagów (taka sama jak przy tworzeniu)
-    tag_names = {tag.strip().lower() for tag in request.tags.split(",") if tag.strip()}
-    if tag_names:
-        existing_tags_stmt = select(models.Tag).where(models.Tag.name.in_(tag_names))
-        existing_tags = db.exec(existing_tags_stmt).all()
-        existing_tags_map = {tag.name: tag for tag in existing_tags}
-        
-        invoice.tags.extend(existing_tags)
-        new_tag_names = tag_names - set(existing_tags_map.keys())
-        
-        for tag_name in new_tag_names:
-            new_tag = models.Tag(name=tag_name)
-            db.add(new_tag)
-            invoice.tags.append(new_tag)
-    
-    db.add(invoice)
+    # Zastąp stare tagi nowymi (stała liczba zapytań niezależnie od liczby tagów)
+    tag_service.set_invoice_tags(db, invoice.id, tag_service.parse_tag_names(request.tags))
     db.commit()
+    cache.invalidate_dashboard_cache()
     db.refresh(invoice)
     
     return invoice
 # -----------------------------------------------
 
+def _file_validators(invoice: models.Invoice, stat_result: os.stat_result) -> Dict[str, str]:
+    """
+    Builds the caching headers of an invoice file. The ETag is strong: the SHA-256 of the content
+    when it is known, otherwise derived from the file's mtime and size.
+    """
+    if invoice.checksum:
+        etag = f'"{invoice.checksum}"'
+    else:
+        etag = f'"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"'
+    return {
+        "ETag": etag,
+        "Last-Modified": formatdate(stat_result.st_mtime, usegmt=True),
+        "Cache-Control": INVOICE_FILE_CACHE_CONTROL,
+    }
+
+def _is_not_modified(request: Request, etag: str, mtime: float) -> bool:
+    """Evaluates If-None-Match (preferred) or If-Modified-Since as described in RFC 9110."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in candidates or etag in candidates
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        return int(mtime) <= since.timestamp()
+    return False
+
 @router.get("/view/{invoice_id}")
 def view_invoice_pdf(
     invoice_id: int,
+    request: Request,
     db: Session = Depends(database.get_db),
     current_user: models.User = Depends(auth.get_current_user)
 ):
-    """Serves an invoice PDF file for inline viewing with permission checks."""
+    """
+    Serves an invoice PDF file for inline viewing with permission checks.
+    Supports ETag/Last-Modified revalidation (304) and byte ranges (206) so viewers can fetch pages incrementally.
+    """
     invoice = db.get(models.Invoice, invoice_id)
     if not invoice:
         raise HTTPException(status_code=404, detail="Invoice not found")
@@ -157,67 +387,173 @@ def view_invoice_pdf(
         raise HTTPException(status_code=500, detail="Invoice is not linked to a property")
 
     # Sprawdzenie uprawnień (admin, właściciel lub przypisany najemca)
-    is_admin = current_user.role == models.Roles.ADMIN
-    is_owner = current_user.id == invoice.property.owner_id
-    is_tenant = any(t.tenant_id == current_user.id for t in invoice.property.tenants)
-
-    if not (is_admin or is_owner or is_tenant):
+    if not access.can_access_property(db, current_user, invoice.property_id):
         raise HTTPException(status_code=403, detail="Not enough permissions to view this file")
 
     file_path = invoice.file_path
-    if not file_path or not os.path.exists(file_path):
+    try:
+        stat_result = os.stat(file_path) if file_path else None
+    except FileNotFoundError:
+        stat_result = None
+    if stat_result is None:
         raise HTTPException(status_code=404, detail="File not found")
 
-    # Używamy FileResponse z nagłówkiem "inline"
+    validators = _file_validators(invoice, stat_result)
+    if _is_not_modified(request, validators["ETag"], stat_result.st_mtime):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=validators)
+
+    # Używamy FileResponse z nagłówkiem "inline"; obsługę Range/If-Range zapewnia sam FileResponse
     return FileResponse(
         path=file_path,
         media_type='application/pdf',
-        headers={"Content-Disposition": f"inline; filename={os.path.basename(file_path)}"}
+        stat_result=stat_result,
+        headers={
+            **validators,
+            "Content-Disposition": f"inline; filename={invoice.file_name or os.path.basename(file_path)}",
+        }
     )
 
 @router.get("/my", response_model=List[models.InvoiceRead])
 def get_my_invoices(
-    db: Session = Depends(database.get_db),
+    response: Response,
+    filters: InvoiceFilters = Depends(get_invoice_filters),
+    cursor: Optional[str] = None,
+    # Bez limitu pełna lista, jak przed stronicowaniem - dotychczasowi klienci nie czytają X-Next-Cursor
+    limit: Optional[int] = Query(None, ge=1, le=pagination.MAX_PAGE_SIZE, description="Page size; without it every invoice is returned"),
+    db: Session = Depends(database.get_read_db),
     current_user: models.User = Depends(auth.get_current_user)
 ):
-    """Gets invoices for the current tenant user."""
+    """Gets the invoices of the current tenant user, newest first; one page at a time when limit is given."""
     if current_user.role != models.Roles.TENANT:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="This endpoint is for tenants only")
-    
-    assignments_stmt = select(models.TenantAssignment).where(models.TenantAssignment.tenant_id == current_user.id)
-    assignments = db.exec(assignments_stmt).all()
-    if not assignments:
-        return []
-    
-    property_ids = [a.property_id for a in assignments if a.property_id is not None]
-    
-    invoices_stmt = select(models.Invoice).where(models.Invoice.property_id.in_(property_ids))
-    invoices = db.exec(invoices_stmt).all()
-    return sorted(invoices, key=lambda inv: inv.issue_date, reverse=True)
+
+    invoices_stmt = apply_invoice_filters(my_invoices_statement(current_user.id), filters)
+    return _paginate_invoices(invoices_stmt, db, response, cursor, limit)
 
 @router.get("/property/{property_id}", response_model=List[models.InvoiceRead])
 def get_invoices_for_property(
     property_id: int,
-    db: Session = Depends(database.get_db),
+    response: Response,
+    filters: InvoiceFilters = Depends(get_invoice_filters),
+    cursor: Optional[str] = None,
+    # Bez limitu pełna lista, jak przed stronicowaniem - dotychczasowi klienci nie czytają X-Next-Cursor
+    limit: Optional[int] = Query(None, ge=1, le=pagination.MAX_PAGE_SIZE, description="Page size; without it every invoice is returned"),
+    db: Session = Depends(database.get_read_db),
     current_user: models.User = Depends(auth.get_current_user)
 ):
-    """Gets invoices for a specific property with permission checks."""
-    invoices = _get_invoices_for_property_with_permission_check(property_id, db, current_user)
-    return sorted(invoices, key=lambda inv: inv.issue_date, reverse=True)
+    """Gets the invoices of a specific property with permission checks, newest first; one page at a time when limit is given."""
+    _get_property_with_permission_check(property_id, db, current_user)
+    invoices_stmt = projections.invoice_select().where(models.Invoice.property_id == property_id)
+    invoices_stmt = apply_invoice_filters(invoices_stmt, filters)
+    return _paginate_invoices(invoices_stmt, db, response, cursor, limit)
+
+@router.get("/search", response_model=List[models.InvoiceRead])
+def search_invoices(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200, description="Words to find in descriptions, tag names and property names"),
+    property_id: Optional[int] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(pagination.DEFAULT_PAGE_SIZE, ge=1, le=pagination.MAX_PAGE_SIZE),
+    db: Session = Depends(database.get_read_db),
+    current_user: models.User = Depends(auth.get_current_user)
+):
+    """
+    Full-text search over the invoices the user may read. Every word must match (prefixes count).
+    Matches are ranked best first within blocks of the newest SEARCH_RANK_WINDOW matches, newest block first,
+    and paging with the cursor from X-Next-Cursor walks through every match.
+    """
+    if property_id is not None:
+        _get_property_with_permission_check(property_id, db, current_user)
+        property_ids = {property_id}
+    elif current_user.role == models.Roles.ADMIN:
+        property_ids = None
+    else:
+        property_ids = access.get_property_access(db, current_user.id).all
+
+    hits = search.search_invoice_ids(db, q, property_ids, pagination.decode_rank_cursor(cursor), limit + 1)
+    if len(hits) > limit:
+        hits = hits[:limit]
+        invoice_id, rank, block = hits[-1]
+        response.headers[pagination.NEXT_CURSOR_HEADER] = pagination.encode_rank_cursor(rank, invoice_id, block)
+    if not hits:
+        return []
+
+    invoice_ids = [invoice_id for invoice_id, _, _ in hits]
+    invoices = projections.read_invoices(db, projections.invoice_select().where(models.Invoice.id.in_(invoice_ids)))
+    by_id = {invoice.id: invoice for invoice in invoices}
+    return [by_id[invoice_id] for invoice_id in invoice_ids if invoice_id in by_id]
+
+@router.get("/tagged", response_model=List[models.InvoiceRead])
+def get_invoices_by_tags(
+    response: Response,
+    filters: InvoiceFilters = Depends(get_invoice_filters),
+    property_id: Optional[int] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(pagination.DEFAULT_PAGE_SIZE, ge=1, le=pagination.MAX_PAGE_SIZE),
+    db: Session = Depends(database.get_read_db),
+    current_user: models.User = Depends(auth.get_current_user)
+):
+    """
+    Gets a page of invoices having all (tag_match=all) or any (tag_match=any) of the given tags, newest first.
+    Searches one property when property_id is given, otherwise every property the user may read.
+    """
+    if not filters.tags:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="At least one tag is required")
+
+    invoices_stmt = _limit_to_readable_properties(projections.invoice_select(), property_id, db, current_user)
+    invoices_stmt = apply_invoice_filters(invoices_stmt, filters)
+    return _paginate_invoices(invoices_stmt, db, response, cursor, limit)
+
+@router.get("/export")
+def export_invoices(
+    filters: InvoiceFilters = Depends(get_invoice_filters),
+    property_id: Optional[int] = None,
+    export_format: invoice_export.ExportFormat = Query("csv", alias="format"),
+    db: Session = Depends(database.get_read_db),
+    current_user: models.User = Depends(auth.get_current_user)
+):
+    """
+    Streams the invoices matching the filters as CSV or JSON lines, oldest first.
+    Exports one property when property_id is given, otherwise every property the user may read.
+    """
+    statement = _limit_to_readable_properties(invoice_export.export_statement(), property_id, db, current_user)
+    statement = apply_invoice_filters(statement, filters)
+    filename = f"invoices-{date.today().isoformat()}.{export_format}"
+    return StreamingResponse(
+        invoice_export.iter_export(statement, export_format),
+        media_type=invoice_export.MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f"attachment; filename={filename}"},
+    )
+
+@router.get("/archive")
+def download_invoice_archive(
+    filters: InvoiceFilters = Depends(get_invoice_filters),
+    property_id: Optional[int] = None,
+    db: Session = Depends(database.get_read_db),
+    current_user: models.User = Depends(auth.get_current_user)
+):
+    """
+    Streams a ZIP archive with the files of the invoices matching the filters, one folder per property.
+    Covers one property when property_id is given, otherwise every property the user may read.
+    """
+    statement = _limit_to_readable_properties(invoice_archive.archive_statement(), property_id, db, current_user)
+    statement = apply_invoice_filters(statement, filters)
+    filename = f"invoices-{property_id or 'all'}-{date.today().isoformat()}.zip"
+    return StreamingResponse(
+        invoice_archive.iter_archive(statement),
+        media_type="application/zip",
+        headers={"Content-Disposition": f"attachment; filename={filename}"},
+    )
 
 @router.get("/tags/property/{property_id}", response_model=List[str])
 def get_tags_for_property(
     property_id: int,
-    db: Session = Depends(database.get_db),
+    db: Session = Depends(database.get_read_db),
     current_user: models.User = Depends(auth.get_current_user)
 ):
     """Returns a list of all unique tags for a given property."""
-    invoices = _get_invoices_for_property_with_permission_check(property_id, db, current_user)
-    tags: Set[str] = set()
-    for invoice in invoices:
-        for tag in invoice.tags:
-            tags.add(tag.name)
-    return sorted(list(tags))
+    _get_property_with_permission_check(property_id, db, current_user)
+    return db.exec(property_tags_statement(property_id)).all()
 
 @router.delete("/{invoice_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_invoice(
@@ -239,25 +575,42 @@ def delete_invoice(
     if not (is_admin or is_owner):
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not enough permissions")
 
-    if invoice.file_path and os.path.exists(invoice.file_path):
-        os.remove(invoice.file_path)
-
-    db.delete(invoice)
-    db.commit()
+    _delete_invoice(db, invoice)
+    cache.invalidate_dashboard_cache()
     return Response(status_code=status.HTTP_204_NO_CONTENT)
 
-@router.get("/summary/monthly/{property_id}", response_model=Dict[str, float])
+@router.get("/summary/monthly/{property_id}", response_model=Dict[str, Union[float, Dict[str, float]]])
 def get_monthly_summary_for_property(
     property_id: int,
-    db: Session = Depends(database.get_db),
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    granularity: SummaryGranularity = "month",
+    by_tag: bool = False,
+    db: Session = Depends(database.get_read_db),
     current_user: models.User = Depends(auth.get_current_user)
 ):
-    """Returns a monthly summary of invoice amounts for a specific property."""
-    invoices = _get_invoices_for_property_with_permission_check(property_id, db, current_user)
-    summary = defaultdict(float)
+    """
+    Returns a summary of invoice amounts for a specific property, grouped by month, quarter or year.
+    With by_tag the total of each period is broken down by tag name; untagged invoices are left out
+    of that breakdown and an invoice with several tags is counted under each of them.
+    """
+    _get_property_with_permission_check(property_id, db, current_user)
 
-    for inv in invoices:
-        month_key = inv.issue_date.strftime("%Y-%m")
-        summary[month_key] += inv.amount
+    statement = monthly_summary_statement(
+        property_id, granularity, by_tag, InvoiceFilters(date_from=date_from, date_to=date_to)
+    )
 
-    return dict(sorted(summary.items(), reverse=True))
\ No newline at end of file
+    # Grupy miesięczne sumujemy do kwartałów po stronie Pythona - to najwyżej 12 wierszy na rok
+    summary = defaultdict(float)
+    tag_summary = defaultdict(lambda: defaultdict(float))
+    for row in db.exec(statement).all():
+        year, month = int(row[0]), (int(row[1]) if granularity != "year" else None)
+        key = _summary_period_key(year, month, granularity)
+        if by_tag:
+            tag_summary[key][row[-2]] += row[-1]
+        else:
+            summary[key] += row[-1]
+
+    if by_tag:
+        return {key: dict(sorted(tags.items())) for key, tags in sorted(tag_summary.items(), reverse=True)}
+    return dict(sorted(summary.items(), reverse=True))
@@ -0,0 +1,75 @@
+# backend/app/routers/jobs.py
+
+from typing import Dict, List
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlmodel import Session
+
+from app import models, auth, database, access, jobs
+
+from .users import get_admin_user
+
+router = APIRouter(prefix="/jobs", tags=["Jobs"])
+
+def _check_invoice_access(invoice_id: int, db: Session, current_user: models.User) -> None:
+    invoice = db.get(models.Invoice, invoice_id)
+    if not invoice:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Invoice not found")
+    if not access.can_access_property(db, current_user, invoice.property_id):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not enough permissions")
+
+@router.get("/stats", response_model=Dict[str, int])
+def get_job_stats(
+    db: Session = Depends(database.get_db),
+    admin: models.User = Depends(get_admin_user)
+):
+    """Returns the number of jobs in each status (admin only)."""
+    return jobs.stats(db)
+
+@router.get("/invoice/{invoice_id}", response_model=List[models.JobRead])
+def get_jobs_for_invoice(
+    invoice_id: int,
+    db: Session = Depends(database.get_db),
+    current_user: models.User = Depends(auth.get_current_user)
+):
+    """Lists the background jobs of an invoice, for anyone who may read the invoice."""
+    _check_invoice_access(invoice_id, db, current_user)
+    return db.exec(jobs.invoice_jobs_statement(invoice_id)).all()
+
+@router.get("/{job_id}", response_model=models.JobRead)
+def get_job(
+    job_id: int,
+    db: Session = Depends(database.get_db),
+    current_user: models.User = Depends(auth.get_current_user)
+):
+    """Returns the status of a job; jobs of an invoice are visible to anyone who may read the invoice."""
+    job = db.get(models.Job, job_id)
+    if not job:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    if current_user.role != models.Roles.ADMIN:
+        if job.invoice_id is None:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not enough permissions")
+        _check_invoice_access(job.invoice_id, db, current_user)
+    return job
+
+@router.post("/{job_id}/retry", response_model=models.JobRead)
+def retry_job(
+    job_id: int,
+    db: Session = Depends(database.get_db),
+    admin: models.User = Depends(get_admin_user)
+):
+    """Puts a failed job back into the queue with a fresh attempt budget (admin only)."""
+    job = db.get(models.Job, job_id)
+    if not job:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    if job.status != models.JobStatus.FAILED:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Only failed jobs can be retried")
+
+    job.status = models.JobStatus.QUEUED
+    job.attempts = 0
+    job.run_after = job.updated_at = jobs.utcnow()
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    jobs.notify()
+    return job
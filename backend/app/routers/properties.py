@@ -1,28 +1,39 @@
 # backend/app/routers/properties.py
 
 from fastapi import APIRouter, Depends, HTTPException, status, Response
+from sqlalchemy import delete
+from sqlalchemy.orm import selectinload
 from sqlmodel import Session, select
 from typing import List
-from app import models, auth, database
+from app import models, auth, database, cache, storage, access
 
 # Importujemy zależność admina z routera użytkowników
 from .users import get_admin_user
 
 router = APIRouter(prefix="/properties", tags=["Properties"])
 
+# PropertyReadWithDetails serializuje właściciela, przypisania i najemców - ładujemy je zbiorczo
+# (jedno zapytanie IN na relację), zamiast leniwie dla każdego wiersza
+PROPERTY_DETAILS_OPTIONS = (
+    selectinload(models.Property.owner),
+    selectinload(models.Property.tenants).selectinload(models.TenantAssignment.tenant),
+)
+
 @router.get("/", response_model=List[models.PropertyReadWithDetails])
 def get_properties(
-    db: Session = Depends(database.get_db),
+    db: Session = Depends(database.get_read_db),
     current_user: models.User = Depends(auth.get_current_user)
 ):
     """
     Gets a list of all properties for an admin, or a list of owned properties for an owner.
     """
+    statement = select(models.Property).options(*PROPERTY_DETAILS_OPTIONS).order_by(models.Property.id)
+
     if current_user.role == models.Roles.ADMIN:
-        return db.exec(select(models.Property)).all()
+        return db.exec(statement).all()
     
     if current_user.role == models.Roles.OWNER:
-        return current_user.owned_properties
+        return db.exec(statement.where(models.Property.owner_id == current_user.id)).all()
     
     # Tenants and other roles are denied access
     raise HTTPException(
@@ -33,22 +44,18 @@ def get_properties(
 @router.get("/{property_id}", response_model=models.PropertyReadWithDetails)
 def get_property(
     property_id: int,
-    db: Session = Depends(database.get_db),
+    db: Session = Depends(database.get_read_db),
     current_user: models.User = Depends(auth.get_current_user)
 ):
     """
     Retrieves a single property.
     Access is granted to the property's owner, assigned tenants, and admins.
     """
-    db_property = db.get(models.Property, property_id)
+    db_property = db.get(models.Property, property_id, options=PROPERTY_DETAILS_OPTIONS)
     if not db_property:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Property not found")
 
-    is_admin = current_user.role == models.Roles.ADMIN
-    is_owner = current_user.id == db_property.owner_id
-    is_tenant = any(assignment.tenant_id == current_user.id for assignment in db_property.tenants)
-
-    if not (is_admin or is_owner or is_tenant):
+    if not access.can_access_property(db, current_user, property_id):
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="You do not have permission to view this property")
     
     return db_property
@@ -68,6 +75,8 @@ def add_property(
     new_property = models.Property.model_validate(property_create)
     db.add(new_property)
     db.commit()
+    access.invalidate_user(new_property.owner_id)
+    cache.invalidate_dashboard_cache()
     db.refresh(new_property)
     return new_property
 
@@ -82,12 +91,15 @@ def update_property(
     if not db_property:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Property not found")
 
+    previous_owner_id = db_property.owner_id
     update_data = property_update.model_dump(exclude_unset=True)
     for key, value in update_data.items():
         setattr(db_property, key, value)
     
     db.add(db_property)
     db.commit()
+    access.invalidate_user(previous_owner_id, db_property.owner_id)
+    cache.invalidate_dashboard_cache()
     db.refresh(db_property)
     return db_property
 
@@ -100,7 +112,19 @@ def remove_property(
     property_to_delete = db.get(models.Property, property_id)
     if not property_to_delete:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Property not found")
-        
+
+    # Faktury nieruchomości usuwamy razem z nią; pliki znikają dopiero, gdy nie odwołuje się do nich żadna inna faktura
+    invoice_ids = select(models.Invoice.id).where(models.Invoice.property_id == property_id)
+    invoice_files = db.exec(
+        select(models.Invoice.checksum, models.Invoice.file_path).where(models.Invoice.property_id == property_id)
+    ).all()
+    paths_to_remove = storage.release_files(db, invoice_files)
+    db.exec(delete(models.InvoiceTagLink).where(models.InvoiceTagLink.invoice_id.in_(invoice_ids)))
+    db.exec(delete(models.Invoice).where(models.Invoice.property_id == property_id))
+
     db.delete(property_to_delete)
     db.commit()
+    storage.remove_files(paths_to_remove)
+    access.invalidate_all()
+    cache.invalidate_dashboard_cache()
     return Response(status_code=status.HTTP_204_NO_CONTENT)
\ No newline at end of file
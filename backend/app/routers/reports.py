@@ -0,0 +1,122 @@
+# backend/app/routers/reports.py
+
+from typing import List, Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from pydantic import BaseModel
+from sqlmodel import Session, select, func, extract
+
+from app import models, auth, database, access
+
+from .invoices import InvoiceFilters, get_invoice_filters, apply_invoice_filters
+
+router = APIRouter(prefix="/reports", tags=["Reports"])
+
+ReportDimension = Literal["property", "year", "month", "tag"]
+
+class CostReportRow(BaseModel):
+    property_id: Optional[int] = None
+    property_name: Optional[str] = None
+    period: Optional[str] = None # "2024" (year) or "2024-03" (month)
+    tag: Optional[str] = None # None groups untagged invoices
+    total: float
+    count: int
+    average: float
+
+class CostReport(BaseModel):
+    group_by: List[ReportDimension]
+    total: float
+    count: int
+    rows: List[CostReportRow]
+
+def _report_scope(statement, db: Session, current_user: models.User, property_ids: Optional[List[int]]):
+    """Limits an invoice select to the requested properties, or to every property the user may read."""
+    if current_user.role == models.Roles.ADMIN:
+        if property_ids:
+            statement = statement.where(models.Invoice.property_id.in_(property_ids))
+        return statement
+
+    accessible = access.get_property_access(db, current_user.id).all
+    if property_ids:
+        if not set(property_ids) <= accessible:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not enough permissions")
+        accessible = set(property_ids)
+    return statement.where(models.Invoice.property_id.in_(accessible))
+
+def cost_report_statement(dimensions: List[ReportDimension]):
+    """
+    Invoice total and count grouped by the given dimensions, in their order; rows are
+    (group columns..., total, count). Scope and filters are added by the caller.
+    """
+    year_col = extract("year", models.Invoice.issue_date).label("year")
+    month_col = extract("month", models.Invoice.issue_date).label("month")
+
+    group_cols = []
+    if "property" in dimensions:
+        group_cols += [models.Invoice.property_id, models.Property.name]
+    if "year" in dimensions or "month" in dimensions:
+        group_cols.append(year_col)
+    if "month" in dimensions:
+        group_cols.append(month_col)
+    if "tag" in dimensions:
+        group_cols.append(models.Tag.name)
+
+    statement = select(
+        *group_cols,
+        func.sum(models.Invoice.amount),
+        func.count(models.Invoice.id),
+    )
+    if "property" in dimensions:
+        statement = statement.join(models.Property, models.Property.id == models.Invoice.property_id)
+    if "tag" in dimensions:
+        statement = (
+            statement
+            .outerjoin(models.InvoiceTagLink, models.InvoiceTagLink.invoice_id == models.Invoice.id)
+            .outerjoin(models.Tag, models.Tag.id == models.InvoiceTagLink.tag_id)
+        )
+    if group_cols:
+        statement = statement.group_by(*group_cols).order_by(*group_cols)
+    return statement
+
+@router.get("/costs", response_model=CostReport)
+def get_cost_report(
+    group_by: List[ReportDimension] = Query(["property", "month"], description="Any combination of property, year, month and tag"),
+    property_id: Optional[List[int]] = Query(None, description="Limit the report to these properties (repeat the parameter)"),
+    filters: InvoiceFilters = Depends(get_invoice_filters),
+    db: Session = Depends(database.get_read_db),
+    current_user: models.User = Depends(auth.get_current_user)
+):
+    """
+    Aggregates invoice costs across all properties the user can access (admin: all properties)
+    with one grouped query. Each row has the total, count and average amount of its group.
+    Grouping by tag counts an invoice under each of its tags; untagged invoices form a row with tag null.
+    """
+    dimensions = list(dict.fromkeys(group_by)) # kolejność z zapytania, bez duplikatów
+    statement = apply_invoice_filters(_report_scope(cost_report_statement(dimensions), db, current_user, property_id), filters)
+
+    rows = []
+    for values in db.exec(statement).all():
+        values = list(values)
+        total, count = values.pop(-2) or 0.0, values.pop(-1)
+        if not count:
+            continue
+        row = CostReportRow(total=total, count=count, average=total / count)
+        if "property" in dimensions:
+            row.property_id, row.property_name = values.pop(0), values.pop(0)
+        if "year" in dimensions or "month" in dimensions:
+            year = int(values.pop(0))
+            row.period = f"{year:04d}-{int(values.pop(0)):02d}" if "month" in dimensions else f"{year:04d}"
+        if "tag" in dimensions:
+            row.tag = values.pop(0)
+        rows.append(row)
+
+    if "tag" in dimensions:
+        # Faktura z kilkoma tagami występuje w kilku wierszach - suma całkowita liczona osobno
+        totals_stmt = select(func.sum(models.Invoice.amount), func.count(models.Invoice.id))
+        totals_stmt = apply_invoice_filters(_report_scope(totals_stmt, db, current_user, property_id), filters)
+        total, count = db.exec(totals_stmt).one()
+        total = total or 0.0
+    else:
+        total, count = sum(row.total for row in rows), sum(row.count for row in rows)
+
+    return CostReport(group_by=dimensions, total=total, count=count, rows=rows)
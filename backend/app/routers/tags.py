@@ -1,24 +1,25 @@
 # backend/app/routers/tags.py
 
 from fastapi import APIRouter, Depends, HTTPException, status, Response
-from sqlmodel import Session, select
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 from typing import List
-from app import models, database, auth
+from app import models, database, auth, projections, tag_service
 
 # Import zależności admina
 from .users import get_admin_user
 
 router = APIRouter(prefix="/tags", tags=["Tags"])
 
-@router.get("/", response_model=List[models.Tag])
-def get_all_tags(
-    db: Session = Depends(database.get_db),
+@router.get("/", response_model=List[models.TagRead])
+async def get_all_tags(
+    db: AsyncSession = Depends(database.get_async_read_db),
     # Dostęp może mieć każdy zalogowany użytkownik, aby pobrać listę
     current_user: models.User = Depends(auth.get_current_user)
 ):
     """Gets a list of all tags."""
-    tags = db.exec(select(models.Tag).order_by(models.Tag.name)).all()
-    return tags
+    statement = projections.select_for(models.TagRead, models.Tag).order_by(models.Tag.name)
+    return projections.build(models.TagRead, (await db.exec(statement)).all())
 
 @router.delete("/{tag_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_tag(
@@ -32,6 +33,8 @@ def delete_tag(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Tag not found")
     
     # SQLModel automatycznie usunie powiązania z tabeli `InvoiceTagLink`
+    tag_name = tag_to_delete.name
     db.delete(tag_to_delete)
     db.commit()
+    tag_service.forget_tag(tag_name)
     return Response(status_code=status.HTTP_204_NO_CONTENT)
\ No newline at end of file
@@ -1,9 +1,10 @@
 # backend/app/routers/users.py
 
 from fastapi import APIRouter, Depends, HTTPException, status, Response
-from sqlmodel import Session, select
+from fastapi.concurrency import run_in_threadpool
+from sqlmodel import Session
 from typing import List
-from app import models, auth, database
+from app import models, auth, database, cache, access, projections, i18n
 
 # The tag is now "Users" for better clarity
 router = APIRouter(prefix="/users", tags=["Users"])
@@ -20,8 +21,9 @@ def get_admin_user(current_user: models.User = Depends(auth.get_current_user)) -
 @router.get("/", response_model=List[models.UserRead])
 def get_all_users(
     role: str | None = None,
-    db: Session = Depends(database.get_db),
-    current_user: models.User = Depends(auth.get_current_user) # ZMIANA: Usunięto zależność admina
+    db: Session = Depends(database.get_read_db),
+    current_user: models.User = Depends(auth.get_current_user), # ZMIANA: Usunięto zależność admina
+    lang: str = Depends(i18n.get_lang)
 ):
     """
     Get a list of all users.
@@ -29,7 +31,7 @@ def get_all_users(
     - Owners can get users with 'owner' or 'tenant' roles.
     - Other roles are denied.
     """
-    statement = select(models.User)
+    statement = projections.select_for(models.UserRead, models.User)
 
     # Sprawdzenie uprawnień
     if current_user.role == models.Roles.ADMIN:
@@ -48,11 +50,10 @@ def get_all_users(
     # Filtrowanie po roli, jeśli została podana
     if role:
         if role not in models.Roles.ALL:
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid role: {role}")
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=i18n.t("errors.invalid_role", lang, role=role))
         statement = statement.where(models.User.role == role)
     
-    users = db.exec(statement).all()
-    return users
+    return projections.build(models.UserRead, db.exec(statement).all())
 
 
 @router.get("/{user_id}", response_model=models.UserRead)
@@ -76,13 +77,8 @@ def get_user(
     
     # An owner can view tenants in their properties
     if current_user.role == models.Roles.OWNER:
-        # We collect the IDs of all tenants assigned to the owner's properties
-        owned_tenant_ids = {
-            assignment.tenant_id
-            for prop in current_user.owned_properties
-            for assignment in prop.tenants
-        }
-        if user_id in owned_tenant_ids:
+        owned_ids = access.get_property_access(db, current_user.id).owned
+        if owned_ids & access.get_property_access(db, user_id).assigned:
             return db_user
             
     # In all other cases, deny the request
@@ -92,28 +88,23 @@ def get_user(
     )
 
 @router.post("/", response_model=models.UserRead, status_code=status.HTTP_201_CREATED)
-def create_user(
+async def create_user(
     user_create: models.UserCreate,
     db: Session = Depends(database.get_db),
     admin: models.User = Depends(get_admin_user) # <-- Creating users is admin-only
 ):
     """Creates a new user (admin only)."""
-    if auth.get_user_by_username(db, user_create.username):
+    if await run_in_threadpool(auth.get_user_by_username, db, user_create.username):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Username is already registered")
     
-    if auth.get_user_by_email(db, user_create.email):
+    if await run_in_threadpool(auth.get_user_by_email, db, user_create.email):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email is already registered")
     
     if user_create.role not in models.Roles.ALL:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid role specified")
 
-    hashed_password = auth.get_password_hash(user_create.password)
-    user_data = user_create.model_dump(exclude={"password"})
-    new_user = models.User(**user_data, hashed_password=hashed_password)
-    
-    db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    new_user = await auth.create_user(db, user_create)
+    cache.invalidate_dashboard_cache()
     return new_user
 
 @router.put("/{user_id}", response_model=models.UserRead)
@@ -124,7 +115,8 @@ def update_user(
     current_user: models.User = Depends(auth.get_current_user)
 ):
     """Updates user data."""
-    db_user = db.get(models.User, user_id)
+    # populate_existing: current_user może być w sesji obiektem zbudowanym z cache, nie wierszem z bazy
+    db_user = db.get(models.User, user_id, populate_existing=True)
     if not db_user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
 
@@ -146,13 +138,20 @@ def update_user(
         if auth.get_user_by_email(db, user_update.email):
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email is already taken")
 
+    # The cached principal is keyed by the current username, which the update may change
+    old_username = db_user.username
+
     # Update the data
     update_data = user_update.model_dump(exclude_unset=True)
+    if any(value is not None and value != getattr(db_user, key) for key, value in update_data.items()):
+        auth.bump_token_version(db, db_user.id)
     for key, value in update_data.items():
         setattr(db_user, key, value)
     
     db.add(db_user)
     db.commit()
+    auth.invalidate_principal(old_username)
+    cache.invalidate_dashboard_cache()
     db.refresh(db_user)
     return db_user
 
@@ -170,7 +169,11 @@ def delete_user(
     if user_to_delete.id == admin.id:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="An administrator cannot delete their own account")
 
+    deleted_username = user_to_delete.username
     db.delete(user_to_delete)
     db.commit()
+    auth.invalidate_principal(deleted_username)
+    access.invalidate_user(user_id)
+    cache.invalidate_dashboard_cache()
     # We return an empty response, which is standard for DELETE operations
     return Response(status_code=status.HTTP_204_NO_CONTENT)
\ No newline at end of file
@@ -0,0 +1,115 @@
+# backend/app/search.py
+"""
+Ranked full-text search over invoices, backed by the invoice_search FTS5 table
+(see migrations/m0004_invoice_search.py).
+
+User input never reaches the MATCH expression verbatim: it is split into words,
+each word is quoted and matched as a prefix, and the caller's properties are added
+as a property_ref filter, so FTS5 intersects the posting lists instead of the
+application filtering matches afterwards.
+
+Matches are ranked in blocks of SEARCH_RANK_WINDOW, newest first: the best matches of the
+newest block come first, then those of the next older block, and so on. Each page ranks a
+single block (rarely two), so common words stay cheap and every match can still be reached.
+"""
+
+import os
+import re
+from typing import Iterable, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import text
+from sqlalchemy.sql.elements import TextClause
+from sqlmodel import Session
+
+MAX_SEARCH_TERMS = 16
+
+# bm25 jest liczony naraz tylko dla bloku tylu trafień - przy pospolitych słowach
+# (setki tysięcy dopasowań) ranking wszystkich trafień zająłby setki milisekund
+SEARCH_RANK_WINDOW = int(os.getenv("SEARCH_RANK_WINDOW", "10000"))
+
+# Kolumny przeszukiwane przez zapytanie użytkownika; property_ref służy tylko do uprawnień
+SEARCH_COLUMNS = "{description tags property}"
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+def build_match_expression(query: str, property_ids: Optional[Iterable[int]] = None) -> Optional[str]:
+    """
+    Translates free text into an FTS5 MATCH expression: every word must match (as a prefix)
+    and, unless property_ids is None, the invoice must belong to one of the given properties.
+    Returns None when the query has no searchable words.
+    """
+    terms = _WORD.findall(query.lower())[:MAX_SEARCH_TERMS]
+    if not terms:
+        return None
+    quoted = " ".join(f'"{term}"*' for term in terms)
+    expression = f"{SEARCH_COLUMNS} : ({quoted})"
+    if property_ids is not None:
+        refs = " OR ".join(f"p{int(property_id)}" for property_id in sorted(property_ids))
+        expression = f"{expression} AND property_ref : ({refs})"
+    return expression
+
+
+def _block_sql(upper: Optional[int], columns: str) -> str:
+    """The newest SEARCH_RANK_WINDOW matches with rowid <= upper (all matches when upper is None)."""
+    bound = " AND rowid <= :upper" if upper is not None else ""
+    return (
+        f"SELECT {columns} FROM invoice_search WHERE invoice_search MATCH :expression{bound}"
+        " ORDER BY rowid DESC LIMIT :window"
+    )
+
+
+def search_page_statement(
+    expression: str, block: Optional[int], after: Optional[Tuple[float, int, Optional[int]]], limit: int
+) -> TextClause:
+    """(id, score) of the best limit matches of one block, after the (rank, id) of after if given."""
+    params = {"expression": expression, "window": SEARCH_RANK_WINDOW, "limit": limit}
+    if block is not None:
+        params["upper"] = block
+    sql = f"SELECT id, score FROM ({_block_sql(block, 'rowid AS id, rank AS score')})"
+    if after is not None:
+        sql += " WHERE score > :last_score OR (score = :last_score AND id > :last_id)"
+        params["last_score"], params["last_id"] = after[0], after[1]
+    sql += " ORDER BY score, id LIMIT :limit"
+    return text(sql).bindparams(**params)
+
+
+def search_invoice_ids(
+    db: Session,
+    query: str,
+    property_ids: Optional[Iterable[int]],
+    after: Optional[Tuple[float, int, Optional[int]]],
+    limit: int,
+) -> List[Tuple[int, float, Optional[int]]]:
+    """
+    Returns up to limit (invoice_id, rank, block) hits, best match first within each block of
+    SEARCH_RANK_WINDOW matches, newest block first (lower rank is better). block is the highest
+    rowid of the hit's block, None for the newest one. property_ids=None searches every
+    property (admins). after is the (rank, id, block) of the last hit of the previous page.
+    """
+    if db.get_bind().dialect.name != "sqlite":
+        raise HTTPException(status_code=status.HTTP_501_NOT_IMPLEMENTED, detail="Full-text search requires SQLite FTS5")
+
+    if property_ids is not None:
+        property_ids = list(property_ids)
+        if not property_ids:
+            return []
+    expression = build_match_expression(query, property_ids)
+    if expression is None:
+        return []
+
+    block = after[2] if after is not None else None
+    hits: List[Tuple[int, float, Optional[int]]] = []
+    while True:
+        statement = search_page_statement(expression, block, after, limit - len(hits))
+        hits += [(invoice_id, rank, block) for invoice_id, rank in db.exec(statement).all()]
+        if len(hits) >= limit:
+            return hits
+
+        # Blok wyczerpany - strona jest kontynuowana w następnym, starszym bloku (bez liczenia bm25)
+        params = {"expression": expression, "window": SEARCH_RANK_WINDOW, "upper": block}
+        size, lowest = db.exec(text(f"SELECT count(*), min(id) FROM ({_block_sql(block, 'rowid AS id')})"), params=params).one()
+        if size < SEARCH_RANK_WINDOW:
+            return hits
+        block, after = lowest - 1, None
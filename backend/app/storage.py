@@ -0,0 +1,203 @@
+# backend/app/storage.py
+
+import hashlib
+import os
+import tempfile
+import uuid
+from dataclasses import dataclass
+from typing import BinaryIO, Dict, Iterable, List, Optional, Tuple
+
+import anyio
+from fastapi import HTTPException, UploadFile, status
+from sqlalchemy import update
+from sqlmodel import Session
+
+from app import models, database
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+MAX_UPLOAD_BYTES = int(os.getenv("INVOICE_MAX_UPLOAD_BYTES", str(25 * 1024 * 1024)))
+
+# Pliki w trakcie wysyłania trafiają tutaj, na ten sam system plików co katalog docelowy,
+# dzięki czemu końcowe przeniesienie jest atomowym os.replace
+INCOMING_SUBDIRECTORY = ".incoming"
+
+# Pliki adresowane treścią: blobs/ab/cd/abcd...  (dwa poziomy po 256 katalogów)
+BLOB_SUBDIRECTORY = "blobs"
+
+
+@dataclass
+class StagedUpload:
+    """An uploaded file written to a temporary location, not yet visible in the upload directory."""
+    temp_path: str
+    size: int
+    sha256: str
+
+    async def publish_blob(self, final_path: str) -> None:
+        """Atomically moves the staged file into the content-addressed store."""
+        await anyio.to_thread.run_sync(publish_blob, self.temp_path, final_path)
+
+    async def discard(self) -> None:
+        await anyio.to_thread.run_sync(_remove_if_exists, self.temp_path)
+
+
+def _remove_if_exists(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def publish_blob(temp_path: str, final_path: str) -> None:
+    """
+    Moves a staged file to its blob path; call it after the blob reference is committed.
+    An existing blob is replaced rather than kept: it may be an orphan that a concurrent
+    remove_files is about to delete, and the content is the same either way.
+    """
+    os.makedirs(os.path.dirname(final_path), exist_ok=True)
+    os.replace(temp_path, final_path)
+
+
+def _create_temp_file(directory: str) -> str:
+    incoming = os.path.join(directory, INCOMING_SUBDIRECTORY)
+    os.makedirs(incoming, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=incoming, suffix=".part")
+    os.close(fd)
+    return temp_path
+
+
+def _too_large() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"File exceeds the maximum size of {MAX_UPLOAD_BYTES} bytes",
+    )
+
+
+async def stage_upload(upload: UploadFile, directory: str, max_bytes: int = MAX_UPLOAD_BYTES) -> StagedUpload:
+    """
+    Streams an upload in chunks to a temporary file without blocking the event loop,
+    computing its SHA-256 on the fly. Raises 413 as soon as max_bytes is exceeded.
+    """
+    if upload.size is not None and upload.size > max_bytes:
+        raise _too_large()
+
+    temp_path = await anyio.to_thread.run_sync(_create_temp_file, directory)
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        async with await anyio.open_file(temp_path, "wb") as buffer:
+            while chunk := await upload.read(UPLOAD_CHUNK_SIZE):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise _too_large()
+                digest.update(chunk)
+                await buffer.write(chunk)
+    except BaseException:
+        await anyio.to_thread.run_sync(_remove_if_exists, temp_path)
+        raise
+
+    return StagedUpload(temp_path=temp_path, size=size, sha256=digest.hexdigest())
+
+
+def stage_fileobj(fileobj: BinaryIO, directory: str, max_bytes: int = MAX_UPLOAD_BYTES) -> StagedUpload:
+    """Synchronous counterpart of stage_upload for file objects read in a worker thread."""
+    temp_path = _create_temp_file(directory)
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with open(temp_path, "wb") as buffer:
+            while chunk := fileobj.read(UPLOAD_CHUNK_SIZE):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise _too_large()
+                digest.update(chunk)
+                buffer.write(chunk)
+    except BaseException:
+        _remove_if_exists(temp_path)
+        raise
+
+    return StagedUpload(temp_path=temp_path, size=size, sha256=digest.hexdigest())
+
+
+# --- Magazyn plików adresowanych treścią ---
+def blob_path(directory: str, checksum: str) -> str:
+    """Returns the sharded path of the blob with the given SHA-256 checksum."""
+    return os.path.join(directory, BLOB_SUBDIRECTORY, checksum[:2], checksum[2:4], checksum)
+
+
+def is_blob_path(path: str) -> bool:
+    return f"{os.sep}{BLOB_SUBDIRECTORY}{os.sep}" in path
+
+
+def acquire_blob(db: Session, checksum: str, size: int, path: str, count: int = 1) -> None:
+    """Adds count references to a stored file, registering it on first use. Does not commit."""
+    insert = database.dialect_insert(db)
+    statement = insert(models.StoredFile).values(checksum=checksum, path=path, size=size, ref_count=count)
+    statement = statement.on_conflict_do_update(
+        index_elements=[models.StoredFile.checksum],
+        set_={"ref_count": models.StoredFile.ref_count + count},
+    )
+    db.exec(statement)
+
+
+def release_blobs(db: Session, checksums: Iterable[str]) -> List[str]:
+    """
+    Drops one reference per given checksum (repeat a checksum to drop several).
+    Returns the paths of blobs that lost their last reference; remove them with
+    remove_files only after the transaction commits. Does not commit.
+    """
+    counts: Dict[str, int] = {}
+    for checksum in checksums:
+        counts[checksum] = counts.get(checksum, 0) + 1
+
+    orphaned_paths = []
+    for checksum, count in counts.items():
+        db.exec(
+            update(models.StoredFile)
+            .where(models.StoredFile.checksum == checksum)
+            .values(ref_count=models.StoredFile.ref_count - count)
+        )
+        stored_file = db.get(models.StoredFile, checksum, populate_existing=True)
+        if stored_file is not None and stored_file.ref_count <= 0:
+            orphaned_paths.append(stored_file.path)
+            db.delete(stored_file)
+    return orphaned_paths
+
+
+def release_files(db: Session, files: Iterable[Tuple[Optional[str], Optional[str]]]) -> List[str]:
+    """
+    Releases the files of deleted invoices, given as (checksum, file_path) pairs.
+    Content-addressed blobs are returned only once their last reference is gone,
+    legacy per-invoice files are always returned. Does not commit.
+    """
+    files = list(files)
+    blob_checksums = [checksum for checksum, path in files if checksum and path and is_blob_path(path)]
+    legacy_paths = [path for checksum, path in files if path and not is_blob_path(path)]
+    return release_blobs(db, blob_checksums) + legacy_paths
+
+
+def _remove_blob(path: str) -> None:
+    """
+    Deletes an orphaned blob unless an upload referenced the same content again in the meantime.
+    The blob is first renamed away, so a publish_blob running now recreates it instead of
+    being undone; it is put back if a StoredFile row exists again after the rename.
+    """
+    removed_path = f"{path}.{uuid.uuid4().hex}.removed"
+    try:
+        os.replace(path, removed_path)
+    except FileNotFoundError:
+        return
+    with Session(database.engine) as db:
+        referenced = db.get(models.StoredFile, os.path.basename(path)) is not None
+    if referenced:
+        os.replace(removed_path, path)
+    else:
+        _remove_if_exists(removed_path)
+
+
+def remove_files(paths: Iterable[str]) -> None:
+    """Removes files released by a committed transaction (see release_files) or leftover temporary files."""
+    for path in paths:
+        if is_blob_path(path):
+            _remove_blob(path)
+        else:
+            _remove_if_exists(path)
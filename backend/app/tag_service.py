@@ -0,0 +1,77 @@
+# backend/app/tag_service.py
+
+import os
+from typing import Dict, Iterable, Set
+
+from sqlalchemy import delete
+from sqlmodel import Session, select
+
+from app import models, database, cache
+
+TAG_CACHE_TTL_SECONDS = float(os.getenv("TAG_CACHE_TTL_SECONDS", "3600"))
+
+# Nazwa tagu -> id; nazwy są unikalne i niezmienne, więc wpis traci ważność tylko po usunięciu tagu
+tag_id_cache = cache.TTLCache(ttl_seconds=TAG_CACHE_TTL_SECONDS, maxsize=50_000)
+
+
+def parse_tag_names(tags: str) -> Set[str]:
+    """Parses a comma-separated tag string into normalized (stripped, lower-case) names."""
+    return {tag.strip().lower() for tag in tags.split(",") if tag.strip()}
+
+
+def resolve_tag_ids(db: Session, names: Iterable[str]) -> Dict[str, int]:
+    """
+    Returns a name -> id map for the given tag names, creating the missing tags.
+    Uses an insert-or-ignore upsert, so concurrent callers never hit the unique constraint on tags.name.
+    Does not commit; ids of tags created here are cached only once they are looked up after the commit.
+    """
+    resolved: Dict[str, int] = {}
+    missing = set()
+    for name in set(names):
+        tag_id = tag_id_cache.get(name)
+        if tag_id is None:
+            missing.add(name)
+        else:
+            resolved[name] = tag_id
+    if not missing:
+        return resolved
+
+    # Do cache trafiają tylko tagi zatwierdzone przed tą transakcją: po wycofaniu transakcji
+    # id nowo wstawionego tagu mógłby zostać nadany innemu tagowi
+    for name, tag_id in db.exec(select(models.Tag.name, models.Tag.id).where(models.Tag.name.in_(missing))).all():
+        tag_id_cache.set(name, tag_id)
+        resolved[name] = tag_id
+    missing -= resolved.keys()
+    if not missing:
+        return resolved
+
+    insert = database.dialect_insert(db)
+    db.exec(
+        insert(models.Tag).on_conflict_do_nothing(index_elements=[models.Tag.name]),
+        params=[{"name": name} for name in missing],
+    )
+    rows = db.exec(select(models.Tag.name, models.Tag.id).where(models.Tag.name.in_(missing))).all()
+    resolved.update(rows)
+    return resolved
+
+
+def set_invoice_tags(db: Session, invoice_id: int, names: Iterable[str], replace: bool = True) -> None:
+    """
+    Links an invoice to the given tags with bulk writes to invoice_tag_link,
+    replacing its previous tags unless replace is False. Does not commit.
+    The invoice's tags relationship is stale afterwards until the session expires it (e.g. on commit).
+    """
+    tag_ids = resolve_tag_ids(db, names)
+    if replace:
+        db.exec(delete(models.InvoiceTagLink).where(models.InvoiceTagLink.invoice_id == invoice_id))
+    if tag_ids:
+        insert = database.dialect_insert(db)
+        db.exec(
+            insert(models.InvoiceTagLink).on_conflict_do_nothing(),
+            params=[{"invoice_id": invoice_id, "tag_id": tag_id} for tag_id in tag_ids.values()],
+        )
+
+
+def forget_tag(name: str) -> None:
+    """Drops a deleted tag from the name cache."""
+    tag_id_cache.invalidate(name)
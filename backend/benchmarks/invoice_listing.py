@@ -0,0 +1,90 @@
+# backend/benchmarks/invoice_listing.py
+"""
+Serialization time and bytes on the wire of a 10k-invoice listing.
+
+Compares the standard JSONResponse with ORJSONResponse (the application default) and the
+response size without compression, with gzip and with brotli (when Brotli is installed).
+Nothing touches the database: the invoices are built in memory and served by a minimal app
+with the same response_model as GET /invoices/property/{property_id}.
+
+    cd backend && python -m benchmarks.invoice_listing [--invoices 10000] [--repeat 5]
+"""
+
+import argparse
+import statistics
+import time
+from datetime import date, timedelta
+from typing import List
+
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.testclient import TestClient
+
+from app import compression, models
+
+
+def build_invoices(count: int) -> List[models.InvoiceRead]:
+    tags = [models.Tag(id=i, name=name) for i, name in enumerate(("water", "gas", "electricity", "internet", "repairs"), 1)]
+    properties = [models.PropertyRead(id=i, name=f"Property {i}", address=f"ul. Przykładowa {i}, Warszawa") for i in range(1, 21)]
+    start = date(2020, 1, 1)
+    return [
+        models.InvoiceRead(
+            id=i,
+            amount=round(50 + (i * 37) % 2000 + (i % 100) / 100, 2),
+            issue_date=start + timedelta(days=i % 1800),
+            description=f"Invoice {i} for {tags[i % 5].name}",
+            file_path=f"uploads/invoices/{i:08d}.pdf",
+            property_id=properties[i % 20].id,
+            uploader_id=1 + i % 7,
+            page_count=1 + i % 3,
+            tags=tags[i % 5:i % 5 + 1 + i % 2],
+            property=properties[i % 20],
+        )
+        for i in range(1, count + 1)
+    ]
+
+
+def build_app(invoices: List[models.InvoiceRead], response_class) -> FastAPI:
+    app = FastAPI(default_response_class=response_class)
+
+    @app.get("/invoices", response_model=List[models.InvoiceRead])
+    def list_invoices():
+        return invoices
+
+    app.add_middleware(compression.CompressionMiddleware)
+    return app
+
+
+def measure(client: TestClient, accept_encoding: str, repeat: int):
+    timings, wire_bytes = [], 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        response = client.get("/invoices", headers={"Accept-Encoding": accept_encoding})
+        timings.append(time.perf_counter() - started)
+        response.raise_for_status()
+        wire_bytes = response.num_bytes_downloaded
+    return statistics.median(timings) * 1000, wire_bytes
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.invoice_listing", description=__doc__.split("\n\n")[0])
+    parser.add_argument("--invoices", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    invoices = build_invoices(args.invoices)
+    encodings = ["identity", "gzip"] + (["br"] if compression.brotli is not None else [])
+    print(f"{args.invoices} invoices, median of {args.repeat} requests")
+    print(f"{'response class':<16} {'encoding':<10} {'ms':>8} {'bytes':>12}")
+    for response_class in (JSONResponse, ORJSONResponse):
+        with TestClient(build_app(invoices, response_class)) as client:
+            client.get("/invoices") # rozgrzewka
+            for encoding in encodings:
+                ms, wire_bytes = measure(client, encoding, args.repeat)
+                print(f"{response_class.__name__:<16} {encoding:<10} {ms:>8.1f} {wire_bytes:>12,}")
+    if compression.brotli is None:
+        print("Brotli is not installed - br was skipped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+# backend/benchmarks/read_paths.py
+"""
+CPU time and allocations per request of the ORM read path versus app.projections.
+
+For every list endpoint touched by the projection read path, runs the query and the
+response handling of FastAPI (fastapi.routing.serialize_response on the response_model
+field, then rendering with the application's ORJSONResponse), once with table objects
+(the previous implementation) and once with projections. The database is a temporary
+SQLite file built with the migrations.
+
+    cd backend && python -m benchmarks.read_paths [--invoices 10000] [--users 2000] [--repeat 20]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+from typing import Callable, List
+
+from fastapi.responses import ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_cloned_field, create_model_field
+from sqlalchemy import insert
+from sqlalchemy.orm import selectinload
+from sqlmodel import Session, create_engine, select
+
+from app import migrations, models, pagination, projections
+
+
+def seed(engine, invoice_count: int, user_count: int) -> None:
+    roles = models.Roles.ALL
+    with Session(engine) as db:
+        db.exec(insert(models.User), params=[
+            {"id": i, "username": f"user{i}", "email": f"user{i}@example.com", "role": roles[i % 3], "hashed_password": "x"}
+            for i in range(1, user_count + 1)
+        ])
+        db.exec(insert(models.Property), params=[
+            {"id": i, "name": f"Property {i}", "address": f"ul. Przykładowa {i}", "owner_id": 2} for i in range(1, 21)
+        ])
+        db.exec(insert(models.Tag), params=[{"id": i, "name": f"tag{i}"} for i in range(1, 31)])
+        start = date(2020, 1, 1)
+        db.exec(insert(models.Invoice), params=[
+            {
+                "id": i, "amount": 50 + i % 2000, "issue_date": start + timedelta(days=i % 1800),
+                "description": f"Invoice {i}", "file_path": f"uploads/invoices/{i:08d}.pdf",
+                "property_id": 1 + i % 20, "uploader_id": 2,
+            }
+            for i in range(1, invoice_count + 1)
+        ])
+        db.exec(insert(models.InvoiceTagLink), params=[
+            {"invoice_id": i, "tag_id": 1 + (i + k) % 30} for i in range(1, invoice_count + 1) for k in range(i % 3)
+        ])
+        db.commit()
+
+
+def measure(engine, run: Callable[[Session], bytes], repeat: int):
+    """Median CPU milliseconds and peak traced KiB of one request."""
+    cpu, peaks = [], []
+    for _ in range(repeat):
+        with Session(engine) as db:
+            started = time.process_time()
+            run(db)
+            cpu.append((time.process_time() - started) * 1000)
+        with Session(engine) as db:
+            tracemalloc.start()
+            run(db)
+            peaks.append(tracemalloc.get_traced_memory()[1] / 1024)
+            tracemalloc.stop()
+    return statistics.median(cpu), statistics.median(peaks)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.read_paths", description=__doc__.split("\n\n")[0])
+    parser.add_argument("--invoices", type=int, default=10_000)
+    parser.add_argument("--users", type=int, default=2_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    def response_field(response_model):
+        # Jak APIRoute: pole response_model w trybie serializacji i jego klon przekazywany do serialize_response
+        return create_cloned_field(create_model_field(name="Response_benchmark", type_=response_model, mode="serialization"))
+
+    invoices_field = response_field(List[models.InvoiceRead])
+    users_field = response_field(List[models.UserRead])
+    tags_field = response_field(List[models.TagRead])
+    page = pagination.MAX_PAGE_SIZE
+    newest_first = (models.Invoice.issue_date.desc(), models.Invoice.id.desc())
+    loop = asyncio.new_event_loop()
+
+    def respond(field, rows) -> bytes:
+        # Ta sama ścieżka co endpoint: walidacja i zrzut przez serialize_response, potem render odpowiedzi.
+        # is_coroutine=True liczy w tym wątku; endpointy synchroniczne robią to samo w puli wątków
+        content = loop.run_until_complete(serialize_response(field=field, response_content=rows, is_coroutine=True))
+        return ORJSONResponse(content).body
+
+    cases = {
+        f"invoice page ({page})": (
+            lambda db: respond(invoices_field, db.exec(
+                select(models.Invoice)
+                .options(selectinload(models.Invoice.tags), selectinload(models.Invoice.property))
+                .order_by(*newest_first).limit(page)
+            ).all()),
+            lambda db: respond(invoices_field, projections.read_invoices(
+                db, projections.invoice_select().order_by(*newest_first).limit(page)
+            )),
+        ),
+        f"users ({args.users})": (
+            lambda db: respond(users_field, db.exec(select(models.User)).all()),
+            lambda db: respond(users_field, projections.build(
+                models.UserRead, db.exec(projections.select_for(models.UserRead, models.User)).all()
+            )),
+        ),
+        "tags (30)": (
+            lambda db: respond(tags_field, db.exec(select(models.Tag).order_by(models.Tag.name)).all()),
+            lambda db: respond(tags_field, projections.build(
+                models.TagRead, db.exec(projections.select_for(models.TagRead, models.Tag).order_by(models.Tag.name)).all()
+            )),
+        ),
+    }
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{os.path.join(directory, 'bench.db')}")
+        migrations.upgrade(engine)
+        seed(engine, args.invoices, args.users)
+
+        print(f"median of {args.repeat} requests: CPU ms / peak allocated KiB")
+        print(f"{'endpoint':<20} {'ORM':>18} {'projection':>18} {'CPU saved':>10}")
+        for name, (orm_path, projection_path) in cases.items():
+            assert orm_path(Session(engine)) == projection_path(Session(engine)), f"{name}: responses differ"
+            orm_cpu, orm_kib = measure(engine, orm_path, args.repeat)
+            projection_cpu, projection_kib = measure(engine, projection_path, args.repeat)
+            print(
+                f"{name:<20} {orm_cpu:>8.1f} / {orm_kib:>7.0f} {projection_cpu:>8.1f} / {projection_kib:>7.0f}"
+                f" {1 - projection_cpu / orm_cpu:>9.0%}"
+            )
+        engine.dispose()
+    loop.close()
+
+
+if __name__ == "__main__":
+    main()
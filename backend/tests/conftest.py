@@ -0,0 +1,31 @@
+# backend/tests/conftest.py
+"""
+The application reads its configuration from the environment at import time, so the test
+database, upload directories and background workers are set up here, before app is imported.
+"""
+
+import os
+import sys
+import tempfile
+
+import pytest
+
+_work_dir = tempfile.mkdtemp(prefix="rental-tests-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(_work_dir, 'test.db')}")
+os.environ.setdefault("UPLOAD_DIRECTORY", os.path.join(_work_dir, "uploads", "invoices"))
+os.environ.setdefault("JOB_WORKERS", "0")
+os.environ.setdefault("ADMISSION_CONTROL", "0")
+# app.main montuje katalog "uploads" względem katalogu roboczego
+os.makedirs(os.path.join(_work_dir, "uploads"), exist_ok=True)
+os.chdir(_work_dir)
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope="session")
+def client():
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    with TestClient(app) as test_client:
+        yield test_client
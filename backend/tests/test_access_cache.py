@@ -0,0 +1,36 @@
+# backend/tests/test_access_cache.py
+"""Values computed before an invalidation are not written back into the caches."""
+
+from sqlmodel import Session
+
+from app import access, cache, database
+
+
+def test_access_invalidated_during_the_query_is_not_cached(client, monkeypatch):
+    property_access_statement = access.property_access_statement
+
+    def invalidated_meanwhile(user_id):
+        # Przypisanie zatwierdzone i unieważnione, gdy to żądanie liczy jeszcze stary dostęp
+        access.invalidate_user(user_id)
+        return property_access_statement(user_id)
+
+    monkeypatch.setattr(access, "property_access_statement", invalidated_meanwhile)
+    with Session(database.engine) as db:
+        access.get_property_access(db, 424242)
+    assert access.access_index.get(424242) is None
+
+    monkeypatch.setattr(access, "property_access_statement", property_access_statement)
+    with Session(database.engine) as db:
+        access.get_property_access(db, 424242)
+    assert access.access_index.get(424242) is not None
+
+
+def test_cleared_cache_drops_values_computed_before_the_clear():
+    summaries = cache.TTLCache(ttl_seconds=60)
+    generation = summaries.generation((1, "owner"))
+    summaries.clear()
+    summaries.set((1, "owner"), {"total_costs": 1.0}, generation)
+    assert summaries.get((1, "owner")) is None
+
+    summaries.set((1, "owner"), {"total_costs": 2.0}, summaries.generation((1, "owner")))
+    assert summaries.get((1, "owner")) == {"total_costs": 2.0}
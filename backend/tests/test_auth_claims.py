@@ -0,0 +1,74 @@
+# backend/tests/test_auth_claims.py
+"""Claim tokens are revoked and cached principals dropped once the user changes, also across processes."""
+
+from sqlalchemy import delete, update
+from sqlmodel import Session
+
+from app import auth, database, models
+
+
+def test_role_change_from_another_process_revokes_token_claims(client, monkeypatch):
+    monkeypatch.setattr(auth, "AUTH_TOKEN_CLAIMS", True)
+    with Session(database.engine) as db:
+        admin = models.User(username="claims-admin", email="claims-admin@example.com", role=models.Roles.ADMIN, hashed_password="x")
+        db.add(admin)
+        db.commit()
+        db.refresh(admin)
+        headers = {"Authorization": f"Bearer {auth.create_access_token(auth.token_data_for_user(admin))}"}
+
+    assert client.get("/users/", headers=headers).status_code == 200
+
+    # Inny proces aplikacji degraduje użytkownika: ten proces nie dostaje invalidate_principal
+    with Session(database.engine) as db:
+        db.exec(update(models.User).where(models.User.username == "claims-admin").values(
+            role=models.Roles.TENANT, token_version=models.User.token_version + 1,
+        ))
+        db.commit()
+    auth.token_version_cache.clear() # upływ TOKEN_VERSION_CACHE_TTL_SECONDS
+    auth.principal_cache.clear()
+
+    # Token z nieaktualną wersją jest odwołany, nie tylko jego claimy
+    assert client.get("/users/", headers=headers).status_code == 401
+
+
+def test_self_update_after_cached_request_keeps_token_version(client, monkeypatch):
+    monkeypatch.setattr(auth, "AUTH_TOKEN_CLAIMS", True)
+    with Session(database.engine) as db:
+        user = models.User(username="claims-self", email="claims-self@example.com", role=models.Roles.TENANT,
+                           hashed_password="x", token_version=5)
+        db.add(user)
+        db.commit()
+        db.refresh(user)
+        user_id = user.id
+        headers = {"Authorization": f"Bearer {auth.create_access_token(auth.token_data_for_user(user))}"}
+        stale_headers = {"Authorization": f"Bearer {auth.create_access_token({**auth.token_data_for_user(user), 'ver': 1})}"}
+
+    assert client.get("/auth/me", headers=headers).status_code == 200
+    assert client.put(f"/users/{user_id}", json={"email": "claims-self-2@example.com"}, headers=headers).status_code == 200
+
+    with Session(database.engine) as db:
+        assert db.get(models.User, user_id).token_version == 6
+    assert client.get("/auth/me", headers=stale_headers).status_code == 401
+
+
+def test_cached_principal_follows_changes_from_another_process(client):
+    with Session(database.engine) as db:
+        for name in ("cached-admin", "cached-deleted"):
+            db.add(models.User(username=name, email=f"{name}@example.com", role=models.Roles.ADMIN, hashed_password="x"))
+        db.commit()
+    admin_headers = {"Authorization": f"Bearer {auth.create_access_token({'sub': 'cached-admin'})}"}
+    deleted_headers = {"Authorization": f"Bearer {auth.create_access_token({'sub': 'cached-deleted'})}"}
+    assert client.get("/users/", headers=admin_headers).status_code == 200
+    assert client.get("/users/", headers=deleted_headers).status_code == 200
+
+    # Inny proces degraduje jednego użytkownika i usuwa drugiego; principal_cache tego procesu nadal je pamięta
+    with Session(database.engine) as db:
+        db.exec(update(models.User).where(models.User.username == "cached-admin").values(
+            role=models.Roles.TENANT, token_version=models.User.token_version + 1,
+        ))
+        db.exec(delete(models.User).where(models.User.username == "cached-deleted"))
+        db.commit()
+    auth.token_version_cache.clear() # upływ TOKEN_VERSION_CACHE_TTL_SECONDS
+
+    assert client.get("/users/", headers=admin_headers).status_code == 403
+    assert client.get("/users/", headers=deleted_headers).status_code == 401
@@ -0,0 +1,23 @@
+# backend/tests/test_body_limits.py
+"""Oversized uploads are rejected before their body is read."""
+
+from app import body_limits
+from app.admission import compile_path
+
+
+def test_oversized_uploads_get_413_before_the_form_is_parsed(client, monkeypatch):
+    monkeypatch.setattr(body_limits, "_limits", [("POST", compile_path("/invoices/upload"), 1024)])
+
+    def body():
+        for _ in range(8):
+            yield b"x" * 512
+
+    response = client.post("/invoices/upload", content=b"x" * 2048, headers={"Content-Type": "multipart/form-data; boundary=b"})
+    assert response.status_code == 413
+
+    # Bez Content-Length (chunked) ciało jest przerwane po przekroczeniu limitu
+    response = client.post("/invoices/upload", content=body(), headers={"Content-Type": "multipart/form-data; boundary=b"})
+    assert response.status_code == 413
+
+    response = client.post("/invoices/upload", content=b"x" * 512, headers={"Content-Type": "multipart/form-data; boundary=b"})
+    assert response.status_code != 413
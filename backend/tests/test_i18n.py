@@ -0,0 +1,29 @@
+# backend/tests/test_i18n.py
+"""Accept-Language negotiation and the compiled message templates."""
+
+from app import i18n
+
+
+def test_accept_language_picks_the_best_available_language():
+    assert i18n.negotiate_language("de-DE, pl;q=0.8, en;q=0.5") == "pl"
+    assert i18n.negotiate_language("en;q=0.1, pl-PL") == "pl"
+    assert i18n.negotiate_language("pl;q=0, fr") == i18n.DEFAULT_LANG
+    assert i18n.negotiate_language("") == i18n.DEFAULT_LANG
+
+
+def test_templates_are_split_into_literals_and_fields():
+    template = i18n._compile_template("Invalid role: {role} ({{raw}})")
+    assert template.parts and not template.needs_format
+    assert template.render({"role": "guest"}) == "Invalid role: guest ({raw})"
+    assert template.render({}) == "Invalid role: {role} ({{raw}})"
+
+    assert i18n._compile_template("{{literal}}").render({}) == "{literal}"
+    assert i18n._compile_template("Total {amount:.2f}").render({"amount": 2}) == "Total 2.00"
+
+
+def test_error_details_follow_accept_language(client):
+    form = {"username": "nobody", "password": "x"}
+    assert client.post("/auth/login", data=form).json()["detail"] == "Incorrect username or password"
+    response = client.post("/auth/login", data=form, headers={"Accept-Language": "pl-PL,pl;q=0.9,en;q=0.8"})
+    assert response.status_code == 401
+    assert response.json()["detail"] == "Błędna nazwa użytkownika lub hasło"
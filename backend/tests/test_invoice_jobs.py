@@ -0,0 +1,43 @@
+# backend/tests/test_invoice_jobs.py
+"""Page counts of classic PDFs and of PDFs that keep their objects in compressed object streams."""
+
+import zlib
+
+from app import invoice_jobs
+
+
+def _classic_pdf(pages: int) -> bytes:
+    kids = " ".join(f"{3 + i} 0 R" for i in range(pages))
+    objects = [
+        b"1 0 obj\n<< /Type /Catalog /Pages 2 0 R >>\nendobj\n",
+        f"2 0 obj\n<< /Type /Pages /Kids [{kids}] /Count {pages} >>\nendobj\n".encode(),
+    ] + [f"{3 + i} 0 obj\n<< /Type /Page /Parent 2 0 R >>\nendobj\n".encode() for i in range(pages)]
+    return b"%PDF-1.4\n" + b"".join(objects) + b"trailer\n<< /Root 1 0 R >>\n%%EOF\n"
+
+
+def _object_stream_pdf(pages: int) -> bytes:
+    bodies = [b"<< /Type /Catalog /Pages 2 0 R >>", f"<< /Type /Pages /Count {pages} >>".encode()]
+    offsets, content = [], b""
+    for body in bodies:
+        offsets.append(len(content))
+        content += body + b"\n"
+    header = f"1 {offsets[0]} 2 {offsets[1]} ".encode()
+    stream = zlib.compress(header + content)
+    return (
+        b"%PDF-1.5\n"
+        + f"5 0 obj\n<< /Type /ObjStm /N 2 /First {len(header)} /Length {len(stream)} /Filter /FlateDecode >>\nstream\n".encode()
+        + stream + b"\nendstream\nendobj\n"
+        + b"6 0 obj\n<< /Type /XRef /Root 1 0 R /Size 7 >>\nstream\n\nendstream\nendobj\n%%EOF\n"
+    )
+
+
+def test_page_count_of_classic_pdf():
+    assert invoice_jobs.count_pdf_pages(_classic_pdf(3)) == 3
+
+
+def test_page_count_of_pdf_with_object_streams():
+    assert invoice_jobs.count_pdf_pages(_object_stream_pdf(7)) == 7
+
+
+def test_unreadable_page_count_is_none():
+    assert invoice_jobs.count_pdf_pages(b"not a pdf") is None
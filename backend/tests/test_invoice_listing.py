@@ -0,0 +1,44 @@
+# backend/tests/test_invoice_listing.py
+"""Invoice listings return every invoice unless the client asks for pages."""
+
+from datetime import date, timedelta
+
+from sqlalchemy import insert
+from sqlmodel import Session
+
+from app import auth, database, models, pagination
+
+
+def test_property_invoices_are_complete_without_limit_and_paged_with_it(client):
+    with Session(database.engine) as db:
+        owner = models.User(username="listing-owner", email="listing-owner@example.com", role=models.Roles.OWNER, hashed_password="x")
+        db.add(owner)
+        db.commit()
+        prop = models.Property(name="Listing", address="ul. Testowa 2", owner_id=owner.id)
+        db.add(prop)
+        db.commit()
+        property_id = prop.id
+        count = pagination.DEFAULT_PAGE_SIZE + 50
+        db.exec(insert(models.Invoice), params=[
+            {"amount": i, "issue_date": date(2024, 1, 1) + timedelta(days=i % 40), "description": f"Invoice {i}",
+             "property_id": property_id, "uploader_id": owner.id}
+            for i in range(count)
+        ])
+        db.commit()
+    headers = {"Authorization": f"Bearer {auth.create_access_token({'sub': 'listing-owner'})}"}
+
+    response = client.get(f"/invoices/property/{property_id}", headers=headers)
+    assert response.status_code == 200
+    assert len(response.json()) == count
+    assert pagination.NEXT_CURSOR_HEADER not in response.headers
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 40, **({"cursor": cursor} if cursor else {})}
+        response = client.get(f"/invoices/property/{property_id}", params=params, headers=headers)
+        assert response.status_code == 200
+        seen += [invoice["id"] for invoice in response.json()]
+        cursor = response.headers.get(pagination.NEXT_CURSOR_HEADER)
+        if not cursor:
+            break
+    assert sorted(seen) == sorted(set(seen)) and len(seen) == count
@@ -0,0 +1,60 @@
+# backend/tests/test_jobs.py
+"""Job leases: a running job keeps its lease, and a run whose lease expired cannot finish a re-claimed job."""
+
+from datetime import timedelta
+
+from sqlalchemy import update
+from sqlmodel import Session, select
+
+from app import database, jobs, models
+
+
+def _enqueue() -> int:
+    with Session(database.engine) as db:
+        jobs.enqueue(db, "test.noop", {})
+        db.commit()
+        return db.exec(select(models.Job.id).order_by(models.Job.id.desc())).first()
+
+
+def _claim(job_id: int, worker_id: str) -> jobs.ClaimedJob:
+    return next(job for job in jobs.claim(worker_id, 1000) if job.id == job_id)
+
+
+def _age_lease(job_id: int) -> None:
+    with Session(database.engine) as db:
+        db.exec(
+            update(models.Job).where(models.Job.id == job_id)
+            .values(locked_at=jobs.utcnow() - timedelta(seconds=jobs.JOB_LEASE_SECONDS + 1))
+        )
+        db.commit()
+
+
+def _job(job_id: int) -> models.Job:
+    with Session(database.engine) as db:
+        return db.get(models.Job, job_id)
+
+
+def test_renewed_lease_is_not_requeued(client):
+    job_id = _enqueue()
+    job = _claim(job_id, "host:1")
+    _age_lease(job_id)
+
+    jobs.renew_leases([job])
+    jobs.requeue_expired()
+    assert _job(job_id).status == models.JobStatus.RUNNING
+
+
+def test_expired_run_cannot_finish_a_reclaimed_job(client):
+    job_id = _enqueue()
+    first = _claim(job_id, "host:1")
+    _age_lease(job_id)
+    jobs.requeue_expired()
+
+    second = _claim(job_id, "host:1")
+    assert second.lock_token != first.lock_token
+
+    jobs.mark_succeeded(first, {"stale": True})
+    assert _job(job_id).status == models.JobStatus.RUNNING
+    jobs.mark_succeeded(second, {"stale": False})
+    job = _job(job_id)
+    assert job.status == models.JobStatus.SUCCEEDED and job.result == {"stale": False}
@@ -0,0 +1,104 @@
+# backend/tests/test_properties_queries.py
+"""The property endpoints load owners, assignments and tenants in a fixed number of queries."""
+
+from contextlib import contextmanager
+from datetime import date
+
+import pytest
+from sqlalchemy import event, insert
+from sqlmodel import Session, func, select
+
+from app import access, auth, cache, database, models
+
+TENANTS_PER_PROPERTY = 3
+
+
+@contextmanager
+def count_queries():
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engines = {database.engine, database.read_engine}
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        for engine in engines:
+            event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+def _create_user(db: Session, username: str, role: str) -> int:
+    user = models.User(username=username, email=f"{username}@example.com", role=role, hashed_password="x")
+    db.add(user)
+    db.commit()
+    return user.id
+
+
+def _add_properties(owner_id: int, count: int) -> int:
+    """Adds count properties of owner_id with TENANTS_PER_PROPERTY tenants each; returns the last property id."""
+    with Session(database.engine) as db:
+        first = (db.exec(select(func.max(models.Property.id))).one() or 0) + 1
+        property_ids = list(range(first, first + count))
+        db.exec(insert(models.Property), params=[
+            {"id": property_id, "name": f"Property {property_id}", "address": "ul. Testowa 1", "owner_id": owner_id}
+            for property_id in property_ids
+        ])
+        first_user = (db.exec(select(func.max(models.User.id))).one() or 0) + 1
+        tenant_ids = list(range(first_user, first_user + count * TENANTS_PER_PROPERTY))
+        db.exec(insert(models.User), params=[
+            {"id": tenant_id, "username": f"tenant{tenant_id}", "email": f"tenant{tenant_id}@example.com",
+             "role": models.Roles.TENANT, "hashed_password": "x"}
+            for tenant_id in tenant_ids
+        ])
+        db.exec(insert(models.TenantAssignment), params=[
+            {"property_id": property_id, "tenant_id": tenant_ids[index * TENANTS_PER_PROPERTY + k], "start_date": date(2024, 1, 1)}
+            for index, property_id in enumerate(property_ids)
+            for k in range(TENANTS_PER_PROPERTY)
+        ])
+        db.commit()
+    access.invalidate_all()
+    cache.invalidate_dashboard_cache()
+    return property_ids[-1]
+
+
+@pytest.fixture(scope="module")
+def owner(client):
+    with Session(database.engine) as db:
+        owner_id = _create_user(db, "query-count-owner", models.Roles.OWNER)
+        _create_user(db, "query-count-admin", models.Roles.ADMIN)
+    return owner_id
+
+
+def _headers(username: str) -> dict:
+    return {"Authorization": f"Bearer {auth.create_access_token({'sub': username})}"}
+
+
+def _query_count(client, url: str, username: str) -> int:
+    headers = _headers(username)
+    client.get(url, headers=headers).raise_for_status() # rozgrzewa cache użytkownika i dostępu
+    with count_queries() as statements:
+        response = client.get(url, headers=headers)
+    response.raise_for_status()
+    return len(statements)
+
+
+@pytest.mark.parametrize("username", ["query-count-owner", "query-count-admin"])
+def test_property_list_query_count_does_not_grow_with_properties(client, owner, username):
+    _add_properties(owner, 5)
+    small = _query_count(client, "/properties/", username)
+
+    _add_properties(owner, 45)
+    large = _query_count(client, "/properties/", username)
+
+    assert len(client.get("/properties/", headers=_headers("query-count-owner")).json()) >= 50
+    assert large == small
+
+
+def test_property_detail_query_count_does_not_grow_with_properties(client, owner):
+    small = _query_count(client, f"/properties/{_add_properties(owner, 5)}", "query-count-owner")
+    large = _query_count(client, f"/properties/{_add_properties(owner, 50)}", "query-count-owner")
+
+    assert large == small
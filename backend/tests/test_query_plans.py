@@ -0,0 +1,28 @@
+# backend/tests/test_query_plans.py
+"""The hot queries search an index on the schema the migrations ship (python -m app.migrations check-plans)."""
+
+from sqlmodel import create_engine
+
+from app import migrations
+from app.migrations import query_plans
+
+
+def test_hot_queries_do_not_scan_whole_tables():
+    failures = {result.name: result.full_scans for result in query_plans.check_plans() if not result.ok}
+    assert failures == {}
+
+
+def test_check_reports_a_query_whose_index_is_missing():
+    engine = create_engine("sqlite://")
+    migrations.upgrade(engine)
+    with engine.begin() as connection:
+        connection.exec_driver_sql("DROP INDEX ix_jobs_invoice_id")
+
+    results = {result.name: result for result in query_plans.check_plans(engine)}
+    assert not results["invoice_jobs"].ok
+    assert results["due_jobs"].ok
+
+
+def test_search_without_match_is_a_full_scan():
+    assert query_plans._is_full_scan("SCAN invoice_search VIRTUAL TABLE INDEX 0:")
+    assert not query_plans._is_full_scan("SCAN invoice_search VIRTUAL TABLE INDEX 192:M4<")
@@ -0,0 +1,39 @@
+# backend/tests/test_read_your_writes.py
+"""A user's reads go to the primary while the replica may still lack their own writes."""
+
+import os
+import tempfile
+
+from sqlmodel import Session, create_engine, select
+
+from app import auth, database, migrations, models
+
+
+def _headers(username: str) -> dict:
+    return {"Authorization": f"Bearer {auth.create_access_token({'sub': username})}"}
+
+
+def test_property_created_a_moment_ago_is_read_from_the_primary(client, monkeypatch):
+    with Session(database.engine) as db:
+        for username, role in (("ryw-admin", models.Roles.ADMIN), ("ryw-owner", models.Roles.OWNER)):
+            db.add(models.User(username=username, email=f"{username}@example.com", role=role, hashed_password="x"))
+        db.commit()
+        owner_id = db.exec(select(models.User.id).where(models.User.username == "ryw-owner")).one()
+
+    # Replika, która nie widziała jeszcze żadnego zapisu
+    replica = create_engine(f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'replica.db')}")
+    migrations.upgrade(replica)
+    monkeypatch.setattr(database, "read_engine", replica)
+    monkeypatch.setattr(database, "SQLITE_REPLICA_REFRESH_SECONDS", 60)
+
+    response = client.post("/properties/add", json={"name": "Nowa", "address": "ul. Krótka 1", "owner_id": owner_id}, headers=_headers("ryw-admin"))
+    assert response.status_code == 201
+    property_id = response.json()["id"]
+
+    assert client.get(f"/properties/{property_id}", headers=_headers("ryw-admin")).status_code == 200
+    # Właściciel nic nie zapisał - czyta z repliki, która nieruchomości jeszcze nie ma
+    assert client.get("/properties/", headers=_headers("ryw-owner")).json() == []
+
+    monkeypatch.setattr(database, "SQLITE_REPLICA_REFRESH_SECONDS", 0)
+    assert client.get(f"/properties/{property_id}", headers=_headers("ryw-admin")).status_code == 404
+    replica.dispose()
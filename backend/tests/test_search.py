@@ -0,0 +1,42 @@
+# backend/tests/test_search.py
+"""Paging through search results reaches every match, also beyond the first ranked block."""
+
+from datetime import date
+
+from sqlalchemy import insert
+from sqlmodel import Session, select
+
+from app import auth, database, models, pagination, search
+
+
+def test_search_pages_cover_matches_older_than_the_rank_window(client, monkeypatch):
+    monkeypatch.setattr(search, "SEARCH_RANK_WINDOW", 7)
+    with Session(database.engine) as db:
+        owner = models.User(username="search-owner", email="search-owner@example.com", role=models.Roles.OWNER, hashed_password="x")
+        db.add(owner)
+        db.commit()
+        prop = models.Property(name="Search", address="ul. Testowa 3", owner_id=owner.id)
+        db.add(prop)
+        db.commit()
+        property_id = prop.id
+        db.exec(insert(models.Invoice), params=[
+            {"amount": i, "issue_date": date(2024, 1, 1), "description": f"zzsearch {'zzsearch ' * (i % 3)}{i}",
+             "property_id": property_id, "uploader_id": owner.id}
+            for i in range(23)
+        ])
+        db.commit()
+        expected = set(db.exec(select(models.Invoice.id).where(models.Invoice.property_id == property_id)).all())
+    headers = {"Authorization": f"Bearer {auth.create_access_token({'sub': 'search-owner'})}"}
+
+    seen, cursor = [], None
+    while True:
+        params = {"q": "zzsearch", "limit": 5, **({"cursor": cursor} if cursor else {})}
+        response = client.get("/invoices/search", params=params, headers=headers)
+        assert response.status_code == 200
+        seen += [invoice["id"] for invoice in response.json()]
+        cursor = response.headers.get(pagination.NEXT_CURSOR_HEADER)
+        if not cursor:
+            break
+
+    assert len(seen) == len(set(seen))
+    assert set(seen) == expected
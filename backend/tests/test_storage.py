@@ -0,0 +1,59 @@
+# backend/tests/test_storage.py
+"""A blob released by one invoice survives an upload of the same content that races with its removal."""
+
+import hashlib
+import os
+
+from sqlmodel import Session
+
+from app import database, models, storage
+
+
+def _stage(directory: str, content: bytes) -> storage.StagedUpload:
+    temp_path = storage._create_temp_file(directory)
+    with open(temp_path, "wb") as staged:
+        staged.write(content)
+    return storage.StagedUpload(temp_path=temp_path, size=len(content), sha256=hashlib.sha256(content).hexdigest())
+
+
+def test_upload_between_release_and_removal_keeps_the_blob(client, tmp_path):
+    directory = str(tmp_path)
+    first = _stage(directory, b"%PDF-1.4 shared")
+    path = storage.blob_path(directory, first.sha256)
+    with Session(database.engine) as db:
+        storage.acquire_blob(db, first.sha256, first.size, path)
+        db.commit()
+    storage.publish_blob(first.temp_path, path)
+
+    # Usunięcie ostatniej faktury zwalnia blob...
+    with Session(database.engine) as db:
+        orphaned = storage.release_files(db, [(first.sha256, path)])
+        db.commit()
+    assert orphaned == [path]
+
+    # ...a zanim pliki zostaną usunięte, nowe wysłanie tej samej treści zapisuje referencję i publikuje plik
+    second = _stage(directory, b"%PDF-1.4 shared")
+    with Session(database.engine) as db:
+        storage.acquire_blob(db, second.sha256, second.size, path)
+        db.commit()
+    storage.publish_blob(second.temp_path, path)
+
+    storage.remove_files(orphaned)
+    assert os.path.exists(path)
+    assert os.listdir(os.path.dirname(path)) == [os.path.basename(path)]
+
+
+def test_removal_deletes_an_unreferenced_blob(client, tmp_path):
+    directory = str(tmp_path)
+    staged = _stage(directory, b"%PDF-1.4 alone")
+    path = storage.blob_path(directory, staged.sha256)
+    with Session(database.engine) as db:
+        storage.acquire_blob(db, staged.sha256, staged.size, path)
+        db.commit()
+    storage.publish_blob(staged.temp_path, path)
+
+    with Session(database.engine) as db:
+        orphaned = storage.release_files(db, [(staged.sha256, path)])
+        db.commit()
+    storage.remove_files(orphaned)
+    assert os.listdir(os.path.dirname(path)) == []